@@ -0,0 +1 @@
+"""NumPy based analysis of the parsed electrooptics simulation data."""
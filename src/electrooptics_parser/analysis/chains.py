@@ -0,0 +1,54 @@
+"""
+Alignment of the polymer chains of a frame with the poling field.
+
+Every chain is represented by its end-to-end vector, the sum of the minimum-image
+bond vectors between atoms of consecutive ids. This also holds for wrapped
+coordinates, as long as no bond spans more than half the box.
+"""
+
+import numpy as np
+
+DEFAULT_DIRECTION = np.array([0.0, 0.0, 1.0])
+
+
+def end_to_end_vectors(
+    ids: np.ndarray, molecules: np.ndarray, positions: np.ndarray, box: np.ndarray
+) -> np.ndarray:
+    """
+    Returns the ``(n_molecules, 3)`` end-to-end vectors in the order of the sorted
+    molecule ids. ``box`` holds the edge lengths of an orthogonal periodic box.
+    """
+    order = np.lexsort((ids, molecules))
+    molecules = molecules[order]
+    bonds = np.diff(positions[order], axis=0)
+    bonds -= box * np.round(bonds / box)
+    # steps between molecules are no bonds
+    same = molecules[1:] == molecules[:-1]
+    unique, inverse = np.unique(molecules, return_inverse=True)
+    vectors = np.empty((len(unique), 3))
+    for axis in range(3):
+        vectors[:, axis] = np.bincount(
+            inverse[1:][same], weights=bonds[same, axis], minlength=len(unique)
+        )
+    return vectors
+
+
+def chain_alignment(vectors: np.ndarray, direction=DEFAULT_DIRECTION) -> dict:
+    """
+    Order parameters of the chain vectors with respect to ``direction``: the polar
+    ``mean_cos`` = <cos a>, ``p2`` = <(3 cos^2 a - 1) / 2> and, independent of the
+    field, the ``nematic_order`` as the largest eigenvalue of the Q tensor. Chains of
+    zero length (single atoms) are ignored, all values are NaN without chains.
+    """
+    lengths = np.linalg.norm(vectors, axis=1)
+    units = vectors[lengths > 0] / lengths[lengths > 0, None]
+    if not len(units):
+        return {'mean_cos': np.nan, 'p2': np.nan, 'nematic_order': np.nan}
+    direction = np.asarray(direction, dtype=np.float64)
+    cos = units @ (direction / np.linalg.norm(direction))
+    q_tensor = 1.5 * (units.T @ units) / len(units) - 0.5 * np.eye(3)
+    return {
+        'mean_cos': cos.mean(),
+        'p2': (1.5 * cos**2 - 0.5).mean(),
+        'nematic_order': np.linalg.eigvalsh(q_tensor)[-1],
+    }
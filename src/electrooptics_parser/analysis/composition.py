@@ -0,0 +1,92 @@
+"""
+Chemical composition of the system from the atom types and the Masses section.
+
+LAMMPS data files carry no element names, only a mass per atom type. Every type is
+assigned the element whose standard atomic weight is within ``MASS_TOLERANCE`` of
+its mass, or within ``ROUNDED_MASS_TOLERANCE`` for masses given with one decimal
+(e.g. 35.5 for Cl). Coarse-grained or united-atom types (e.g. CH2 with 14.027) match
+no element and are counted as unassigned. All counts are ``np.bincount`` calls over
+the type column, so the cost stays linear in the number of atoms.
+"""
+
+import numpy as np
+
+# standard atomic weights of the elements commonly found in force field models
+ELEMENT_MASSES = {
+    'H': 1.008, 'He': 4.003, 'Li': 6.94, 'Be': 9.012, 'B': 10.81, 'C': 12.011,
+    'N': 14.007, 'O': 15.999, 'F': 18.998, 'Ne': 20.18, 'Na': 22.99, 'Mg': 24.305,
+    'Al': 26.982, 'Si': 28.085, 'P': 30.974, 'S': 32.06, 'Cl': 35.45, 'Ar': 39.948,
+    'K': 39.098, 'Ca': 40.078, 'Sc': 44.956, 'Ti': 47.867, 'V': 50.941, 'Cr': 51.996,
+    'Mn': 54.938, 'Fe': 55.845, 'Co': 58.933, 'Ni': 58.693, 'Cu': 63.546, 'Zn': 65.38,
+    'Ga': 69.723, 'Ge': 72.63, 'As': 74.922, 'Se': 78.971, 'Br': 79.904, 'Kr': 83.798,
+    'Rb': 85.468, 'Sr': 87.62, 'Y': 88.906, 'Zr': 91.224, 'Nb': 92.906, 'Mo': 95.95,
+    'Ru': 101.07, 'Rh': 102.906, 'Pd': 106.42, 'Ag': 107.868, 'Cd': 112.414,
+    'In': 114.818, 'Sn': 118.71, 'Sb': 121.76, 'Te': 127.6, 'I': 126.904,
+    'Xe': 131.293, 'Cs': 132.905, 'Ba': 137.327, 'W': 183.84, 'Pt': 195.084,
+    'Au': 196.967, 'Hg': 200.592, 'Pb': 207.2, 'Bi': 208.98,
+}  # fmt: skip
+# in atomic mass units, small enough to tell CH2 (14.027) from N (14.007)
+MASS_TOLERANCE = 0.015
+# half a decimal for masses rounded to one, e.g. 32.1 for S, with some slack for
+# their binary representation
+ROUNDED_MASS_TOLERANCE = 0.051
+
+_SYMBOLS = np.array(list(ELEMENT_MASSES))
+_MASSES = np.array(list(ELEMENT_MASSES.values()))
+
+
+def type_elements(masses: np.ndarray) -> np.ndarray:
+    """Returns the element symbol of every mass, ``''`` for masses of no element."""
+    masses = np.asarray(masses, dtype=np.float64)
+    difference = np.abs(masses[:, None] - _MASSES[None, :])
+    nearest = np.argmin(difference, axis=1)
+    rounded = np.isclose(masses, np.round(masses, 1), rtol=0, atol=1e-9)
+    tolerance = np.where(rounded, ROUNDED_MASS_TOLERANCE, MASS_TOLERANCE)
+    matched = difference[np.arange(len(masses)), nearest] <= tolerance
+    return np.where(matched, _SYMBOLS[nearest], '')
+
+
+def _type_lookup(types: np.ndarray, values: np.ndarray, size: int, fill):
+    # array indexed by atom type
+    lookup = np.full(size, fill, dtype=np.asarray(values).dtype)
+    lookup[types] = values
+    return lookup
+
+
+def atom_masses(
+    atoms_type: np.ndarray, masses_type: np.ndarray, masses_value: np.ndarray
+) -> np.ndarray:
+    """Looks up the mass of every atom from the masses of its type, NaN if unknown."""
+    size = max(atoms_type.max(initial=0), masses_type.max(initial=0)) + 1
+    masses = _type_lookup(masses_type, masses_value.astype(np.float64), size, np.nan)
+    return masses[atoms_type]
+
+
+def composition(
+    atoms_type: np.ndarray,
+    atoms_charge: np.ndarray,
+    masses_type: np.ndarray,
+    masses_value: np.ndarray,
+) -> dict:
+    """
+    Counts the atoms of every element and sums up the mass and charge of the system.
+
+    Returns the ``elements`` in alphabetical order with their ``element_count``, the
+    ``n_unassigned`` atoms of types without element or mass, the ``total_mass`` of
+    the atoms with known mass and the ``net_charge``.
+    """
+    size = max(atoms_type.max(initial=0), masses_type.max(initial=0)) + 1
+    per_type = np.bincount(atoms_type, minlength=size)
+    masses = _type_lookup(masses_type, masses_value.astype(np.float64), size, np.nan)
+    symbols = _type_lookup(masses_type, type_elements(masses_value), size, '')
+
+    elements, element_index = np.unique(symbols, return_inverse=True)
+    counts = np.bincount(element_index, weights=per_type, minlength=len(elements))
+    known = elements != ''
+    return {
+        'elements': elements[known].tolist(),
+        'element_count': counts[known].astype(np.int64),
+        'n_unassigned': int(counts[~known].sum()),
+        'total_mass': float(np.nansum(per_type * masses)),
+        'net_charge': float(np.sum(atoms_charge)),
+    }
@@ -0,0 +1,48 @@
+"""
+Shape-preserving downsampling of long theta series for plotting.
+
+The samples between the first and the last one are split into evenly sized buckets,
+and of every bucket the minimum and the maximum are kept in time order (min/max
+decimation). Unlike keeping every n-th sample, peaks and the envelope of the series
+survive. All buckets are reduced by one ``argmin`` and one ``argmax`` over the
+series reshaped to ``(n_buckets, bucket_size)``.
+"""
+
+import numpy as np
+
+# the first and the last sample, and the minimum and the maximum of one bucket
+MIN_POINTS = 4
+
+
+def minmax_indices(values: np.ndarray, points: int) -> np.ndarray:
+    """
+    Returns the sorted indices of at most ``points`` samples of ``values`` that keep
+    its shape: the first and last sample and the extrema of evenly sized buckets.
+    All indices are returned if ``values`` has at most ``points`` samples.
+    """
+    n_values = len(values)
+    if n_values <= points:
+        return np.arange(n_values)
+    if points < MIN_POINTS:
+        raise ValueError(f'Downsampling needs at least {MIN_POINTS} points.')
+    inner = np.asarray(values[1:-1])
+    bucket_size = -(-len(inner) // ((points - 2) // 2))
+    n_buckets = -(-len(inner) // bucket_size)
+    # padded with the last value, which never wins over its earlier occurrence
+    buckets = np.pad(inner, (0, n_buckets * bucket_size - len(inner)), mode='edge')
+    buckets = buckets.reshape(n_buckets, bucket_size)
+    offsets = 1 + bucket_size * np.arange(n_buckets)
+    return np.unique(
+        np.concatenate(
+            [
+                [0, n_values - 1],
+                offsets + np.argmin(buckets, axis=1),
+                offsets + np.argmax(buckets, axis=1),
+            ]
+        )
+    )
+
+
+def downsample_theta(theta: np.ndarray, points: int) -> np.ndarray:
+    """Downsamples a ``(rows, 2)`` time/theta array to at most ``points`` rows."""
+    return theta[minmax_indices(theta[:, 1], points)]
@@ -0,0 +1,164 @@
+"""
+Statistics of the theta (chain alignment) order parameter of each trajectory.
+
+All trajectories of a run are padded into one ``(n_trajectories, n_times)`` matrix
+with a validity mask, so every statistic is computed for all of them at once. For
+storage, ``theta_ensemble`` aligns them on a shared time axis instead.
+"""
+
+import warnings
+
+import numpy as np
+
+# a trajectory is equilibrated once theta comes within this many reference standard
+# deviations of the reference mean
+EQUILIBRATION_TOLERANCE = 2.0
+
+
+def _masked_mean(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    return np.sum(values * mask, axis=1) / np.maximum(mask.sum(axis=1), 1)
+
+
+def _masked_std(values: np.ndarray, mask: np.ndarray, mean: np.ndarray) -> np.ndarray:
+    return np.sqrt(_masked_mean((values - mean[:, None]) ** 2, mask))
+
+
+def _autocorrelation_time(
+    values: np.ndarray, mask: np.ndarray, mean: np.ndarray, step: np.ndarray
+) -> np.ndarray:
+    """
+    Integrated autocorrelation time ``step * (1/2 + sum_k rho_k)``, summed up to the
+    first lag where the normalised autocorrelation ``rho`` drops to zero.
+    """
+    n_times = values.shape[1]
+    size = 1 << int(2 * n_times - 1).bit_length()
+    signal = np.fft.rfft((values - mean[:, None]) * mask, size, axis=1)
+    support = np.fft.rfft(mask.astype(np.float64), size, axis=1)
+    covariance = np.fft.irfft(signal * signal.conj(), size, axis=1)[:, :n_times]
+    pairs = np.rint(np.fft.irfft(support * support.conj(), size, axis=1)[:, :n_times])
+    covariance = covariance / np.maximum(pairs, 1)
+
+    variance = covariance[:, :1]
+    rho = np.divide(
+        covariance, variance, out=np.zeros_like(covariance), where=variance > 0
+    )
+    rho[pairs == 0] = 0.0
+    cutoff = np.where((rho <= 0).any(axis=1), np.argmax(rho <= 0, axis=1), n_times)
+    lags = np.arange(n_times)
+    summed = np.sum(np.where((lags > 0) & (lags < cutoff[:, None]), rho, 0.0), axis=1)
+    return step * (0.5 + summed)
+
+
+def theta_statistics(thetas: list[np.ndarray]) -> dict[str, np.ndarray]:
+    """
+    Computes the order parameter statistics of every ``(rows, 2)`` time/theta array.
+
+    The second half of a trajectory is taken as reference for the equilibrium. The
+    equilibration point is the first sample where theta comes within
+    ``EQUILIBRATION_TOLERANCE`` reference standard deviations of the reference
+    mean, at the latest the start of the second half. Mean, standard deviation and
+    autocorrelation time are computed after equilibration.
+
+    Returns arrays with one entry per trajectory for ``mean``, ``std``,
+    ``equilibration_time``, ``autocorrelation_time`` and ``final_value``, with times
+    in the units of the time column. All statistics of empty trajectories are NaN.
+    """
+    lengths = np.array([len(theta) for theta in thetas], dtype=np.int64)
+    n_trajectories, n_times = len(thetas), int(lengths.max(initial=1))
+    times = np.zeros((n_trajectories, n_times))
+    values = np.zeros((n_trajectories, n_times))
+    for index, theta in enumerate(thetas):
+        times[index, : len(theta)] = theta[:, 0]
+        values[index, : len(theta)] = theta[:, 1]
+    samples = np.arange(n_times)
+    valid = samples < lengths[:, None]
+    rows = np.arange(n_trajectories)
+    last = np.maximum(lengths - 1, 0)
+
+    half = lengths // 2
+    reference = valid & (samples >= half[:, None])
+    reference_mean = _masked_mean(values, reference)
+    reference_std = _masked_std(values, reference, reference_mean)
+    inside = valid & (
+        np.abs(values - reference_mean[:, None])
+        <= EQUILIBRATION_TOLERANCE * reference_std[:, None]
+    )
+    equilibrated = np.minimum(
+        np.where(inside.any(axis=1), np.argmax(inside, axis=1), half), half
+    )
+
+    production = valid & (samples >= equilibrated[:, None])
+    mean = _masked_mean(values, production)
+    std = _masked_std(values, production, mean)
+
+    steps = np.diff(times, axis=1)
+    steps = np.where(valid[:, 1:], steps, np.nan)
+    step = np.zeros(n_trajectories)
+    measured = lengths > 1
+    step[measured] = np.nanmedian(steps[measured], axis=1)
+
+    statistics = {
+        'mean': mean,
+        'std': std,
+        'equilibration_time': times[rows, equilibrated] - times[:, 0],
+        'autocorrelation_time': _autocorrelation_time(values, production, mean, step),
+        'final_value': values[rows, last],
+    }
+    for statistic in statistics.values():
+        statistic[lengths == 0] = np.nan
+    return statistics
+
+
+def ensemble_statistics(statistics: dict[str, np.ndarray]) -> dict[str, float]:
+    """
+    Aggregates the per-trajectory ``theta_statistics`` over the whole ensemble,
+    leaving out the NaN statistics of empty trajectories.
+    """
+    mean = statistics['mean']
+    final_value = statistics['final_value']
+    with warnings.catch_warnings():
+        # all trajectories empty
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return {
+            'n_trajectories': len(mean),
+            'mean': float(np.nanmean(mean)),
+            'std': float(np.nanstd(mean)),
+            'final_value_mean': float(np.nanmean(final_value)),
+            'final_value_std': float(np.nanstd(final_value)),
+            'equilibration_time': float(np.nanmax(statistics['equilibration_time'])),
+            'autocorrelation_time': float(
+                np.nanmean(statistics['autocorrelation_time'])
+            ),
+        }
+
+
+def theta_ensemble(thetas: list[np.ndarray]) -> dict[str, np.ndarray]:
+    """
+    Stacks the ``(rows, 2)`` time/theta arrays onto one shared time axis, the
+    sorted union of all their times.
+
+    Returns the ``time`` axis, the ``(n_trajectories, n_times)`` ``theta`` matrix
+    with a ``mask`` of the samples present in every trajectory (absent samples are
+    zero), the ``n_samples`` of every trajectory, and the ensemble ``mean`` and
+    ``std`` curves with the ``n_contributing`` trajectories at every time.
+    """
+    time = np.unique(np.concatenate([theta[:, 0] for theta in thetas] or [[]]))
+    values = np.zeros((len(thetas), len(time)))
+    mask = np.zeros((len(thetas), len(time)), dtype=bool)
+    for index, theta in enumerate(thetas):
+        columns = np.searchsorted(time, theta[:, 0])
+        values[index, columns] = theta[:, 1]
+        mask[index, columns] = True
+
+    count = mask.sum(axis=0)
+    mean = values.sum(axis=0) / np.maximum(count, 1)
+    variance = np.sum(((values - mean) * mask) ** 2, axis=0) / np.maximum(count, 1)
+    return {
+        'time': time,
+        'theta': values,
+        'mask': mask,
+        'n_samples': mask.sum(axis=1),
+        'mean': mean,
+        'std': np.sqrt(variance),
+        'n_contributing': count,
+    }
@@ -0,0 +1,202 @@
+"""
+Bond graph and per-molecule descriptors of the system data file.
+
+The bonds are turned into a compressed sparse row (CSR) adjacency index over the
+rows of the atom arrays, so the neighbours of an atom are a slice of one array.
+The connected parts of the graph are labelled once, and every molecule is then
+unwrapped across the periodic boundaries by a breadth-first search from one chain
+end, run level by level for all parts at once. The number of NumPy calls grows with
+the longest chain, not with the number of atoms or fragments.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from electrooptics_parser.analysis.chains import DEFAULT_DIRECTION
+from electrooptics_parser.analysis.composition import atom_masses
+
+
+class BondGraph(NamedTuple):
+    # neighbours of atom row i are indices[indptr[i]:indptr[i + 1]]
+    indptr: np.ndarray
+    indices: np.ndarray
+
+    @property
+    def degree(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+
+def bond_graph(ids: np.ndarray, bonds: np.ndarray) -> BondGraph:
+    """
+    Builds the adjacency index of the atoms with the IDs ``ids`` from the
+    ``(n_bonds, 4)`` bonds (index, type, atom ID, atom ID) of the data file.
+    """
+    rows = atom_rows(ids, bonds[:, 2:4])
+    first, second = rows[:, 0], rows[:, 1]
+    heads = np.concatenate([first, second])
+    tails = np.concatenate([second, first])
+    counts = np.bincount(heads, minlength=len(ids))
+    indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    indices = tails[np.argsort(heads, kind='stable')].astype(np.int64)
+    return BondGraph(indptr=indptr, indices=indices)
+
+
+def atom_rows(ids: np.ndarray, atom_ids: np.ndarray) -> np.ndarray:
+    """Maps atom IDs to the rows of the atom arrays, raising for unknown IDs."""
+    order = np.argsort(ids, kind='stable')
+    rows = np.searchsorted(ids, atom_ids, sorter=order)
+    rows = order[np.minimum(rows, len(ids) - 1)] if len(ids) else rows
+    if atom_ids.size and (not len(ids) or np.any(ids[rows] != atom_ids)):
+        raise ValueError('bonds reference atom IDs that are not in the Atoms section')
+    return rows
+
+
+def _neighbours(graph: BondGraph, atoms: np.ndarray) -> tuple:
+    # all (atom, neighbour) pairs of the given atoms, gathered from the CSR slices
+    starts = graph.indptr[atoms]
+    counts = graph.indptr[atoms + 1] - starts
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    edges = offsets + np.arange(counts.sum())
+    return np.repeat(atoms, counts), graph.indices[edges]
+
+
+def _roots(molecules: np.ndarray, candidates: np.ndarray, order: np.ndarray):
+    # candidate row with the lowest ID of every molecule that has one, rows by ID
+    rows = order[candidates[order]]
+    _, first = np.unique(molecules[rows], return_index=True)
+    return rows[first]
+
+
+def connected_components(graph: BondGraph) -> np.ndarray:
+    """
+    Labels every atom row with the lowest row of its connected component. Each
+    pass hooks the label of every atom onto the lowest label of its neighbours and
+    then follows the labels until every atom points at the root of its tree.
+    """
+    n_atoms = len(graph.indptr) - 1
+    heads = np.repeat(np.arange(n_atoms), graph.degree)
+    labels = np.arange(n_atoms)
+    while True:
+        hooked = labels.copy()
+        np.minimum.at(hooked, labels[heads], labels[graph.indices])
+        jumped = hooked[hooked]
+        while not np.array_equal(jumped, hooked):
+            hooked, jumped = jumped, jumped[jumped]
+        if np.array_equal(hooked, labels):
+            return labels
+        labels = hooked
+
+
+def unwrap_molecules(
+    graph: BondGraph, ids: np.ndarray, positions, box
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Unwraps the ``positions`` of every connected part of the bond graph along its
+    bonds, starting from its first chain end, the atom with the lowest ID of those
+    with at most one bond, or from its lowest ID if it is a ring. Returns the
+    unwrapped positions, the bond distance of every atom from its root and the root
+    of every atom. ``box`` holds the edge lengths of an orthogonal periodic box,
+    ``None`` for positions that are not wrapped.
+    """
+    n_atoms = len(ids)
+    unwrapped = np.array(positions, dtype=np.float64)
+    distance = np.full(n_atoms, -1, dtype=np.int64)
+    root = np.full(n_atoms, -1, dtype=np.int64)
+    # one root per component: chain ends first, then by ID
+    labels = connected_components(graph)
+    order = np.lexsort((ids, graph.degree > 1, labels))
+    _, first = np.unique(labels[order], return_index=True)
+    frontier = order[first]
+    distance[frontier] = 0
+    root[frontier] = frontier
+    level = 0
+    while len(frontier):
+        level += 1
+        parents, children = _neighbours(graph, frontier)
+        new = distance[children] < 0
+        children, first = np.unique(children[new], return_index=True)
+        parents = parents[new][first]
+        bonds = positions[children] - positions[parents]
+        if box is not None:
+            bonds -= box * np.round(bonds / box)
+        unwrapped[children] = unwrapped[parents] + bonds
+        distance[children] = level
+        root[children] = root[parents]
+        frontier = children
+    return unwrapped, distance, root
+
+
+def molecule_descriptors(arrays: dict, box: np.ndarray, direction=None) -> dict:
+    """
+    Per-molecule descriptors of the atom and bond arrays of the data file, in the
+    order of the sorted molecule IDs: ``n_atoms``, ``n_bonds``, ``chain_length``
+    (bonds from the first chain end to the farthest atom), ``net_charge``,
+    ``center_of_mass`` and ``dipole_moment`` of the unwrapped molecule, the
+    ``end_to_end`` vector from the first chain end to the farthest atom and its
+    cosine ``end_to_end_cos`` with the field ``direction`` (z by default). Unless
+    the masses of all atom types are known all atoms weigh the same. ``box`` is
+    passed on to ``unwrap_molecules``.
+    """
+    direction = DEFAULT_DIRECTION if direction is None else direction
+    ids = arrays['atoms_index']
+    positions = arrays['atoms_position']
+    bonds = arrays.get('bonds_values')
+    if bonds is None:
+        bonds = np.empty((0, 4), dtype=np.int32)
+    masses = None
+    if len(arrays.get('masses_type', [])):
+        masses = atom_masses(
+            arrays['atoms_type'], arrays['masses_type'], arrays['masses_value']
+        )
+    if masses is None or np.isnan(masses).any():
+        masses = np.ones(len(ids))
+    charges = arrays['atoms_charge']
+    molecule_id, molecules = np.unique(arrays['atoms_molecule'], return_inverse=True)
+    n_molecules = len(molecule_id)
+
+    graph = bond_graph(ids, bonds)
+    unwrapped, distance, root = unwrap_molecules(graph, ids, positions, box)
+
+    def total(weights):
+        return np.bincount(molecules, weights=weights, minlength=n_molecules)
+
+    n_atoms = np.bincount(molecules, minlength=n_molecules)
+    mass = total(masses)
+    net_charge = total(charges)
+    center = np.stack([total(masses * unwrapped[:, axis]) for axis in range(3)], 1)
+    center /= np.maximum(mass, np.finfo(np.float64).tiny)[:, None]
+    dipole = np.stack([total(charges * unwrapped[:, axis]) for axis in range(3)], 1)
+    dipole -= net_charge[:, None] * center
+
+    # the first chain end of every molecule, its first atom if it has no ends
+    order = np.argsort(ids, kind='stable')
+    primary = _roots(molecules, np.ones(len(ids), dtype=bool), order)
+    ends = _roots(molecules, graph.degree <= 1, order)
+    primary[molecules[ends]] = ends
+    # the atom farthest from it along the bonds, the lowest ID of equally far atoms
+    reached = np.where(root == primary[molecules], distance, -1)
+    order = np.lexsort((-ids, reached, molecules))
+    farthest = order[np.r_[np.flatnonzero(np.diff(molecules[order])), len(ids) - 1]]
+    end_to_end = unwrapped[farthest] - unwrapped[primary]
+
+    direction = np.asarray(direction, dtype=np.float64)
+    lengths = np.linalg.norm(end_to_end, axis=1)
+    cos = end_to_end @ (direction / np.linalg.norm(direction))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cos = np.where(lengths > 0, cos / lengths, np.nan)
+
+    bonded = molecules[atom_rows(ids, bonds[:, 2])] if len(bonds) else []
+    n_bonds = np.bincount(bonded, minlength=n_molecules)
+    return {
+        'molecule_id': molecule_id.astype(np.int32),
+        'n_atoms': n_atoms.astype(np.int32),
+        'n_bonds': n_bonds.astype(np.int32),
+        'chain_length': distance[farthest].astype(np.int32),
+        'net_charge': net_charge,
+        'center_of_mass': center,
+        'dipole_moment': dipole,
+        'end_to_end': end_to_end,
+        'end_to_end_cos': cos,
+    }
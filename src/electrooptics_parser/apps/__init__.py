@@ -1,23 +1,142 @@
 from nomad.config.models.plugins import AppEntryPoint
-from nomad.config.models.ui import App, Column, Columns, FilterMenu, FilterMenus
+from nomad.config.models.ui import (
+    App,
+    Axis,
+    Column,
+    Dashboard,
+    Layout,
+    Menu,
+    MenuItemHistogram,
+    MenuItemPeriodicTable,
+    MenuItemTerms,
+    SearchQuantities,
+    WidgetHistogram,
+    WidgetScatterPlot,
+)
+
+SCHEMA = 'electrooptics_parser.schema_packages.schema_package.ElectroopticsEntry'
+
+
+def search_quantity(name: str) -> str:
+    """Returns the search quantity of the ``ElectroopticsEntry`` quantity ``name``."""
+    return f'data.{name}#{SCHEMA}'
+
+
+def _histogram(name: str, title: str, width: int = 12) -> MenuItemHistogram:
+    return MenuItemHistogram(
+        title=title, x=Axis(search_quantity=search_quantity(name)), width=width
+    )
+
+
+def _widget(name: str, title: str, x: int, y: int) -> WidgetHistogram:
+    return WidgetHistogram(
+        title=title,
+        x=Axis(search_quantity=search_quantity(name)),
+        n_bins=30,
+        autorange=True,
+        layout={
+            size: Layout(w=6, h=4, x=x, y=y, minW=3, minH=3)
+            for size in ('sm', 'md', 'lg', 'xl', 'xxl')
+        },
+    )
+
 
 app_entry_point = AppEntryPoint(
-    name='NewApp',
-    description='New app entry point configuration.',
+    name='Electrooptics',
+    description='Search electrooptics runs by field, system size and alignment.',
     app=App(
-        label='NewApp',
-        path='app',
+        label='Electrooptics',
+        path='electrooptics',
         category='simulation',
-        columns=Columns(
-            selected=['entry_id'],
-            options={
-                'entry_id': Column(),
-            },
+        description='Search electrooptics runs by field, system size and alignment.',
+        readme=(
+            'Finds the LAMMPS runs of polymer chains in an electric field parsed by '
+            'the electrooptics parser. The field, temperature, system size and the '
+            'alignment of the chains are indexed for every run, so all filters and '
+            'histograms are answered by the search index without opening the '
+            'archives. Child entries of single trajectories carry the temperature '
+            'and the theta statistics of their trajectory.'
+        ),
+        search_quantities=SearchQuantities(include=[f'data.*#{SCHEMA}']),
+        columns=[
+            Column(search_quantity='entry_id', selected=True),
+            Column(search_quantity='mainfile', selected=True),
+            Column(search_quantity=search_quantity('e_field'), selected=True),
+            Column(
+                search_quantity=search_quantity('temperature'), unit='K', selected=True
+            ),
+            Column(search_quantity=search_quantity('n_atoms'), selected=True),
+            Column(search_quantity=search_quantity('n_bonds')),
+            Column(search_quantity=search_quantity('n_molecules')),
+            Column(search_quantity=search_quantity('box_volume'), unit='angstrom**3'),
+            Column(search_quantity=search_quantity('n_trajectories'), selected=True),
+            Column(search_quantity=search_quantity('theta_mean'), selected=True),
+            Column(search_quantity=search_quantity('theta_std')),
+            Column(search_quantity=search_quantity('theta_final_value')),
+            Column(search_quantity=search_quantity('equilibration_time')),
+            Column(search_quantity=search_quantity('mean_cos')),
+            Column(search_quantity=search_quantity('nematic_order')),
+            Column(search_quantity=search_quantity('end_to_end_cos')),
+            Column(search_quantity='upload_create_time'),
+        ],
+        menu=Menu(
+            items=[
+                Menu(
+                    title='Run',
+                    items=[
+                        _histogram('e_field', 'Electric field'),
+                        _histogram('temperature', 'Temperature'),
+                        _histogram('n_trajectories', 'Trajectories'),
+                    ],
+                ),
+                Menu(
+                    title='System',
+                    items=[
+                        MenuItemPeriodicTable(
+                            search_quantity='results.material.elements'
+                        ),
+                        MenuItemTerms(
+                            search_quantity='results.material.chemical_formula_hill',
+                            options=0,
+                        ),
+                        _histogram('n_atoms', 'Atoms', 6),
+                        _histogram('n_bonds', 'Bonds', 6),
+                        _histogram('n_molecules', 'Molecules', 6),
+                        _histogram('box_volume', 'Box volume', 6),
+                    ],
+                ),
+                Menu(
+                    title='Alignment',
+                    items=[
+                        _histogram('theta_mean', 'Mean theta'),
+                        _histogram('theta_std', 'Std of theta'),
+                        _histogram('theta_final_value', 'Final theta'),
+                        _histogram('equilibration_time', 'Equilibration time'),
+                        _histogram('mean_cos', 'Mean cosine to the field'),
+                        _histogram('nematic_order', 'Nematic order'),
+                        _histogram('end_to_end_cos', 'End-to-end cosine'),
+                    ],
+                ),
+            ]
         ),
-        filter_menus=FilterMenus(
-            options={
-                'material': FilterMenu(label='Material'),
-            }
+        dashboard=Dashboard(
+            widgets=[
+                _widget('e_field', 'Electric field', 0, 0),
+                _widget('theta_mean', 'Mean theta', 6, 0),
+                WidgetScatterPlot(
+                    title='Alignment against field',
+                    x=Axis(search_quantity=search_quantity('e_field')),
+                    y=Axis(search_quantity=search_quantity('theta_mean')),
+                    color=search_quantity('temperature'),
+                    size=1000,
+                    autorange=True,
+                    layout={
+                        size: Layout(w=12, h=6, x=0, y=4, minW=3, minH=3)
+                        for size in ('sm', 'md', 'lg', 'xl', 'xxl')
+                    },
+                ),
+            ]
         ),
+        filters_locked={'section_defs.definition_qualified_name': [SCHEMA]},
     ),
 )
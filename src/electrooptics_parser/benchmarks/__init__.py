@@ -0,0 +1 @@
+"""Synthetic runs and benchmarks of the parsing pipeline."""
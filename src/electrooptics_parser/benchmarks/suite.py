@@ -0,0 +1,258 @@
+"""
+Benchmarks of the parsing pipeline on synthetic runs.
+
+Every phase of ``DetailedParser`` is timed on its own, followed by ``read_run``
+without NOMAD and the complete ``NewParser.parse``. For each phase the wall time,
+the bytes and rows read, the throughput and the peak memory above the resident set
+size at the start of the phase are recorded. Results are compared against stored
+baselines with ``check_budget``; run as a module to measure a scenario and check or
+update them::
+
+    python -m electrooptics_parser.benchmarks.suite medium \\
+        --baselines tests/benchmarks/baselines.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from nomad.datamodel import EntryArchive
+
+from electrooptics_parser.analysis.order_parameter import (
+    ensemble_statistics,
+    theta_ensemble,
+    theta_statistics,
+)
+from electrooptics_parser.benchmarks.synthetic import SCENARIOS, Scenario, write_run
+from electrooptics_parser.instrumentation import (
+    memory_status,
+    reset_peak_memory,
+)
+from electrooptics_parser.parsers.parser import NewParser, configuration
+from electrooptics_parser.readers import run_files
+from electrooptics_parser.readers.data_file import read_data_file
+from electrooptics_parser.readers.dump import read_dump
+from electrooptics_parser.readers.input_script import read_input_script
+from electrooptics_parser.readers.run import read_run
+from electrooptics_parser.readers.theta import read_theta_files
+
+# a phase is over budget if it exceeds its baseline by this factor and by the slack,
+# which keeps short phases from failing on timer and allocator noise
+DEFAULT_TOLERANCE = 1.5
+WALL_TIME_SLACK = 0.05
+PEAK_MEMORY_SLACK = 16 * 1024**2
+BUDGET_METRICS = {'wall_time': WALL_TIME_SLACK, 'peak_memory': PEAK_MEMORY_SLACK}
+
+
+def measure(function, nbytes: int = 0, rows: int = 0, repeat: int = 1):
+    """
+    Calls ``function`` ``repeat`` times and returns its last result and metrics with
+    the fastest wall time and the highest peak memory.
+    """
+    wall_time, peak_memory = float('inf'), 0
+    for _ in range(repeat):
+        reset_peak_memory()
+        start_memory, _ = memory_status()
+        start = time.perf_counter()
+        result = function()
+        wall_time = min(wall_time, time.perf_counter() - start)
+        peak_memory = max(peak_memory, memory_status()[1] - start_memory)
+    return result, {
+        'wall_time': wall_time,
+        'bytes': nbytes,
+        'rows': rows,
+        'mb_per_s': nbytes / 1024**2 / wall_time if wall_time else 0.0,
+        'rows_per_s': rows / wall_time if wall_time else 0.0,
+        'peak_memory': peak_memory,
+    }
+
+
+def run_benchmark(mainfile, repeat: int = 1) -> dict:
+    """
+    Measures every phase of parsing the run of ``mainfile`` and returns the metrics
+    by phase. The rows of ``system_file``, ``read_run`` and ``parse`` are atoms,
+    those of ``dump_file`` the atoms of all frames with chain alignment summaries and
+    those of ``theta_files`` and ``statistics`` the samples of all trajectories.
+    """
+    results = {}
+
+    def discover():
+        run_files._scan.cache_clear()
+        return run_files.scan_run_directory(os.path.dirname(mainfile))
+
+    files, results['discover'] = measure(discover, repeat=repeat)
+    _, results['input_script'] = measure(
+        lambda: read_input_script(mainfile),
+        nbytes=os.path.getsize(mainfile),
+        repeat=repeat,
+    )
+    header, results['system_file'] = measure(
+        lambda: read_data_file(
+            files.system,
+            memory_map=configuration.memory_map,
+            chunk_size=configuration.chunk_size,
+        )[0],
+        nbytes=os.path.getsize(files.system),
+        repeat=repeat,
+    )
+    results['system_file']['rows'] = header.get('atoms', 0)
+    theta_bytes = sum(os.path.getsize(path) for path in files.theta)
+    thetas, results['theta_files'] = measure(
+        lambda: read_theta_files(
+            files.theta,
+            workers=configuration.theta_workers,
+            min_parallel_bytes=configuration.theta_parallel_min_bytes,
+        ),
+        nbytes=theta_bytes,
+        repeat=repeat,
+    )
+    dump = os.path.join(files.directory, 'dump.electrooptics')
+    if os.path.exists(dump):
+        summary, results['dump_file'] = measure(
+            lambda: read_dump(
+                dump,
+                frames=configuration.dump_frames,
+                summary_frames=configuration.dump_summary_frames,
+            ),
+            nbytes=os.path.getsize(dump),
+            repeat=repeat,
+        )
+        results['dump_file']['rows'] = header.get('atoms', 0) * len(
+            summary['summary_timestep']
+        )
+    samples = sum(len(theta) for theta in thetas)
+    _, results['statistics'] = measure(
+        lambda: (ensemble_statistics(theta_statistics(thetas)), theta_ensemble(thetas)),
+        rows=samples,
+        repeat=repeat,
+    )
+    for name in ('theta_files', 'statistics'):
+        results[name]['rows'] = samples
+
+    run_bytes = sum(
+        os.path.getsize(path)
+        for path in (mainfile, files.system, *files.theta, dump)
+        if os.path.exists(path)
+    )
+    # without and with the archive
+    _, results['read_run'] = measure(
+        lambda: read_run(mainfile, configuration),
+        nbytes=run_bytes,
+        rows=header.get('atoms', 0),
+        repeat=repeat,
+    )
+    logger = logging.getLogger(__name__)
+    _, results['parse'] = measure(
+        lambda: NewParser().parse(mainfile, EntryArchive(), logger),
+        nbytes=run_bytes,
+        rows=header.get('atoms', 0),
+        repeat=repeat,
+    )
+    for metrics in results.values():
+        wall_time = metrics['wall_time']
+        metrics['rows_per_s'] = metrics['rows'] / wall_time if wall_time else 0.0
+    return results
+
+
+def check_budget(
+    results: dict, baselines: dict, tolerance: float = DEFAULT_TOLERANCE
+) -> list[str]:
+    """
+    Returns a message for every phase metric in ``results`` that exceeds its baseline
+    by more than ``tolerance`` times and by more than the slack of the metric. Phases
+    without a baseline are not checked.
+    """
+    violations = []
+    for phase, metrics in results.items():
+        baseline = baselines.get(phase, {})
+        for metric, slack in BUDGET_METRICS.items():
+            if metric not in baseline:
+                continue
+            budget = max(baseline[metric] * tolerance, baseline[metric] + slack)
+            if metrics[metric] > budget:
+                violations.append(
+                    f'{phase}: {metric} {metrics[metric]:.4g} exceeds budget '
+                    f'{budget:.4g} (baseline {baseline[metric]:.4g})'
+                )
+    return violations
+
+
+def load_baselines(path) -> dict:
+    """Returns the stored baselines by scenario, empty if there is no file yet."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(path, baselines: dict) -> None:
+    baselines = {
+        scenario: {
+            phase: {
+                metric: float(f'{value:.4g}') if isinstance(value, float) else value
+                for metric, value in metrics.items()
+            }
+            for phase, metrics in results.items()
+        }
+        for scenario, results in baselines.items()
+    }
+    with open(path, 'w') as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def benchmark_scenario(scenario: Scenario, directory=None, repeat: int = 1) -> dict:
+    """
+    Generates the run of ``scenario`` and benchmarks it. A run already generated in
+    ``directory`` is reused, which saves minutes for the largest scenarios.
+    """
+    if directory is None:
+        with tempfile.TemporaryDirectory() as temporary:
+            return run_benchmark(write_run(temporary, scenario), repeat=repeat)
+    mainfile = os.path.join(directory, 'in_electrooptics.lmp')
+    if not os.path.exists(mainfile):
+        write_run(directory, scenario)
+    return run_benchmark(mainfile, repeat=repeat)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('scenarios', nargs='+', choices=sorted(SCENARIOS))
+    parser.add_argument('--baselines', help='JSON file of the stored baselines')
+    parser.add_argument(
+        '--update', action='store_true', help='store the results as new baselines'
+    )
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--directory', help='keep the generated runs here')
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines(args.baselines) if args.baselines else {}
+    violations = []
+    for name in args.scenarios:
+        directory = os.path.join(args.directory, name) if args.directory else None
+        results = benchmark_scenario(SCENARIOS[name], directory, repeat=args.repeat)
+        print(json.dumps({name: results}, indent=2))
+        if args.update:
+            baselines[name] = results
+        else:
+            violations.extend(
+                f'{name}: {violation}'
+                for violation in check_budget(
+                    results, baselines.get(name, {}), args.tolerance
+                )
+            )
+    if args.update and args.baselines:
+        save_baselines(args.baselines, baselines)
+    for violation in violations:
+        print(violation, file=sys.stderr)
+    return 1 if violations else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+Generator of synthetic but realistically shaped electrooptics runs.
+
+A run consists of linear polymer chains in a periodic box, written as an
+``in_electrooptics.lmp`` input script, a ``system_electrooptics.data`` file with
+Masses, Atoms, Velocities, Bonds, Angles, Dihedrals and Impropers sections, and one
+``theta_<n>.dat`` file per trajectory relaxing towards a poled alignment.
+"""
+
+import os
+from typing import NamedTuple
+
+import numpy as np
+
+ROWS_PER_WRITE = 100_000
+
+# C, O
+MASSES = (12.011, 15.999)
+END_TYPE = 2
+
+INPUT_SCRIPT = """# synthetic electrooptics run
+variable T equal {temperature}
+variable efield equal {e_field}
+
+dimension 3
+boundary p p p
+units real
+atom_style full
+neighbor 2.0 bin
+newton on
+
+read_data system_electrooptics.data
+
+pair_style lj/cut/coul/long 10.0
+pair_modify mix arithmetic
+kspace_style pppm 1.0e-4
+bond_style harmonic
+angle_style harmonic
+dihedral_style opls
+improper_style harmonic
+
+group anchored id 1 2
+
+compute orient all property/atom mux muy muz
+thermo_modify lost ignore
+thermo 100
+
+velocity all create ${{T}} 4928459
+fix 1 all nvt temp ${{T}} ${{T}} 100.0
+fix 2 all efield 0.0 0.0 ${{efield}}
+fix 3 anchored setforce 0.0 0.0 0.0
+
+dump 1 all custom 1000 dump.electrooptics id mol type x y z
+dump_modify 1 sort id
+
+run {steps}
+"""
+
+
+class Scenario(NamedTuple):
+    n_atoms: int
+    n_trajectories: int
+    n_times: int = 1000
+    chain_length: int = 20
+    n_frames: int = 10
+
+
+# from a single small molecule system up to production-size uploads
+SCENARIOS = {
+    'tiny': Scenario(1_000, 1),
+    'small': Scenario(10_000, 10),
+    'medium': Scenario(100_000, 100),
+    'large': Scenario(1_000_000, 1000),
+    'huge': Scenario(10_000_000, 1000, n_frames=2),
+}
+
+
+def _write_rows(f, row_format: str, rows: np.ndarray) -> None:
+    # formats ROWS_PER_WRITE rows with one %-operation instead of one per row
+    line = row_format + '\n'
+    for start in range(0, len(rows), ROWS_PER_WRITE):
+        chunk = rows[start : start + ROWS_PER_WRITE]
+        f.write((line * len(chunk)) % tuple(chunk.ravel().tolist()))
+
+
+def _section(f, name: str, row_format: str, rows: np.ndarray) -> None:
+    f.write(f'\n{name}\n\n')
+    _write_rows(f, row_format, rows)
+
+
+def _topology(n_chains: int, chain_length: int, width: int) -> np.ndarray:
+    """Consecutive ``width``-atom tuples along every chain, with index and type."""
+    per_chain = max(chain_length - width + 1, 0)
+    first = (np.arange(n_chains)[:, None] * chain_length + np.arange(per_chain)).ravel()
+    atoms = first[:, None] + np.arange(width) + 1
+    index = np.arange(1, len(first) + 1)[:, None]
+    return np.hstack([index, np.ones_like(index), atoms])
+
+
+def _box(n_atoms: int) -> float:
+    # ~0.1 atoms per cubic Angstrom
+    return (n_atoms / 0.1) ** (1 / 3)
+
+
+def _chains(rng, n_chains: int, chain_length: int, box: float, bias: float = 0.0):
+    """Wrapped positions of random-walk chains, with a bias of the steps along z."""
+    steps = rng.normal(size=(n_chains, chain_length, 3))
+    steps[:, :, 2] += bias
+    steps *= 1.5 / np.linalg.norm(steps, axis=2, keepdims=True)
+    positions = rng.uniform(0, box, size=(n_chains, 1, 3)) + np.cumsum(steps, axis=1)
+    return np.mod(positions, box).reshape(n_chains * chain_length, 3)
+
+
+def write_system(path, n_atoms: int, chain_length: int = 20, seed: int = 0) -> int:
+    """
+    Writes a data file of ``n_atoms`` rounded down to whole chains and returns the
+    number of atoms written.
+    """
+    rng = np.random.default_rng(seed)
+    n_chains = max(n_atoms // chain_length, 1)
+    n_atoms = n_chains * chain_length
+    box = _box(n_atoms)
+    positions = _chains(rng, n_chains, chain_length, box)
+    atom_type = np.ones(n_atoms, dtype=np.int64)
+    atom_type[chain_length - 1 :: chain_length] = END_TYPE
+    charge = np.where(atom_type == END_TYPE, -0.4, 0.4 / (chain_length - 1))
+    atoms = np.column_stack(
+        [
+            np.arange(1, n_atoms + 1),
+            np.repeat(np.arange(1, n_chains + 1), chain_length),
+            atom_type,
+            charge,
+            positions,
+            np.zeros((n_atoms, 3)),
+        ]
+    )
+
+    bonds = _topology(n_chains, chain_length, 2)
+    angles = _topology(n_chains, chain_length, 3)
+    dihedrals = _topology(n_chains, chain_length, 4)
+    # one improper at the start of every chain
+    impropers = dihedrals[:: max(chain_length - 3, 1)]
+    impropers = np.hstack([np.arange(1, len(impropers) + 1)[:, None], impropers[:, 1:]])
+
+    with open(path, 'w') as f:
+        f.write('LAMMPS data file, synthetic electrooptics system\n\n')
+        for count, name in (
+            (n_atoms, 'atoms'),
+            (len(MASSES), 'atom types'),
+            (len(bonds), 'bonds'),
+            (1, 'bond types'),
+            (len(angles), 'angles'),
+            (1, 'angle types'),
+            (len(dihedrals), 'dihedrals'),
+            (1, 'dihedral types'),
+            (len(impropers), 'impropers'),
+            (1, 'improper types'),
+        ):
+            f.write(f'{count} {name}\n')
+        f.write('\n')
+        for axis in 'xyz':
+            f.write(f'0 {box:.6f} {axis}lo {axis}hi\n')
+        _section(f, 'Masses', '%d %.3f', np.column_stack([np.arange(1, 3), MASSES]))
+        _section(f, 'Atoms # full', '%d %d %d %.6f %.6f %.6f %.6f %d %d %d', atoms)
+        velocities = np.column_stack(
+            [np.arange(1, n_atoms + 1), rng.normal(0, 1e-3, (n_atoms, 3))]
+        )
+        _section(f, 'Velocities', '%d %.6e %.6e %.6e', velocities)
+        _section(f, 'Bonds', '%d %d %d %d', bonds)
+        _section(f, 'Angles', '%d %d %d %d %d', angles)
+        _section(f, 'Dihedrals', '%d %d %d %d %d %d', dihedrals)
+        _section(f, 'Impropers', '%d %d %d %d %d %d', impropers)
+    return n_atoms
+
+
+def write_dump(
+    path, n_atoms: int, n_frames: int, chain_length: int = 20, seed: int = 0
+) -> None:
+    """
+    Writes a ``dump custom`` trajectory of ``id mol type x y z`` columns whose chains
+    align increasingly with the field along z.
+    """
+    rng = np.random.default_rng(seed)
+    n_chains = max(n_atoms // chain_length, 1)
+    n_atoms = n_chains * chain_length
+    box = _box(n_atoms)
+    columns = [
+        np.arange(1, n_atoms + 1),
+        np.repeat(np.arange(1, n_chains + 1), chain_length),
+        np.tile(np.r_[np.ones(chain_length - 1), END_TYPE], n_chains),
+    ]
+    bounds = f'0 {box:.6f}\n'
+    with open(path, 'w') as f:
+        for frame in range(n_frames):
+            f.write(
+                f'ITEM: TIMESTEP\n{frame * 1000}\nITEM: NUMBER OF ATOMS\n{n_atoms}\n'
+                f'ITEM: BOX BOUNDS pp pp pp\n{bounds * 3}'
+                'ITEM: ATOMS id mol type x y z\n'
+            )
+            positions = _chains(rng, n_chains, chain_length, box, bias=0.2 * frame)
+            _write_rows(
+                f, '%d %d %d %.4f %.4f %.4f', np.column_stack([*columns, positions])
+            )
+
+
+def write_theta(path, n_times: int, seed: int = 0) -> None:
+    """Writes a trajectory relaxing from random orientation to a poled plateau."""
+    rng = np.random.default_rng(seed)
+    time = np.arange(n_times) * 1000.0
+    plateau = rng.uniform(0.3, 0.7)
+    theta = plateau * (1 - np.exp(-time / (0.1 * time[-1] + 1)))
+    theta += rng.normal(0, 0.02, n_times)
+    with open(path, 'w') as f:
+        f.write('Time theta\n')
+        _write_rows(f, '%.1f %.6f', np.column_stack([time, theta]))
+
+
+def write_run(directory, scenario: Scenario, seed: int = 0) -> str:
+    """
+    Writes a complete run of the given size into ``directory`` and returns the path
+    of its mainfile.
+    """
+    os.makedirs(directory, exist_ok=True)
+    mainfile = os.path.join(directory, 'in_electrooptics.lmp')
+    with open(mainfile, 'w') as f:
+        f.write(
+            INPUT_SCRIPT.format(
+                temperature=300.0, e_field=0.05, steps=scenario.n_times * 1000
+            )
+        )
+    write_system(
+        os.path.join(directory, 'system_electrooptics.data'),
+        scenario.n_atoms,
+        chain_length=scenario.chain_length,
+        seed=seed,
+    )
+    if scenario.n_frames:
+        write_dump(
+            os.path.join(directory, 'dump.electrooptics'),
+            scenario.n_atoms,
+            scenario.n_frames,
+            chain_length=scenario.chain_length,
+            seed=seed,
+        )
+    for index in range(1, scenario.n_trajectories + 1):
+        write_theta(
+            os.path.join(directory, f'theta_{index}.dat'),
+            scenario.n_times,
+            seed=seed + index,
+        )
+    return mainfile
@@ -0,0 +1,60 @@
+"""Command line interface of the electrooptics parser, usable without NOMAD."""
+
+import argparse
+import sys
+
+from electrooptics_parser.parsers.batch import FORMATS, parse_campaign
+from electrooptics_parser.parsers.export import TABLE_FORMATS, export_campaign
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='electrooptics-parser', description=__doc__)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    parse = commands.add_parser(
+        'parse', help='parse every run under a directory into archive files'
+    )
+    parse.add_argument('root', help='directory tree of the runs')
+    parse.add_argument('output', help='directory of the archives, mirroring root')
+    parse.add_argument(
+        '--workers', type=int, default=0, help='processes, 0 uses all CPUs'
+    )
+    parse.add_argument('--format', choices=sorted(FORMATS), default='json')
+    parse.add_argument(
+        '--no-resume',
+        dest='resume',
+        action='store_false',
+        help='parse runs again whose archive already exists',
+    )
+
+    export = commands.add_parser(
+        'export', help='export every run under a directory as columnar tables'
+    )
+    export.add_argument('root', help='directory tree of the runs')
+    export.add_argument('output', help='directory of the tables')
+    export.add_argument(
+        '--workers', type=int, default=0, help='processes, 0 uses all CPUs'
+    )
+    export.add_argument(
+        '--format',
+        choices=sorted(TABLE_FORMATS),
+        default='npz',
+        help='parquet requires pyarrow',
+    )
+    export.add_argument(
+        '--no-resume',
+        dest='resume',
+        action='store_false',
+        help='export runs again whose tables already exist',
+    )
+    args = parser.parse_args(argv)
+
+    campaign = parse_campaign if args.command == 'parse' else export_campaign
+    results = campaign(
+        args.root, args.output, args.workers, args.format, resume=args.resume
+    )
+    return 1 if any(result.status == 'failed' for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
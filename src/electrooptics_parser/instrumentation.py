@@ -0,0 +1,143 @@
+"""
+Per-phase timing and memory instrumentation of the parser.
+
+``Instrumentation.phase`` measures one phase of ``DetailedParser``: its wall time,
+the bytes read and rows parsed reported by the phase, and how far the resident set
+size rose above its value at the start of the phase. Every record is emitted
+through the structlog logger of the entry, so slow or memory hungry uploads can be
+found in the production logs. ``profiled`` optionally dumps a profile of the whole
+parse.
+"""
+
+import contextlib
+import cProfile
+import hashlib
+import os
+import re
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+STATUS_RE = re.compile(r'^(VmRSS|VmHWM):\s+(\d+) kB', re.MULTILINE)
+
+
+def peak_memory() -> int:
+    """Returns the peak resident set size of this process in bytes."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def memory_status() -> tuple[int, int]:
+    """
+    Returns the current and the peak resident set size in bytes. Without ``/proc``
+    both are the peak of the process, as the current size is not available.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            status = dict(STATUS_RE.findall(f.read()))
+        return int(status['VmRSS']) * 1024, int(status['VmHWM']) * 1024
+    except (OSError, KeyError):
+        peak = peak_memory()
+        return peak, peak
+
+
+def reset_peak_memory() -> None:
+    """Resets the peak resident set size to the current one, where Linux allows."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+class Instrumentation:
+    """
+    Collects the phase records of one parse in ``records`` and logs them, phases at
+    info and the records of single files at debug level. ``logger`` may be ``None``
+    to only collect the records.
+    """
+
+    def __init__(self, logger=None):
+        self.logger = logger
+        self.records = []
+
+    def log(self, event: str, record: dict, debug: bool = False) -> None:
+        self.records.append(record)
+        if self.logger is not None:
+            (self.logger.debug if debug else self.logger.info)(event, **record)
+
+    @contextlib.contextmanager
+    def phase(self, name: str, **fields):
+        """
+        Measures the body as phase ``name``. The body may set ``bytes`` and ``rows``
+        and further fields in the yielded record. Phases must not be nested, the
+        peak memory is reset at the start of every phase.
+        """
+        record = {'phase': name, 'bytes': 0, 'rows': 0, **fields}
+        reset_peak_memory()
+        start_memory, _ = memory_status()
+        start = time.perf_counter()
+        yield record
+        record['wall_time'] = time.perf_counter() - start
+        _, peak = memory_status()
+        record['peak_rss'] = peak
+        record['peak_rss_delta'] = max(peak - start_memory, 0)
+        self.log('electrooptics parser phase', record)
+
+    def file(self, name: str, path, **fields) -> None:
+        """Logs the record of a single file read within phase ``name``."""
+        record = {'phase': name, 'path': path, **fields}
+        self.log('electrooptics parser file', record, debug=True)
+
+
+def _profile_path(directory, mainfile, suffix: str) -> str:
+    name = hashlib.sha256(os.path.abspath(mainfile).encode()).hexdigest()[:16]
+    return os.path.join(directory, f'{name}-{time.strftime("%Y%m%d-%H%M%S")}{suffix}')
+
+
+@contextlib.contextmanager
+def profiled(profiler, directory, mainfile, logger=None):
+    """
+    Profiles the body with ``profiler`` and writes the profile of ``mainfile`` into
+    ``directory``: a ``.prof`` file of cProfile, or for the ``sampling`` profiler an
+    ``.html`` report of pyinstrument, if installed. Does nothing for ``None``.
+    """
+    if profiler is None:
+        yield
+        return
+    os.makedirs(directory, exist_ok=True)
+    if profiler == 'sampling':
+        try:
+            from pyinstrument import Profiler  # noqa: PLC0415
+        except ImportError:
+            if logger is not None:
+                logger.warning('pyinstrument is not installed, not profiling')
+            yield
+            return
+        sampler = Profiler()
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            path = _profile_path(directory, mainfile, '.html')
+            with open(path, 'w') as f:
+                f.write(sampler.output_html())
+    else:
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            path = _profile_path(directory, mainfile, '.prof')
+            profile.dump_stats(path)
+    if logger is not None:
+        logger.info('electrooptics parser profile', profiler=profiler, path=path)
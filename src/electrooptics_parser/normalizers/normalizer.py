@@ -10,9 +10,21 @@ if TYPE_CHECKING:
         BoundLogger,
     )
 
+import h5py
+import numpy as np
+from nomad.atomutils import Formula
 from nomad.config import config
+from nomad.datamodel.results import Material, Results
 from nomad.normalizing import Normalizer
 
+from electrooptics_parser.analysis.composition import composition
+from electrooptics_parser.readers.hdf5 import split_reference
+from electrooptics_parser.schema_packages.schema_package import (
+    ElectroopticsCalculation,
+    ElectroopticsComposition,
+    ElectroopticsEntry,
+)
+
 configuration = config.get_plugin_entry_point(
     'electrooptics_parser.normalizers:normalizer_entry_point'
 )
@@ -22,5 +34,127 @@ class NewNormalizer(Normalizer):
     def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
         super().normalize(archive, logger)
         logger.info('NewNormalizer.normalize', parameter=configuration.parameter)
-        if archive.results and archive.results.material:
-            archive.results.material.elements = ['C', 'O']
+        for run in archive.run:
+            for calculation in run.calculation:
+                if not isinstance(calculation, ElectroopticsCalculation):
+                    continue
+                if archive.data is None or isinstance(archive.data, ElectroopticsEntry):
+                    archive.data = search_entry(calculation)
+                system = calculation.electrooptics_system
+                if system is None:
+                    continue
+                system.upgrade_legacy_layout()
+                atoms_type = system_array(archive, system, 'atoms_type')
+                if atoms_type is not None and system.masses_type is not None:
+                    system.composition = ElectroopticsComposition(
+                        **composition(
+                            atoms_type,
+                            system_array(archive, system, 'atoms_charge'),
+                            np.asarray(system.masses_type),
+                            np.asarray(system.masses_value),
+                        )
+                    )
+                    populate_material(archive, system.composition)
+
+
+def system_array(archive: 'EntryArchive', system, name: str):
+    """
+    Returns the array ``name`` of the system, read from the HDF5 file of the run if
+    it is stored there and the upload files are available, else ``None``.
+    """
+    value = getattr(system, name)
+    reference = getattr(system, f'{name}_hdf5')
+    if value is not None or reference is None:
+        return None if value is None else np.asarray(value)
+    upload_files = getattr(archive.m_context, 'upload_files', None)
+    if upload_files is None:
+        return None
+    file, path = split_reference(reference)
+    with upload_files.raw_file(file, 'rb') as raw_file, h5py.File(raw_file) as f:
+        return f[path][()]
+
+
+def populate_material(archive: 'EntryArchive', composition) -> None:
+    """
+    Stores the elements and formulas of the system ``composition`` in
+    ``results.material``, so entries can be searched by them. Atoms without element
+    are left out of the formulas.
+    """
+    if not composition.elements:
+        return
+    if archive.results is None:
+        archive.results = Results()
+    if archive.results.material is None:
+        archive.results.material = Material()
+    formula = ''.join(
+        f'{element}{count}'
+        for element, count in zip(composition.elements, composition.element_count)
+    )
+    Formula(formula).populate(archive.results.material, overwrite=True)
+
+
+def _last(values):
+    return float(values[-1]) if values is not None and len(values) else None
+
+
+def search_entry(calculation) -> ElectroopticsEntry:
+    """
+    Collects the scalars of ``calculation`` that runs are searched by: the field,
+    temperature and size of the system and the alignment of the chains. Quantities
+    whose section was not parsed, e.g. the system of a child entry, are left unset.
+    """
+    entry = ElectroopticsEntry()
+    inputs = calculation.electrooptics_input
+    if inputs is not None:
+        entry.e_field = inputs.e_field
+    if calculation.temperature is not None:
+        entry.temperature = calculation.temperature
+
+    system = calculation.electrooptics_system
+    if system is not None:
+        entry.n_atoms = system.atoms
+        entry.n_bonds = system.bonds
+        bounds = [
+            system.xlo,
+            system.xhi,
+            system.ylo,
+            system.yhi,
+            system.zlo,
+            system.zhi,
+        ]
+        if all(bound is not None for bound in bounds):
+            entry.box_volume = float(np.prod(np.diff(np.reshape(bounds, (3, 2)))))
+        molecules = system.molecules
+        if molecules is not None and molecules.molecule_id is not None:
+            entry.n_molecules = len(molecules.molecule_id)
+            cos = np.asarray(molecules.end_to_end_cos, dtype=np.float64)
+            if np.isfinite(cos).any():
+                entry.end_to_end_cos = float(np.nanmean(cos))
+
+    ensemble = calculation.electrooptics_ensemble_statistics
+    statistics = [
+        output.statistics
+        for output in calculation.electrooptics_output
+        if output.statistics is not None
+    ]
+    if ensemble is not None:
+        entry.n_trajectories = ensemble.n_trajectories
+        entry.theta_mean = ensemble.mean
+        entry.theta_std = ensemble.std
+        entry.theta_final_value = ensemble.final_value_mean
+        entry.equilibration_time = ensemble.equilibration_time
+    elif len(statistics) == 1:
+        # the single trajectory of a child entry
+        entry.n_trajectories = 1
+        entry.theta_mean = statistics[0].mean
+        entry.theta_std = statistics[0].std
+        entry.theta_final_value = statistics[0].final_value
+        entry.equilibration_time = statistics[0].equilibration_time
+    else:
+        entry.n_trajectories = len(calculation.electrooptics_output)
+
+    dump = calculation.electrooptics_dump
+    if dump is not None:
+        entry.mean_cos = _last(dump.mean_cos)
+        entry.nematic_order = _last(dump.nematic_order)
+    return entry
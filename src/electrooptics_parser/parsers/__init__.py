@@ -1,9 +1,102 @@
+from typing import Literal, Optional
+
 from nomad.config.models.plugins import ParserEntryPoint
 from pydantic import Field
 
 
 class NewParserEntryPoint(ParserEntryPoint):
     parameter: int = Field(0, description='Custom configuration parameter')
+    memory_map: bool = Field(
+        False,
+        description="""Memory-map the system data file and convert its sections in
+        chunks directly into the final arrays. Keeps the memory peak close to the
+        size of the parsed arrays, the measured peak is logged.""",
+    )
+    chunk_size: int = Field(
+        16 * 1024**2, description='Size in bytes of the chunks read in memory_map mode.'
+    )
+    theta_workers: int = Field(
+        0,
+        description="""Number of processes reading the theta files of a run, 0 uses
+        all CPUs and 1 reads them serially.""",
+    )
+    theta_parallel_min_bytes: int = Field(
+        32 * 1024**2,
+        description="""Theta files of a run adding up to less than this many bytes
+        are read serially, avoiding the start-up cost of the worker processes.""",
+    )
+    cache_directory: Optional[str] = Field(
+        None,
+        description="""Directory of the on-disk cache of parsed system data files,
+        keyed by content hash. Entries sharing a data file load the cached arrays
+        instead of parsing the text again. No cache is used if not set.""",
+    )
+    cache_max_bytes: int = Field(
+        2 * 1024**3,
+        description='Size limit of the cache, least recently used files are evicted.',
+    )
+    incremental: bool = Field(
+        False,
+        description="""Reprocess runs incrementally: the fingerprints (size, mtime,
+        hash) of the parsed files are kept in the cache_directory, theta files are
+        cached as well, and only new or changed files are parsed again.""",
+    )
+    child_archives: bool = Field(
+        False,
+        description="""Store every theta trajectory as a child entry of the run,
+        referencing the input and system of the main entry. The main entry keeps
+        the ensemble statistics only and stays small.""",
+    )
+    store_trajectory_theta: bool = Field(
+        False,
+        description="""Store the (time, theta) array of every trajectory in its own
+        output section as well. By default the samples are only stored once, in the
+        ensemble matrix on the shared time axis, and the output sections hold the
+        statistics and the downsampled series of the trajectories. Always stored in
+        child archives.""",
+    )
+    hdf5_arrays: bool = Field(
+        False,
+        description="""Store the large arrays of the system, the trajectories and the
+        ensemble in a chunked, gzip compressed HDF5 file next to the mainfile
+        (<mainfile>.h5) instead of the archive, which keeps references to them.
+        Rows can then be read selectively.""",
+    )
+    molecule_descriptors: bool = Field(
+        True,
+        description="""Build the bond graph of the system and store per-molecule
+        descriptors (size, charge, center of mass, dipole moment, end-to-end vector
+        and its alignment with the field) in the molecules subsection.""",
+    )
+    dump_frames: int = Field(
+        10,
+        description="""Number of evenly spaced frames of the dump trajectory stored
+        in the archive, 0 stores none. Frames are read one at a time.""",
+    )
+    dump_summary_frames: Optional[int] = Field(
+        1000,
+        description="""Number of evenly spaced dump frames for which the chain
+        alignment is computed, all frames if None. The dump is not read at all if
+        this and dump_frames are 0.""",
+    )
+    theta_plot_points: int = Field(
+        1000,
+        description="""Number of points of every theta trajectory stored for plotting,
+        keeping the first and last sample and the minimum and maximum of evenly
+        sized buckets. The GUI plots these while the full trajectory stays in the
+        archive or the HDF5 file. 0 stores none, otherwise at least 4.""",
+    )
+    profiler: Optional[Literal['cprofile', 'sampling']] = Field(
+        None,
+        description="""Profile every parse and dump the profile into the
+        profile_directory: 'cprofile' writes a .prof file of the deterministic
+        profiler, 'sampling' an HTML report of the pyinstrument sampling profiler
+        (if installed). The phase timings are logged in any case.""",
+    )
+    profile_directory: Optional[str] = Field(
+        None,
+        description='Directory of the profile dumps, the temporary one if not set.',
+    )
 
     def load(self):
         from electrooptics_parser.parsers.parser import NewParser
@@ -14,5 +107,6 @@ class NewParserEntryPoint(ParserEntryPoint):
 parser_entry_point = NewParserEntryPoint(
     name='NewParser',
     description='New parser entry point configuration.',
-    mainfile_name_re='.*in_electrooptics\.lmp',
+    mainfile_name_re=r'.*in_electrooptics\.lmp(\.(gz|xz|bz2))?',
+    supported_compressions=['gz', 'bz2', 'xz'],
 )
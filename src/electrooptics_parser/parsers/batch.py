@@ -0,0 +1,239 @@
+"""
+Batch parsing of whole simulation campaigns without a NOMAD deployment.
+
+Every run (``in_electrooptics`` mainfile) under a directory tree is parsed by a pool
+of worker processes into an archive file in an output tree that mirrors the input
+tree. Archives are written to a temporary file and renamed, so an interrupted batch
+leaves only complete archives behind and can be resumed by skipping them.
+"""
+
+import json
+import os
+import sys
+import time
+import traceback
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import msgpack
+from nomad.datamodel import EntryArchive, EntryMetadata
+
+from electrooptics_parser.parsers.parser import DetailedParser, configuration
+from electrooptics_parser.readers.run_files import INPUT_RE
+
+# archive format -> file suffix
+FORMATS = {'json': '.archive.json', 'msgpack': '.archive.msg'}
+REPORT_NAME = 'batch_report.json'
+
+
+class RunResult(NamedTuple):
+    mainfile: str
+    output: Optional[str]
+    status: str  # 'parsed', 'skipped' or 'failed'
+    wall_time: float = 0.0
+    bytes: int = 0
+    error: Optional[str] = None
+
+
+def find_runs(root) -> list[str]:
+    """Returns the mainfiles of all runs under ``root`` in sorted order."""
+    mainfiles = []
+    for directory, directories, files in os.walk(root):
+        directories.sort()
+        mainfiles.extend(
+            os.path.join(directory, name)
+            for name in sorted(files)
+            if INPUT_RE.match(name)
+        )
+    return mainfiles
+
+
+def output_path(mainfile, root, output, archive_format: str = 'json') -> str:
+    """Path of the archive of ``mainfile`` in the ``output`` tree mirroring ``root``."""
+    relative = os.path.relpath(mainfile, root)
+    return os.path.join(output, relative + FORMATS[archive_format])
+
+
+def write_archive(archive, path, archive_format: str = 'json') -> None:
+    """Writes the ``archive`` as JSON or msgpack, atomically replacing ``path``."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    data = archive.m_to_dict()
+    temporary = f'{path}.{os.getpid()}.tmp'
+    try:
+        if archive_format == 'msgpack':
+            with open(temporary, 'wb') as f:
+                f.write(msgpack.packb(data, use_bin_type=True))
+        else:
+            with open(temporary, 'w') as f:
+                json.dump(data, f)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def _run_bytes(records: list) -> int:
+    # bytes read by all phases, the records of single files are not counted twice
+    return sum(record['bytes'] for record in records if 'peak_rss' in record)
+
+
+def parse_run(mainfile, output, settings=None, archive_format='json') -> RunResult:
+    """
+    Parses the run of ``mainfile`` and writes its archive to ``output``. Errors are
+    returned in the result instead of raised, so one broken run does not stop the
+    batch.
+    """
+    start = time.perf_counter()
+    try:
+        archive = EntryArchive(
+            metadata=EntryMetadata(mainfile=os.path.basename(mainfile))
+        )
+        records = DetailedParser(Path(mainfile), archive, settings)
+        write_archive(archive, output, archive_format)
+    except Exception:  # reported per run
+        return RunResult(
+            mainfile,
+            output,
+            'failed',
+            time.perf_counter() - start,
+            error=traceback.format_exc(),
+        )
+    return RunResult(
+        mainfile, output, 'parsed', time.perf_counter() - start, _run_bytes(records)
+    )
+
+
+def progress(done: int, total: int, result: RunResult) -> None:
+    """Prints the status of the ``done``-th of ``total`` runs."""
+    detail = f' {result.wall_time:.2f} s' if result.status != 'skipped' else ''
+    print(
+        f'[{done}/{total}] {result.status} {result.mainfile}{detail}', file=sys.stderr
+    )
+    if result.error:
+        print(result.error.rstrip().splitlines()[-1], file=sys.stderr)
+
+
+def _run_pool(function, tasks, workers: int, results: list, total: int):
+    """
+    Runs the ``(mainfile, args)`` ``tasks`` in a pool of ``workers`` processes with
+    at most ``workers`` runs in flight. If a worker dies, e.g. killed for running
+    out of memory, the pool breaks; the runs in flight with their tracebacks and
+    the runs not yet submitted are returned then.
+    """
+    queue = deque(tasks)
+    running, broken = {}, []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while running or (queue and not broken):
+            while queue and not broken and len(running) < workers:
+                mainfile, args = queue.popleft()
+                running[executor.submit(function, mainfile, *args)] = (mainfile, args)
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                mainfile, args = running.pop(future)
+                try:
+                    results.append(future.result())
+                except BrokenProcessPool:
+                    broken.append((mainfile, args, traceback.format_exc()))
+                    continue
+                progress(len(results), total, results[-1])
+    return broken, list(queue)
+
+
+def run_tasks(function, tasks: dict, workers: int, results: list, total: int) -> None:
+    """
+    Calls ``function(mainfile, *args)`` for every ``mainfile: args`` of ``tasks`` in
+    ``workers`` processes (0 uses all CPUs, 1 runs them in this process), appending
+    the ``RunResult`` of every run to ``results`` and printing its progress.
+
+    A run whose worker process dies is recorded as failed with the traceback, the
+    first of its ``args`` being its output, and the remaining runs continue in a new
+    pool. As the pool does not tell which of the runs in flight killed it, each of
+    them is first run again alone.
+    """
+    workers = min(workers or os.cpu_count() or 1, max(len(tasks), 1))
+    if workers == 1:
+        for mainfile, args in tasks.items():
+            results.append(function(mainfile, *args))
+            progress(len(results), total, results[-1])
+        return
+    queue = list(tasks.items())
+    while queue:
+        broken, queue = _run_pool(function, queue, workers, results, total)
+        if len(broken) > 1:
+            isolated = []
+            for mainfile, args, _ in broken:
+                rerun, _ = _run_pool(function, [(mainfile, args)], 1, results, total)
+                isolated += rerun
+            broken = isolated
+        for mainfile, args, error in broken:
+            results.append(RunResult(mainfile, args[0], 'failed', error=error))
+            progress(len(results), total, results[-1])
+
+
+def report(results: list[RunResult], elapsed: float, path) -> dict:
+    """Prints the summary of a batch and writes it with all runs to ``path``."""
+    summary = summarise(results, elapsed)
+    print(
+        f'{summary["parsed"]} parsed, {summary["skipped"]} skipped, '
+        f'{summary["failed"]} failed in {elapsed:.1f} s '
+        f'({summary["runs_per_second"]:.2f} runs/s, '
+        f'{summary["bytes_per_second"] / 1024**2:.1f} MiB/s)',
+        file=sys.stderr,
+    )
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(
+            {'summary': summary, 'runs': [result._asdict() for result in results]},
+            f,
+            indent=2,
+        )
+    return summary
+
+
+def parse_campaign(
+    root,
+    output,
+    workers: int = 0,
+    archive_format: str = 'json',
+    resume: bool = True,
+) -> list[RunResult]:
+    """
+    Parses every run under ``root`` into the ``output`` tree with ``workers``
+    processes (0 uses all CPUs, 1 parses in this process). With ``resume``, runs
+    whose archive already exists are skipped. Progress is printed to stderr and a
+    report of all runs is written to ``batch_report.json`` in ``output``.
+    """
+    # the runs are spread over the processes, so every run reads its theta files
+    # serially
+    settings = configuration.model_copy(update={'theta_workers': 1})
+    mainfiles = find_runs(root)
+    results, tasks = [], {}
+    for mainfile in mainfiles:
+        path = output_path(mainfile, root, output, archive_format)
+        if resume and os.path.exists(path):
+            results.append(RunResult(mainfile, path, 'skipped'))
+            progress(len(results), len(mainfiles), results[-1])
+        else:
+            tasks[mainfile] = (path, settings, archive_format)
+
+    start = time.perf_counter()
+    run_tasks(parse_run, tasks, workers, results, len(mainfiles))
+    report(results, time.perf_counter() - start, os.path.join(output, REPORT_NAME))
+    return results
+
+
+def summarise(results: list[RunResult], elapsed: float) -> dict:
+    """Counts the runs by status and computes the throughput of the parsed ones."""
+    counts = {status: 0 for status in ('parsed', 'skipped', 'failed')}
+    for result in results:
+        counts[result.status] += 1
+    parsed_bytes = sum(result.bytes for result in results)
+    return {
+        **counts,
+        'elapsed': elapsed,
+        'runs_per_second': counts['parsed'] / elapsed if elapsed else 0.0,
+        'bytes_per_second': parsed_bytes / elapsed if elapsed else 0.0,
+    }
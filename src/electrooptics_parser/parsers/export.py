@@ -0,0 +1,234 @@
+"""
+Columnar export of parsed runs for bulk analysis outside of NOMAD.
+
+Every run is read by ``read_run`` and written as tables, one directory per table
+partitioned by run (``<table>/run=<run>/part-0.<format>``, the Hive layout read by
+``pyarrow.dataset``):
+
+- ``runs``: the scalars of the input script and of the system header, one row
+- ``atoms``, ``bonds``, ``angles``, ``dihedrals``, ``impropers``: the topology
+- ``trajectories``: the theta file and statistics of every trajectory
+- ``theta``: the samples of all trajectories on the shared time axis
+
+The atom arrays of the data file are handed over as read: ``.npz`` files store them
+as they are and Arrow wraps contiguous numeric arrays without copying them. The
+row-major topology arrays are transposed into one contiguous copy each, whose rows
+are the columns of the table, and the samples of the ``theta`` table are gathered
+from the ensemble matrix. Parquet needs the optional ``pyarrow``.
+"""
+
+import os
+import time
+import traceback
+from pathlib import Path
+from urllib.parse import quote
+
+import numpy as np
+
+from electrooptics_parser.parsers.batch import (
+    RunResult,
+    find_runs,
+    progress,
+    report,
+    run_tasks,
+)
+from electrooptics_parser.parsers.parser import configuration
+from electrooptics_parser.readers.run import RunData, read_run
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional, only needed for parquet
+    pa = None
+
+# table format -> file suffix
+TABLE_FORMATS = {'npz': '.npz', 'parquet': '.parquet'}
+REPORT_NAME = 'export_report.json'
+# the runs table is written last, marking the run as complete
+RUNS_TABLE = 'runs'
+
+# topology table -> names of the columns of its values array
+TOPOLOGY_COLUMNS = {
+    'bonds': ('index', 'type', 'atom_1', 'atom_2'),
+    'angles': ('index', 'type', 'atom_1', 'atom_2', 'atom_3'),
+    'dihedrals': ('index', 'type', 'atom_1', 'atom_2', 'atom_3', 'atom_4'),
+    'impropers': ('index', 'type', 'atom_1', 'atom_2', 'atom_3', 'atom_4'),
+}
+ATOM_COLUMNS = ('index', 'molecule', 'type', 'charge', 'position')
+TRAJECTORY_STATISTICS = (
+    'mean',
+    'std',
+    'equilibration_time',
+    'autocorrelation_time',
+    'final_value',
+)
+
+
+def _scalars(values: dict) -> dict:
+    # the values that are not lists or arrays, e.g. e_field or atoms
+    return {
+        name: value
+        for name, value in values.items()
+        if not isinstance(value, (list, tuple, np.ndarray))
+    }
+
+
+def run_tables(run: RunData) -> dict[str, dict[str, np.ndarray]]:
+    """Returns the columns of every table of a ``run`` read by ``read_run``."""
+    arrays = run.system.arrays
+    theta = run.theta
+    row = {
+        **_scalars(run.script.quantities),
+        **_scalars(run.system.header),
+        'n_trajectories': len(theta.thetas),
+    }
+    if isinstance(run.script.variables.get('T'), float):
+        row['temperature'] = run.script.variables['T']
+    tables = {RUNS_TABLE: {name: np.asarray([value]) for name, value in row.items()}}
+
+    if 'atoms_index' in arrays:
+        tables['atoms'] = {name: arrays[f'atoms_{name}'] for name in ATOM_COLUMNS}
+    for name, columns in TOPOLOGY_COLUMNS.items():
+        values = arrays.get(f'{name}_values')
+        if values is not None:
+            # one copy, column-major, so every column is a contiguous row
+            tables[name] = dict(zip(columns, np.ascontiguousarray(values.T)))
+
+    if theta.thetas:
+        ensemble = theta.ensemble
+        tables['trajectories'] = {
+            'trajectory': np.arange(len(theta.thetas), dtype=np.int32),
+            'source_file': np.array(
+                [
+                    os.path.relpath(path, run.run_files.directory)
+                    for path in run.run_files.theta
+                ]
+            ),
+            'n_samples': ensemble['n_samples'],
+            **{name: theta.statistics[name] for name in TRAJECTORY_STATISTICS},
+        }
+        trajectory, sample = np.nonzero(ensemble['mask'])
+        tables['theta'] = {
+            'trajectory': trajectory.astype(np.int32),
+            'time': ensemble['time'][sample],
+            'theta': ensemble['theta'][trajectory, sample],
+        }
+    return tables
+
+
+def table_path(output, table: str, run: str, table_format: str = 'npz') -> str:
+    """Path of the partition of ``run`` of ``table`` in the ``output`` directory."""
+    return os.path.join(
+        output, table, f'run={run}', f'part-0{TABLE_FORMATS[table_format]}'
+    )
+
+
+def _arrow_column(values: np.ndarray):
+    if values.ndim > 1:
+        return pa.FixedSizeListArray.from_arrays(
+            pa.array(np.ascontiguousarray(values).ravel()), values.shape[1]
+        )
+    return pa.array(values)
+
+
+def write_table(columns: dict, path, table_format: str = 'npz') -> None:
+    """Writes the ``columns`` as one table, atomically replacing ``path``."""
+    if table_format == 'parquet' and pa is None:
+        raise ImportError('exporting parquet files requires pyarrow')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    try:
+        if table_format == 'parquet':
+            table = pa.table(
+                {name: _arrow_column(values) for name, values in columns.items()}
+            )
+            pq.write_table(table, temporary)
+        else:
+            with open(temporary, 'wb') as f:
+                np.savez(f, **columns)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def read_table(output, table: str) -> dict[str, np.ndarray]:
+    """
+    Concatenates all run partitions of an exported ``.npz`` ``table``, adding the
+    ``run`` of every row as column. Columns not present in all runs are dropped.
+    """
+    parts = []
+    for path in sorted(Path(output, table).glob('run=*/part-0.npz')):
+        with np.load(path) as part:
+            columns = {name: part[name] for name in part.files}
+        rows = len(next(iter(columns.values()), []))
+        columns['run'] = np.full(rows, path.parent.name.partition('=')[2])
+        parts.append(columns)
+    if not parts:
+        return {}
+    # columns missing in some runs, e.g. an unset temperature, are left out
+    names = set.intersection(*(set(part) for part in parts))
+    return {
+        name: np.concatenate([part[name] for part in parts])
+        for name in parts[0]
+        if name in names
+    }
+
+
+def export_run(mainfile, output, run: str, settings=None, table_format='npz'):
+    """Reads the run of ``mainfile`` and writes its tables as partition ``run``."""
+    start = time.perf_counter()
+    try:
+        tables = run_tables(read_run(mainfile, settings))
+        nbytes = 0
+        # the runs table last, so only complete runs are skipped when resuming
+        for name in sorted(tables, key=lambda name: name == RUNS_TABLE):
+            path = table_path(output, name, run, table_format)
+            write_table(tables[name], path, table_format)
+            nbytes += sum(values.nbytes for values in tables[name].values())
+    except Exception:  # reported per run
+        return RunResult(
+            mainfile,
+            output,
+            'failed',
+            time.perf_counter() - start,
+            error=traceback.format_exc(),
+        )
+    return RunResult(mainfile, output, 'parsed', time.perf_counter() - start, nbytes)
+
+
+def export_campaign(
+    root, output, workers: int = 0, table_format: str = 'npz', resume: bool = True
+) -> list[RunResult]:
+    """
+    Exports every run under ``root`` into the tables in ``output``, partitioned by
+    the path of the mainfile relative to ``root``. Like ``parse_campaign``, runs are
+    parsed by ``workers`` processes and runs already exported are skipped if
+    ``resume``.
+    """
+    # only what goes into the tables is read
+    settings = configuration.model_copy(
+        update={
+            'theta_workers': 1,
+            'molecule_descriptors': False,
+            'dump_frames': 0,
+            'dump_summary_frames': 0,
+            'theta_plot_points': 0,
+        }
+    )
+    output = os.fspath(output)
+    mainfiles = find_runs(root)
+    results, tasks = [], {}
+    for mainfile in mainfiles:
+        run = quote(os.path.relpath(mainfile, root), safe='')
+        path = table_path(output, RUNS_TABLE, run, table_format)
+        if resume and os.path.exists(path):
+            results.append(RunResult(mainfile, output, 'skipped'))
+            progress(len(results), len(mainfiles), results[-1])
+        else:
+            tasks[mainfile] = (output, run, settings, table_format)
+
+    start = time.perf_counter()
+    run_tasks(export_run, tasks, workers, results, len(mainfiles))
+    report(results, time.perf_counter() - start, os.path.join(output, REPORT_NAME))
+    return results
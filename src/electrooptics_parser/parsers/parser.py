@@ -10,322 +10,292 @@ if TYPE_CHECKING:
         BoundLogger,
     )
 
-import yaml
 import os
-import re
-import datetime
-import numpy as np
-import filecmp
+import tempfile
 from pathlib import Path
 
+import h5py
+import numpy as np
 from nomad.config import config
 from nomad.datamodel.metainfo.workflow import Workflow
 from nomad.parsing.parser import MatchingParser
-from runschema.run import Run, Program
-from runschema.calculation import Calculation
+from runschema.run import Program, Run
 
-from electrooptics_parser.schema_packages.schema_package import ElectroopticsCalculation, ElectroopticsSystem, ElectroopticsInput, ElectroopticsFix, ElectroopticsOutput
+from electrooptics_parser.analysis.order_parameter import ensemble_statistics
+from electrooptics_parser.instrumentation import Instrumentation, profiled
+from electrooptics_parser.readers.hdf5 import write_datasets
+from electrooptics_parser.readers.run import RunData, SystemData, read_run
+from electrooptics_parser.readers.run_files import scan_run_directory
+from electrooptics_parser.schema_packages.schema_package import (
+    ElectroopticsCalculation,
+    ElectroopticsDump,
+    ElectroopticsDumpFrame,
+    ElectroopticsEnsemble,
+    ElectroopticsEnsembleStatistics,
+    ElectroopticsFix,
+    ElectroopticsInput,
+    ElectroopticsMolecules,
+    ElectroopticsOutput,
+    ElectroopticsSourceFile,
+    ElectroopticsSystem,
+    ElectroopticsThetaStatistics,
+)
 
 configuration = config.get_plugin_entry_point(
     'electrooptics_parser.parsers:parser_entry_point'
 )
 
-def DetailedParser(filepath, archive):
-    run = Run()
-    archive.run.append(run)
-    run.program = Program(name="Ka Chun Chan's Electrooptics Parser")
-    
-    calculation = ElectroopticsCalculation()
-    run.calculation.append(calculation)
+PROGRAM_NAME = "Ka Chun Chan's Electrooptics Parser"
+# arrays of quantities with a reference named <quantity>_hdf5 can be moved to the
+# HDF5 file <mainfile>.h5
+HDF5_REFERENCE_SUFFIX = '_hdf5'
+HDF5_SUFFIX = '.h5'
+
 
+def populate_input(calculation, script) -> None:
+    """Stores the commands and variables of the input ``script`` in ``calculation``."""
     electroopticsinput = ElectroopticsInput()
     calculation.electrooptics_input = electroopticsinput
-    
+    for name, value in script.quantities.items():
+        setattr(electroopticsinput, name, value)
+    for args in script.fixes:
+        electroopticsinput.fix.append(ElectroopticsFix(value=args))
+    if isinstance(script.variables.get('T'), float):
+        calculation.temperature = script.variables['T']
+
+
+def populate_system(calculation, system: SystemData) -> None:
+    """Stores the data file and the per-molecule descriptors in ``calculation``."""
     electroopticssystem = ElectroopticsSystem()
     calculation.electrooptics_system = electroopticssystem
-    
-    for root, dirs, files in sorted(os.walk(filepath.parent)):    
-        natsort = lambda s: [int(t) if t.isdigit() else t.lower() for t in re.split('(\d+)', s)]
-        files = sorted(files, key = natsort)
-        
-        for file in files:    
-            with open(root + '/' + file) as f:
-                if 'in_electrooptics' in file:    
-                    for i, line in enumerate(f):
-                        parts = line.split()
-                        if r'#' in line:
-                            continue
-                        if not line.strip():
-                            continue
-                        if re.search(r'\sT\s', line):
-                            parts = line.split('equal ')
-                            _temp = float(parts[1])
-                            calculation.temperature = _temp
-                        if re.search(r'variable\s*efield', line):
-                            parts = line.split('equal ')
-                            _e_field = float(parts[1])
-                            electroopticsinput.e_field = _e_field
-                        if 'dimension' in line:
-                            parts = line.split()
-                            _dimension = int(parts[1])
-                            electroopticsinput.dimension = _dimension
-                        if 'boundary' in line:
-                            _boundary = [parts[b] for b in range(1, len(parts))]
-                            electroopticsinput.boundary = _boundary
-                        if 'units' in line:
-                            _units = parts[1]
-                            electroopticsinput.units = _units
-                        if 'atom_style' in line:
-                            _atom_style = parts[1]
-                            electroopticsinput.atom_style = _atom_style
-                        if 'neighbor' in line:
-                            _neighbor = [parts[i] for i in range(1, len(parts))]
-                            electroopticsinput.neighbor = _neighbor
-                        if 'newton' in line:
-                            _newton = parts[1]
-                            electroopticsinput.newton = _newton
-                        if 'pair_style' in line:
-                            _pair_style = [parts[i] for i in range(1, len(parts))]
-                            electroopticsinput.pair_style = _pair_style
-                        if 'pair_modify' in line:
-                            _pair_modify = [parts[i] for i in range(1, len(parts))]
-                            electroopticsinput.pair_modify = _pair_modify
-                        if 'kspace_style' in line:
-                            _kspace_style = [parts[i] for i in range(1, len(parts))]
-                            electroopticsinput.kspace_style = _kspace_style
-                        if 'bond_style' in line:
-                            _bond_style = parts[1]
-                            electroopticsinput.bond_style = _bond_style
-                        if 'angle_style' in line:
-                            _angle_style = parts[1]
-                            electroopticsinput.angle_style = _angle_style
-                        if 'dihedral_style' in line:
-                            _dihedral_style = parts[1]
-                            electroopticsinput.dihedral_style = _dihedral_style
-                        if 'improper_style' in line:
-                            _improper_style = parts[1]
-                            electroopticsinput.improper_style = _improper_style
-                        if 'compute' in line:
-                            _compute = [parts[i] for i in range(1, len(parts))]
-                            electroopticsinput.compute = _compute
-                        if 'thermo_modify' in line:
-                            _thermo_modify = [parts[i] for i in range(1, len(parts))]
-                            electroopticsinput.thermo_modify = _thermo_modify
-                        if re.search(r'thermo\s*\d', line):
-                            _thermo = float(parts[1])
-                            electroopticsinput.thermo = _thermo
-                        if 'minimize' in line:
-                            _minimize = [float(parts[i]) for i in range(1, len(parts))]
-                            electroopticsinput.minimize = _minimize
-                        if 'velocity' in line:
-                            _velocity = [parts[i] for i in range(1, len(parts))]
-                            electroopticsinput.velocity = _velocity
-                        if re.search(r'^fix\s', line):
-                            electroopticsfix = ElectroopticsFix()
-                            electroopticsinput.fix.append(electroopticsfix)
-                            _fix = [parts[i] for i in range(1, len(parts))]
-                            electroopticsfix.value = _fix
-                        if re.search(r'group', line):
-                            _group = [parts[i] for i in range(1, len(parts))]
-                        if re.search(r'^\d', line):
-                            _group.append(line)    
-                        if re.search(r'dump\s', line):
-                            _dump = [parts[i] for i in range(1, len(parts))]
-                            electroopticsinput.dump = _dump
-                        if 'dump_modify' in line:
-                            _dump_modify = [parts[1] for i in range(1, len(parts))]
-                            electroopticsinput.dump_modify = _dump_modify
-                    electroopticsinput.group = _group
-                if 'system_electrooptics' in file:
-                    mode = 0
-                    Atoms1 = [] # 1st column of Atoms-array
-                    Atoms2 = [] # 2nd column of Atoms-array
-                    Atoms3 = []
-                    Atoms4 = []
-                    Atoms5 = []
-                    Atoms6 = []
-                    Atoms7 = []
-                    Bonds1 = [] # 1st column of Bonds-array
-                    Bonds2 = []
-                    Bonds3 = []
-                    Bonds4 = []
-                    Angles1 = []
-                    Angles2 = []
-                    Angles3 = []
-                    Angles4 = []
-                    Angles5 = []
-                    Dihedrals1 = []
-                    Dihedrals2 = []
-                    Dihedrals3 = []
-                    Dihedrals4 = []
-                    Dihedrals5 = []
-                    Dihedrals6 = []
-                    Impropers1 = []
-                    Impropers2 = []
-                    Impropers3 = []
-                    Impropers4 = []
-                    Impropers5 = []
-                    Impropers6 = []
-                    for i, line in enumerate(f):
-                        parts = line.split()
-                        if 'lammps' in line.lower():
-                            continue
-                        if not line.strip():
-                            continue
-                        if 'atoms' in line:
-                            _atoms = float(parts[0])
-                            electroopticssystem.atoms = _atoms
-                        if 'bonds' in line:
-                            _bonds = float(parts[0])
-                            electroopticssystem.bonds = _bonds
-                        if 'angles' in line:
-                            _angles = float(parts[0])
-                            electroopticssystem.angles = _angles
-                        if 'dihedrals' in line:
-                            _dihedrals = float(parts[0])
-                            electroopticssystem.dihedrals = _dihedrals
-                        if 'impropers' in line:
-                            _impropers = float(parts[0])
-                            electroopticssystem.impropers = _impropers
-                        if 'atom types' in line:
-                            _atom_types = float(parts[0])
-                            electroopticssystem.atom_types = _atom_types
-                        if 'bond types' in line:
-                            _bond_types = float(parts[0])
-                            electroopticssystem.bond_types = _bond_types
-                        if 'angle types' in line:
-                            _angle_types = float(parts[0])
-                            electroopticssystem.angle_types = _angle_types
-                        if 'dihedral types' in line:
-                            _dihedral_types = float(parts[0])
-                            electroopticssystem.dihedral_types = _dihedral_types
-                        if 'improper types' in line:
-                            _improper_types = float(parts[0])
-                            electroopticssystem.improper_types = _improper_types
-                        if 'xlo' in line:
-                            _xlo = float(parts[0])
-                            _xhi = float(parts[1])
-                            electroopticssystem.xlo = _xlo
-                            electroopticssystem.xhi = _xhi
-                        if 'ylo' in line:
-                            _ylo = float(parts[0])
-                            _yhi = float(parts[1])
-                            electroopticssystem.ylo = _ylo
-                            electroopticssystem.yhi = _yhi
-                        if 'zlo' in line:
-                            _zlo = float(parts[0])
-                            _zhi = float(parts[1])
-                            electroopticssystem.zlo = _zlo
-                            electroopticssystem.zhi = _zhi
-                        if re.search('Atoms', line):
-                            mode = 1
-                            continue
-                        if mode == 1 and len(line.split(' ')) > 1:                
-                            Atoms1.append(float(parts[0]))
-                            Atoms2.append(float(parts[1]))
-                            Atoms3.append(float(parts[2]))
-                            Atoms4.append(float(parts[3]))
-                            Atoms5.append(float(parts[4]))
-                            Atoms6.append(float(parts[5]))
-                            Atoms7.append(float(parts[6]))
-
-                        if re.search(r'Bonds', line):
-                            mode = 2
-                            continue
-                        if mode == 2 and len(line.split(' ')) > 1:
-                            Bonds1.append(float(parts[0]))
-                            Bonds2.append(float(parts[1]))
-                            Bonds3.append(float(parts[2]))
-                            Bonds4.append(float(parts[3]))
-                        if re.search(r'Angles', line):
-                            mode = 3
-                            continue
-                        if mode == 3 and len(line.split(' ')) > 1:
-                            Angles1.append(float(parts[0]))
-                            Angles2.append(float(parts[1]))
-                            Angles3.append(float(parts[2]))
-                            Angles4.append(float(parts[3]))
-                            Angles5.append(float(parts[4]))
-                        if re.search(r'Dihedrals', line):
-                            mode = 4
-                            continue
-                        if mode == 4 and len(line.split(' ')) > 1:
-                            Dihedrals1.append(float(parts[0]))
-                            Dihedrals2.append(float(parts[1]))
-                            Dihedrals3.append(float(parts[2]))
-                            Dihedrals4.append(float(parts[3]))
-                            Dihedrals5.append(float(parts[4]))
-                            Dihedrals6.append(float(parts[5]))
-                        if re.search(r'Impropers', line):
-                            mode = 5
-                            continue
-                        if mode == 5 and len(line.split(' ')) > 1:
-                            Impropers1.append(float(parts[0]))
-                            Impropers2.append(float(parts[1]))
-                            Impropers3.append(float(parts[2]))
-                            Impropers4.append(float(parts[3]))
-                            Impropers5.append(float(parts[4]))
-                            Impropers6.append(float(parts[5]))
-
-                    _atoms_values = np.zeros((int(_atoms), 7))        
-                    _atoms_values[:,0] = Atoms1
-                    _atoms_values[:,1] = Atoms2
-                    _atoms_values[:,2] = Atoms3
-                    _atoms_values[:,3] = Atoms4
-                    _atoms_values[:,4] = Atoms5
-                    _atoms_values[:,5] = Atoms6
-                    _atoms_values[:,6] = Atoms7
-                    electroopticssystem.atoms_values = _atoms_values
-
-                    _bonds_values = np.zeros((int(_bonds), 4))
-                    _bonds_values[:,0] = Bonds1
-                    _bonds_values[:,1] = Bonds2
-                    _bonds_values[:,2] = Bonds3
-                    _bonds_values[:,3] = Bonds4
-                    electroopticssystem.bonds_values = _bonds_values
-
-                    _angles_values = np.zeros((int(_angles), 5))
-                    _angles_values[:,0] = Angles1
-                    _angles_values[:,1] = Angles2
-                    _angles_values[:,2] = Angles3
-                    _angles_values[:,3] = Angles4
-                    _angles_values[:,4] = Angles5
-                    electroopticssystem.angles_values = _angles_values
-
-                    _dihedrals_values = np.zeros((int(_dihedrals), 6))
-                    _dihedrals_values[:,0] = Dihedrals1
-                    _dihedrals_values[:,1] = Dihedrals2
-                    _dihedrals_values[:,2] = Dihedrals3
-                    _dihedrals_values[:,3] = Dihedrals4
-                    _dihedrals_values[:,4] = Dihedrals5
-                    _dihedrals_values[:,5] = Dihedrals6
-                    electroopticssystem.dihedrals_values = _dihedrals_values
-
-                    _impropers_values = np.zeros((int(_impropers), 6))
-                    _impropers_values[:,0] = Impropers1
-                    _impropers_values[:,1] = Impropers2
-                    _impropers_values[:,2] = Impropers3
-                    _impropers_values[:,3] = Impropers4
-                    _impropers_values[:,4] = Impropers5
-                    _impropers_values[:,5] = Impropers6
-                    electroopticssystem.impropers_values = _impropers_values
-                if 'theta' in file:
-                    column1 = []
-                    column2 = []
-                    electroopticsoutput = ElectroopticsOutput()
-                    calculation.electrooptics_output.append(electroopticsoutput)
-                    for i, line in enumerate(f):
-                        parts = line.split()
-                        if 'Time' in line:
-                            continue
-                        column1.append(float(parts[0]))
-                        column2.append(float(parts[1]))
-                        rows = i
-                    _theta = np.zeros((rows, 2))
-                    _theta[:,0] = column1
-                    _theta[:,1] = column2
-                    electroopticsoutput.theta = _theta
+    for name, value in {**system.header, **system.arrays}.items():
+        setattr(electroopticssystem, name, value)
+    if system.masses_element is not None:
+        electroopticssystem.masses_element = system.masses_element
+    if system.molecules is not None:
+        electroopticssystem.molecules = ElectroopticsMolecules(**system.molecules)
+
+
+def populate_dump(calculation, dump: dict) -> None:
+    """Stores the frame index, summaries and decimated frames of a dump."""
+    electroopticsdump = ElectroopticsDump()
+    calculation.electrooptics_dump = electroopticsdump
+    for name, value in dump.items():
+        if name != 'frames':
+            setattr(electroopticsdump, name, value)
+    for frame in dump['frames']:
+        electroopticsdump.frame.append(ElectroopticsDumpFrame(**frame))
+
+
+def trajectory_output(theta, statistics: dict, store_theta: bool, plot=None):
+    """
+    Returns the output section of one trajectory, without theta if not stored and
+    with the downsampled ``plot`` array, if given.
+    """
+    electroopticsoutput = ElectroopticsOutput(
+        statistics=ElectroopticsThetaStatistics(**statistics)
+    )
+    if store_theta:
+        electroopticsoutput.theta = theta
+    if plot is not None:
+        electroopticsoutput.plot_time = plot[:, 0]
+        electroopticsoutput.plot_theta = plot[:, 1]
+    return electroopticsoutput
+
+
+def populate_ensemble(
+    calculation, run_files, ensemble: dict, statistics: dict, summary_only: bool
+) -> None:
+    """
+    Stores the trajectories of the theta files stacked on their shared time axis,
+    only the ensemble curves if ``summary_only``, and the ensemble statistics.
+    """
+    if summary_only:
+        ensemble = {
+            name: value
+            for name, value in ensemble.items()
+            if name not in ('theta', 'mask')
+        }
+    calculation.electrooptics_ensemble = ElectroopticsEnsemble(
+        source_file=[
+            os.path.relpath(path, run_files.directory) for path in run_files.theta
+        ],
+        **ensemble,
+    )
+    calculation.electrooptics_ensemble_statistics = ElectroopticsEnsembleStatistics(
+        **ensemble_statistics(statistics)
+    )
+
+
+def hdf5_reference_file(archive, filepath) -> str:
+    """Path of the HDF5 file of the arrays of the run relative to the upload."""
+    mainfile = archive.metadata.mainfile if archive.metadata else None
+    directory = os.path.dirname(mainfile) if mainfile else ''
+    return os.path.join(directory, f'{os.path.basename(filepath)}{HDF5_SUFFIX}')
+
+
+def store_hdf5(archive, calculation, filepath) -> int:
+    """
+    Moves the arrays of ``calculation`` that have a ``<quantity>_hdf5`` reference
+    into the HDF5 file next to the mainfile ``filepath`` and sets the references
+    instead. The file is written through the upload files if parsed by NOMAD.
+    Returns the number of bytes moved.
+    """
+    sections = [
+        section
+        for section in (
+            calculation.electrooptics_system,
+            *calculation.electrooptics_output,
+            calculation.electrooptics_ensemble,
+        )
+        if section is not None
+    ]
+    arrays = {}
+    reference_file = hdf5_reference_file(archive, filepath)
+    for section in sections:
+        for name, reference in section.m_def.all_quantities.items():
+            if not name.endswith(HDF5_REFERENCE_SUFFIX):
+                continue
+            quantity = section.m_def.all_quantities[name[: -len(HDF5_REFERENCE_SUFFIX)]]
+            value = section.m_get(quantity)
+            if value is None:
+                continue
+            path = f'{section.m_path()}/{quantity.name}'
+            arrays[path] = value
+            section.m_set(reference, f'{reference_file}#{path}')
+            section.m_set(quantity, None)
+
+    upload_files = getattr(archive.m_context, 'upload_files', None)
+    if upload_files is not None:
+        with upload_files.raw_file(reference_file, 'wb') as raw_file:
+            with h5py.File(raw_file, 'w') as f:
+                write_datasets(f, arrays)
+    else:
+        path = os.path.join(os.path.dirname(filepath), os.path.basename(reference_file))
+        with h5py.File(path, 'w') as f:
+            write_datasets(f, arrays)
+    return sum(np.asarray(array).nbytes for array in arrays.values())
+
+
+def add_calculation(archive) -> ElectroopticsCalculation:
+    """Adds a run of this program with one calculation to ``archive``."""
+    run = Run()
+    archive.run.append(run)
+    run.program = Program(name=PROGRAM_NAME)
+    calculation = ElectroopticsCalculation()
+    run.calculation.append(calculation)
+    return calculation
+
+
+def add_trajectory_entry(child_archive, archive, calculation, electroopticsoutput):
+    """
+    Stores a single trajectory in ``child_archive``, referencing the input and system
+    of ``calculation`` in the parent ``archive``.
+    """
+    mainfile = archive.metadata.mainfile if archive.metadata else None
+    reference = f'../upload/archive/mainfile/{mainfile}#/run/0/calculation/0'
+
+    child_calculation = add_calculation(child_archive)
+    child_calculation.parent_input = f'{reference}/electrooptics_input'
+    child_calculation.parent_system = f'{reference}/electrooptics_system'
+    child_calculation.temperature = calculation.temperature
+    child_calculation.electrooptics_output.append(electroopticsoutput)
+
+
+def populate_run(archive, run: RunData, settings, child_archives: dict):
+    """
+    Maps the parsed ``run`` onto a new calculation of ``archive``. Trajectories whose
+    theta file name is a key of ``child_archives`` are stored in that child archive.
+    """
+    calculation = add_calculation(archive)
+    for path, value in run.fingerprints.items():
+        calculation.source_file.append(
+            ElectroopticsSourceFile(
+                path=os.path.relpath(path, run.run_files.directory),
+                size=value.size,
+                mtime_ns=value.mtime_ns,
+                sha256=value.sha256,
+            )
+        )
+    populate_input(calculation, run.script)
+    populate_system(calculation, run.system)
+
+    theta = run.theta
+    # with child archives, every trajectory is stored in the entry of its file
+    for index, path in enumerate(run.run_files.theta):
+        child_archive = child_archives.get(os.path.basename(path))
+        store_theta = settings.store_trajectory_theta or child_archive is not None
+        electroopticsoutput = trajectory_output(
+            theta.thetas[index],
+            {name: values[index] for name, values in theta.statistics.items()},
+            store_theta,
+            theta.plot[index] if theta.plot is not None else None,
+        )
+        if child_archive is None:
+            calculation.electrooptics_output.append(electroopticsoutput)
+        else:
+            add_trajectory_entry(
+                child_archive, archive, calculation, electroopticsoutput
+            )
+    if run.dump is not None:
+        populate_dump(calculation, run.dump)
+    if theta.thetas:
+        populate_ensemble(
+            calculation,
+            run.run_files,
+            theta.ensemble,
+            theta.statistics,
+            summary_only=bool(child_archives),
+        )
+    return calculation
+
+
+def DetailedParser(filepath, archive, settings=None, logger=None, child_archives=None):
+    """
+    Parses the run directory of the mainfile ``filepath`` into ``archive``.
+
+    ``settings`` is a ``NewParserEntryPoint``, by default the configured one. The run
+    is read by ``read_run`` and then mapped onto the archive. Each phase is measured
+    and logged through ``logger``; the phase records are returned. Trajectories
+    whose theta file name is a key of ``child_archives`` are stored in that child
+    archive instead of the main one.
+    """
+    settings = settings or configuration
+    instrumentation = Instrumentation(logger)
+    run = read_run(filepath, settings, instrumentation)
+
+    with instrumentation.phase('population') as record:
+        calculation = populate_run(archive, run, settings, child_archives or {})
+        record['rows'] = len(run.theta.thetas)
+
+    if settings.hdf5_arrays:
+        with instrumentation.phase('hdf5') as record:
+            record['bytes'] = store_hdf5(archive, calculation, filepath)
+    return instrumentation.records
+
+
 class NewParser(MatchingParser):
+    def is_mainfile(
+        self,
+        filename: str,
+        mime: str,
+        buffer: bytes,
+        decoded_buffer: str,
+        compression: str = None,
+    ):
+        is_mainfile = super().is_mainfile(
+            filename, mime, buffer, decoded_buffer, compression
+        )
+        if not is_mainfile or not configuration.child_archives:
+            return is_mainfile
+        # one child entry per trajectory, keyed by the name of its theta file
+        run_files = scan_run_directory(os.path.dirname(filename))
+        keys = [os.path.basename(path) for path in run_files.theta]
+        if not keys:
+            return is_mainfile
+        self.creates_children = True
+        return keys
+
     def parse(
         self,
         mainfile: str,
@@ -336,6 +306,23 @@ class NewParser(MatchingParser):
         logger.info('NewParser.parse', parameter=configuration.parameter)
 
         archive.workflow2 = Workflow(name='test')
-        
+
         mainfile = Path(mainfile)
-        DetailedParser(mainfile, archive)
\ No newline at end of file
+        with profiled(
+            configuration.profiler,
+            configuration.profile_directory or tempfile.gettempdir(),
+            mainfile,
+            logger,
+        ):
+            records = DetailedParser(
+                mainfile,
+                archive,
+                configuration,
+                logger,
+                child_archives if configuration.child_archives else None,
+            )
+        if configuration.memory_map:
+            logger.info(
+                'NewParser.parse memory peak',
+                peak_memory=max(record.get('peak_rss', 0) for record in records),
+            )
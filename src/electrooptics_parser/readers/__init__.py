@@ -0,0 +1 @@
+"""NumPy based readers for the files written by the electrooptics simulations."""
@@ -0,0 +1,92 @@
+"""
+On-disk cache of parsed run files, keyed by the hash of their content.
+
+Parameter sweeps run many inputs on the same ``system_electrooptics`` file, and
+reprocessed runs mostly consist of unchanged theta files. The parsed header and
+arrays are stored as uncompressed ``.npz`` files, so that later entries load them
+instead of converting the text again. The cache is limited in size; the least
+recently used files are evicted first, using the modification time that is
+refreshed on every hit.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+# bump when the layout of the cached arrays changes
+CACHE_VERSION = 2
+HASH_BLOCK_SIZE = 1024**2
+HEADER_KEY = '__header__'
+
+
+def content_hash(path) -> str:
+    """Returns the sha256 of the file content as hex."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class SystemCache:
+    """
+    Cache of ``(header, arrays)`` pairs as returned by ``read_data_file``, also used
+    for the arrays of theta files with an empty header.
+    """
+
+    def __init__(self, directory, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'v{CACHE_VERSION}-{key}.npz')
+
+    def load(self, key: str):
+        """Returns the cached ``(header, arrays)`` or ``None`` on a miss."""
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                header = json.loads(str(data[HEADER_KEY]))
+                arrays = {name: data[name] for name in data.files if name != HEADER_KEY}
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        return header, arrays
+
+    def store(self, key: str, header: dict, arrays: dict, evict: bool = True) -> None:
+        """
+        Adds an entry and, unless ``evict`` is false, evicts the least recently used
+        ones above the limit. Call ``evict`` once after storing many entries.
+        """
+        # write to a temporary file first, concurrent readers never see partial data
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                np.savez(f, **{HEADER_KEY: np.array(json.dumps(header))}, **arrays)
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            os.remove(temporary)
+            raise
+        if evict:
+            self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith('.npz'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -0,0 +1,46 @@
+"""
+Transparent access to gzip, xz and bz2 compressed run files.
+
+Archived runs are often stored compressed. Files are recognised by their magic bytes
+rather than their names and opened as a decompressing stream, so they never have to
+be decompressed to disk.
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+from typing import Optional
+
+# magic bytes -> (compression, opener), as detected by NOMAD's parser matching
+COMPRESSIONS = {
+    b'\x1f\x8b\x08': ('gz', gzip.open),
+    b'\x42\x5a\x68': ('bz2', bz2.open),
+    b'\xfd\x37\x7a': ('xz', lzma.open),
+}
+MAGIC_SIZE = 3
+
+# optional suffix of compressed file names, for the name patterns of run files
+SUFFIX_RE = r'(\.(gz|xz|bz2))?'
+SUFFIXES = ('', '.gz', '.xz', '.bz2')
+
+
+def detect_compression(path) -> Optional[str]:
+    """Returns ``'gz'``, ``'bz2'`` or ``'xz'`` for a compressed file, else ``None``."""
+    with open(path, 'rb') as f:
+        return COMPRESSIONS.get(f.read(MAGIC_SIZE), (None, None))[0]
+
+
+def open_file(path, mode: str = 'rb'):
+    """Opens a file for reading, decompressing it on the fly if it is compressed."""
+    with open(path, 'rb') as f:
+        _, opener = COMPRESSIONS.get(f.read(MAGIC_SIZE), (None, open))
+    return opener(path, mode)
+
+
+def find_file(path) -> Optional[str]:
+    """Returns ``path`` or, if that does not exist, its existing compressed variant."""
+    for suffix in SUFFIXES:
+        if os.path.isfile(path + suffix):
+            return path + suffix
+    return None
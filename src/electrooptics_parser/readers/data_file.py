@@ -0,0 +1,397 @@
+"""
+Reader for the LAMMPS data file (``system_electrooptics``) of a run.
+
+The file is scanned once with a compiled regular expression to find the byte
+offsets of the header and of every section. Each section that ends up in the
+archive is then converted into a NumPy array with a single bulk ``np.loadtxt`` call,
+using the row counts declared in the header.
+
+For very large files the reader can instead memory-map the file and convert each
+section in chunks of whole lines directly into the preallocated output arrays, so
+that the memory peak stays close to the size of the arrays themselves. Sections
+with several fields, e.g. Atoms, are preallocated as one array per field, so no
+structured copy of the whole section is kept. Compressed files are decompressed as
+a stream and converted in the same chunks.
+"""
+
+import io
+import mmap
+import re
+from pathlib import Path
+
+import numpy as np
+
+from electrooptics_parser.readers.compression import detect_compression, open_file
+
+# header keyword -> name of the ElectroopticsSystem quantity
+HEADER_COUNTS = {
+    b'atoms': 'atoms',
+    b'bonds': 'bonds',
+    b'angles': 'angles',
+    b'dihedrals': 'dihedrals',
+    b'impropers': 'impropers',
+    b'atom types': 'atom_types',
+    b'bond types': 'bond_types',
+    b'angle types': 'angle_types',
+    b'dihedral types': 'dihedral_types',
+    b'improper types': 'improper_types',
+}
+
+HEADER_BOUNDS = {
+    b'xlo xhi': ('xlo', 'xhi'),
+    b'ylo yhi': ('ylo', 'yhi'),
+    b'zlo zhi': ('zlo', 'zhi'),
+}
+
+# columns of an atom_style full Atoms section, image flags are not stored
+ATOMS_DTYPE = np.dtype(
+    [
+        ('index', np.int32),
+        ('molecule', np.int32),
+        ('type', np.int32),
+        ('charge', np.float64),
+        ('position', np.float64, (3,)),
+    ]
+)
+
+# atom type and its mass, the element is looked up from the mass
+MASSES_DTYPE = np.dtype([('type', np.int32), ('value', np.float64)])
+
+# section keyword -> (header count, number of columns, dtype)
+SECTIONS = {
+    'Masses': ('atom_types', 2, MASSES_DTYPE),
+    'Atoms': ('atoms', 7, ATOMS_DTYPE),
+    'Bonds': ('bonds', 4, np.dtype(np.int32)),
+    'Angles': ('angles', 5, np.dtype(np.int32)),
+    'Dihedrals': ('dihedrals', 6, np.dtype(np.int32)),
+    'Impropers': ('impropers', 6, np.dtype(np.int32)),
+}
+
+# array prefix of sections not named after their header count
+PREFIXES = {'Masses': 'masses'}
+# sections that may be left out although their header count is set, e.g. masses
+# given by mass commands of the input script
+OPTIONAL_SECTIONS = {'Masses'}
+
+# Section keywords are capitalised words (optionally followed by "Coeffs") alone on
+# a line, e.g. "Atoms # full". Data and header lines always start with a number.
+# Matching from the line break lets the regex engine skip ahead with a fast search.
+SECTION_RE = re.compile(
+    rb'\n[ \t]*([A-Z][A-Za-z0-9]*(?:[ \t]+Coeffs)?)[ \t]*(?:#[^\n]*)?(?=\r?\n|$)'
+)
+DATA_RE = re.compile(rb'\S')
+HEADER_RE = re.compile(
+    rb'^[ \t]*(\S+)[ \t]+(?:([-+.0-9eE]+)[ \t]+)?([a-z]+(?: [a-z]+)?)'
+    rb'[ \t]*(?:#[^\n]*)?\r?$',
+    re.M,
+)
+
+DEFAULT_CHUNK_SIZE = 16 * 1024**2
+
+
+def _release(buffer, start: int, stop: int) -> None:
+    # drops the mapped pages of a scanned byte range from the resident set
+    if not (hasattr(buffer, 'madvise') and hasattr(mmap, 'MADV_DONTNEED')):
+        return
+    page_start = start - start % mmap.PAGESIZE
+    page_stop = stop - stop % mmap.PAGESIZE
+    if page_stop > page_start:
+        buffer.madvise(mmap.MADV_DONTNEED, page_start, page_stop - page_start)
+
+
+def _section_matches(buffer, start: int, chunk_size: int):
+    # scans windows of about chunk_size bytes that end after a line break, so every
+    # keyword line lies within one window with its \r\n or \n; the next window
+    # starts at that line break, where keyword matches begin
+    end = len(buffer)
+    while start < end:
+        stop = buffer.find(b'\n', start + chunk_size)
+        stop = end if stop < 0 else stop
+        yield from SECTION_RE.finditer(buffer, start, stop + 1)
+        _release(buffer, start, stop)
+        start = stop
+
+
+def index_data_file(buffer, chunk_size: int = DEFAULT_CHUNK_SIZE) -> tuple[dict, dict]:
+    """
+    Scans a LAMMPS data file held in ``buffer`` (bytes or mmap) once, in windows of
+    about ``chunk_size`` bytes whose pages are released again if ``buffer`` is mapped.
+
+    Returns the parsed header values and a mapping from section keyword to the
+    ``(start, end)`` byte range of the section body. The first line of a data file
+    is a free-form title and is skipped.
+    """
+    title_end = buffer.find(b'\n') + 1 or len(buffer)
+
+    matches = [
+        (match.group(1).decode(), match.start(), match.end())
+        for match in _section_matches(buffer, title_end - 1, chunk_size)
+    ]
+    header_end = matches[0][1] if matches else len(buffer)
+
+    sections = {}
+    for i, (keyword, _, body_start) in enumerate(matches):
+        end = matches[i + 1][1] if i + 1 < len(matches) else len(buffer)
+        # skip the blank line(s) between the keyword and the first row
+        first = DATA_RE.search(buffer, body_start, end)
+        sections[keyword] = (first.start() if first else end, end)
+
+    header = {}
+    for match in HEADER_RE.finditer(buffer[title_end:header_end]):
+        first, second, keyword = match.groups()
+        if second is None and keyword in HEADER_COUNTS:
+            header[HEADER_COUNTS[keyword]] = int(first)
+        elif second is not None and keyword in HEADER_BOUNDS:
+            low, high = HEADER_BOUNDS[keyword]
+            header[low] = float(first)
+            header[high] = float(second)
+
+    return header, sections
+
+
+def _empty(rows: int, columns: int, dtype):
+    # structured rows are preallocated as one array per field
+    dtype = np.dtype(dtype)
+    if dtype.names:
+        return {
+            name: np.empty((rows, *dtype[name].shape), dtype=dtype[name].base)
+            for name in dtype.names
+        }
+    return np.empty((rows, columns), dtype=dtype)
+
+
+def _store(values, start: int, rows: np.ndarray) -> None:
+    # copies parsed rows into the preallocated arrays from row ``start`` on
+    if isinstance(values, dict):
+        for name, field in values.items():
+            field[start : start + len(rows)] = rows[name]
+    else:
+        values[start : start + len(rows)] = rows
+
+
+def _length(values) -> int:
+    return len(next(iter(values.values()))) if isinstance(values, dict) else len(values)
+
+
+def _fields(values: np.ndarray) -> dict:
+    # one contiguous copy of every field of a structured array
+    return {name: np.ascontiguousarray(values[name]) for name in values.dtype.names}
+
+
+def _load_rows(body, rows: int, columns: int, dtype) -> np.ndarray:
+    return np.loadtxt(
+        io.BytesIO(body),
+        dtype=dtype,
+        comments='#',
+        usecols=range(columns),
+        max_rows=rows,
+        ndmin=1 if np.dtype(dtype).names else 2,
+    )
+
+
+def read_section(body, rows: int, columns: int, dtype=np.float64) -> np.ndarray:
+    """
+    Converts the body of a section into a ``(rows, columns)`` array in one call.
+
+    Extra trailing columns (e.g. image flags in the Atoms section) are dropped and
+    comments are ignored. For a structured ``dtype`` the result has shape ``(rows,)``.
+    """
+    if rows == 0:
+        dtype = np.dtype(dtype)
+        return np.empty((0,) if dtype.names else (0, columns), dtype=dtype)
+    values = _load_rows(body, rows, columns, dtype)
+    if values.shape[0] != rows:
+        raise ValueError(f'Expected {rows} rows, found {values.shape[0]}.')
+    return values
+
+
+def read_section_chunked(
+    buffer,
+    section: tuple[int, int],
+    shape: tuple[int, int],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    dtype=np.float64,
+) -> np.ndarray:
+    """
+    Converts the byte range ``section`` of ``buffer`` into a preallocated array of
+    ``shape`` (rows, columns), reading about ``chunk_size`` bytes at a time. For a
+    structured ``dtype`` a dict of one ``(rows, ...)`` array per field is returned.
+
+    Chunks always end on a line break, so no row is split between two chunks.
+    """
+    start, end = section
+    rows, columns = shape
+    values = _empty(rows, columns, dtype)
+
+    filled = 0
+    position = start
+    while position < end and filled < rows:
+        stop = min(position + chunk_size, end)
+        if stop < end:
+            # extend the chunk to the end of the current line
+            line_end = buffer.find(b'\n', stop - 1, end)
+            stop = end if line_end < 0 else line_end + 1
+        chunk = _load_rows(buffer[position:stop], rows - filled, columns, dtype)
+        _store(values, filled, chunk)
+        filled += chunk.shape[0]
+        _release(buffer, position, stop)
+        position = stop
+
+    if filled != rows:
+        raise ValueError(f'Expected {rows} rows, found {filled}.')
+    return values
+
+
+def _named_arrays(values: dict) -> dict:
+    # names the field arrays of structured sections and the arrays of the others
+    arrays = {}
+    for keyword, (count, _, dtype) in SECTIONS.items():
+        prefix = PREFIXES.get(keyword, count)
+        if dtype.names:
+            for name, field in values[keyword].items():
+                arrays[f'{prefix}_{name}'] = field
+        else:
+            arrays[f'{prefix}_values'] = values[keyword]
+    return arrays
+
+
+def _read_sections(buffer, memory_map: bool, chunk_size: int) -> tuple[dict, dict]:
+    header, sections = index_data_file(buffer, chunk_size)
+    values = {}
+    for keyword, (count, columns, dtype) in SECTIONS.items():
+        rows = header.get(count, 0)
+        if keyword in OPTIONAL_SECTIONS and keyword not in sections:
+            rows = 0
+        start, end = sections.get(keyword, (0, 0))
+        if memory_map:
+            values[keyword] = read_section_chunked(
+                buffer,
+                (start, end),
+                (rows, columns),
+                chunk_size=chunk_size,
+                dtype=dtype,
+            )
+        else:
+            values[keyword] = read_section(
+                buffer[start:end], rows, columns, dtype=dtype
+            )
+            if dtype.names:
+                # the bulk read holds the whole file anyway
+                values[keyword] = _fields(values[keyword])
+    return header, _named_arrays(values)
+
+
+def _line_blocks(f, chunk_size: int):
+    """Yields the content of ``f`` in blocks of about ``chunk_size`` whole lines."""
+    pending = b''
+    for chunk in iter(lambda: f.read(chunk_size), b''):
+        data = pending + chunk
+        cut = data.rfind(b'\n') + 1
+        pending = data[cut:]
+        if cut:
+            yield data[:cut]
+    if pending:
+        yield pending + b'\n'
+
+
+class _StreamReader:
+    """Fills the section arrays from consecutive blocks of a streamed data file."""
+
+    def __init__(self):
+        self.head = b''
+        self.header = None
+        self.values = {}
+        self.filled = dict.fromkeys(SECTIONS, 0)
+        self.keyword = None
+
+    def start(self, block: bytes) -> bytes:
+        # collects the header up to the first section keyword, after the title line
+        self.head += block
+        title_end = self.head.find(b'\n') + 1
+        match = SECTION_RE.search(self.head, title_end - 1)
+        if match is None:
+            return b''
+        self.allocate(self.head[: match.start()])
+        rest, self.head = self.head[match.start() :], b''
+        return rest
+
+    def allocate(self, head: bytes) -> None:
+        self.header, _ = index_data_file(head)
+        for keyword, (count, columns, dtype) in SECTIONS.items():
+            self.values[keyword] = _empty(self.header.get(count, 0), columns, dtype)
+
+    def feed(self, block: bytes) -> None:
+        if self.header is None:
+            block = self.start(block)
+            if not block:
+                return
+        # keywords at the start of the block are preceded by a line break as well
+        block = block if block.startswith(b'\n') else b'\n' + block
+        position = 0
+        for match in SECTION_RE.finditer(block):
+            self.section_rows(block[position : match.start()])
+            self.keyword = match.group(1).decode()
+            position = match.end()
+        self.section_rows(block[position:])
+
+    def section_rows(self, body: bytes) -> None:
+        first = DATA_RE.search(body)
+        if self.keyword not in SECTIONS or first is None:
+            return
+        body = body[first.start() :]
+        _, columns, dtype = SECTIONS[self.keyword]
+        values = self.values[self.keyword]
+        filled = self.filled[self.keyword]
+        if filled < _length(values):
+            rows = _load_rows(body, _length(values) - filled, columns, dtype)
+            _store(values, filled, rows)
+            self.filled[self.keyword] = filled + rows.shape[0]
+
+    def finish(self) -> tuple[dict, dict]:
+        if self.header is None:  # no sections
+            self.allocate(self.head)
+        for keyword in OPTIONAL_SECTIONS:
+            if not self.filled[keyword]:
+                _, columns, dtype = SECTIONS[keyword]
+                self.values[keyword] = _empty(0, columns, dtype)
+        for keyword, values in self.values.items():
+            if self.filled[keyword] != _length(values):
+                raise ValueError(
+                    f'Expected {_length(values)} rows, found {self.filled[keyword]}.'
+                )
+        return self.header, _named_arrays(self.values)
+
+
+def read_data_stream(f, chunk_size: int = DEFAULT_CHUNK_SIZE) -> tuple[dict, dict]:
+    """
+    Reads a data file from the binary stream ``f`` in blocks of ``chunk_size`` bytes,
+    e.g. while decompressing it, and converts every block of section rows directly
+    into the preallocated output arrays.
+    """
+    reader = _StreamReader()
+    for block in _line_blocks(f, chunk_size):
+        reader.feed(block)
+    return reader.finish()
+
+
+def read_data_file(
+    path, memory_map: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> tuple[dict, dict]:
+    """
+    Reads the header values and the topology arrays of a LAMMPS data file.
+
+    The arrays are returned under the names of the ``ElectroopticsSystem``
+    quantities, e.g. ``atoms_position`` or ``bonds_values``. IDs and types are
+    ``np.int32``, charges and positions ``np.float64``. With ``memory_map`` the file
+    is not read into memory but mapped, and every section is converted in chunks of
+    ``chunk_size`` bytes. Compressed files are always streamed in such chunks.
+    """
+    if detect_compression(path) is not None:
+        with open_file(path) as f:
+            return read_data_stream(f, chunk_size)
+
+    if not memory_map:
+        return _read_sections(Path(path).read_bytes(), False, chunk_size)
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return _read_sections(mm, True, chunk_size)
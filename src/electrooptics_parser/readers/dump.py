@@ -0,0 +1,226 @@
+"""
+Streaming reader for the LAMMPS dump trajectory (``dump ... custom``) of a run.
+
+Dump files are the largest outputs of a run. The memory-mapped file is scanned once
+for the ``ITEM: TIMESTEP`` lines to build an index of the byte offsets, timesteps,
+atom counts and box bounds of all frames. Only selected frames are converted
+afterwards, one at a time: a decimated subset that is stored and a larger subset
+for which the chain alignment is computed, so the whole trajectory is never held in
+memory. Compressed dumps are indexed while decompressing them as a stream and the
+selected frames are read in a second, forward-seeking pass.
+"""
+
+import collections
+import contextlib
+import io
+import itertools
+import mmap
+import os
+import re
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from electrooptics_parser.analysis.chains import (
+    DEFAULT_DIRECTION,
+    chain_alignment,
+    end_to_end_vectors,
+)
+from electrooptics_parser.readers.compression import detect_compression, open_file
+
+FRAME_START = b'ITEM: TIMESTEP'
+FRAME_HEADER_LINES = 9
+# for triclinic boxes the bounds are those of the bounding box, tilts are dropped
+FRAME_HEADER_RE = re.compile(
+    rb'ITEM: TIMESTEP[ \t]*\r?\n[ \t]*(\d+)[^\n]*\n'
+    rb'ITEM: NUMBER OF ATOMS[ \t]*\r?\n[ \t]*(\d+)[^\n]*\n'
+    rb'ITEM: BOX BOUNDS[^\n]*\n'
+    rb'[ \t]*(\S+)[ \t]+(\S+)[^\n]*\n'
+    rb'[ \t]*(\S+)[ \t]+(\S+)[^\n]*\n'
+    rb'[ \t]*(\S+)[ \t]+(\S+)[^\n]*\n'
+    rb'ITEM: ATOMS([^\n]*)\n'
+)
+
+# dump column -> frame array, integer columns
+INTEGER_COLUMNS = {'id': 'atoms_index', 'mol': 'atoms_molecule', 'type': 'atoms_type'}
+# wrapped, unwrapped and scaled coordinates, in order of preference
+POSITION_COLUMNS = (('x', 'y', 'z'), ('xu', 'yu', 'zu'), ('xs', 'ys', 'zs'))
+
+
+class DumpIndex(NamedTuple):
+    # byte offsets of the first atom line of each frame and of the end of the frame
+    starts: np.ndarray
+    ends: np.ndarray
+    timestep: np.ndarray
+    n_atoms: np.ndarray
+    # (n_frames, 3, 2) lower and upper bounds
+    box: np.ndarray
+    columns: tuple[str, ...]
+
+
+def _build_index(headers: list, ends: list) -> DumpIndex:
+    # headers holds the (match, start of the atom lines) of every frame
+    columns = headers[0][0].group(9).decode().split() if headers else []
+    return DumpIndex(
+        starts=np.array([start for _, start in headers], dtype=np.int64),
+        ends=np.array(ends, dtype=np.int64),
+        timestep=np.array([int(m.group(1)) for m, _ in headers], dtype=np.int64),
+        n_atoms=np.array([int(m.group(2)) for m, _ in headers], dtype=np.int64),
+        box=np.array(
+            [[float(value) for value in m.group(3, 4, 5, 6, 7, 8)] for m, _ in headers],
+            dtype=np.float64,
+        ).reshape(-1, 3, 2),
+        columns=tuple(columns),
+    )
+
+
+def index_dump(buffer) -> DumpIndex:
+    """Scans a dump file held in ``buffer`` (bytes or mmap) once for its frames."""
+    headers, frame_starts = [], []
+    position = buffer.find(FRAME_START)
+    while position != -1:
+        match = FRAME_HEADER_RE.match(buffer, position)
+        if match is None:
+            raise ValueError(f'malformed dump frame header at byte {position}')
+        headers.append((match, match.end()))
+        frame_starts.append(position)
+        position = buffer.find(FRAME_START, match.end())
+    return _build_index(headers, frame_starts[1:] + [len(buffer)] if headers else [])
+
+
+def index_dump_stream(f) -> DumpIndex:
+    """
+    Scans a dump file from the binary stream ``f``, e.g. while decompressing it. The
+    offsets refer to the decompressed stream. Atom lines are skipped without
+    converting them.
+    """
+    headers, ends = [], []
+    while True:
+        position = f.tell()
+        lines = b''.join(itertools.islice(f, FRAME_HEADER_LINES))
+        if not lines.strip():
+            break
+        match = FRAME_HEADER_RE.match(lines)
+        if match is None:
+            raise ValueError(f'malformed dump frame header at byte {position}')
+        headers.append((match, f.tell()))
+        collections.deque(itertools.islice(f, int(match.group(2))), maxlen=0)
+        ends.append(f.tell())
+    return _build_index(headers, ends)
+
+
+class _StreamBuffer:
+    """Slices a seekable stream like a buffer, for reading frames in order."""
+
+    def __init__(self, f):
+        self.f = f
+
+    def __getitem__(self, key: slice) -> bytes:
+        self.f.seek(key.start)
+        return self.f.read(key.stop - key.start)
+
+
+@contextlib.contextmanager
+def _indexed(path):
+    # yields the buffer of a dump file and its frame index
+    if detect_compression(path) is not None:
+        with open_file(path) as f:
+            index = index_dump_stream(f)
+            yield _StreamBuffer(f), index
+        return
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b'', index_dump(b'')
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer, index_dump(buffer)
+
+
+def read_frame(buffer, index: DumpIndex, frame: int) -> dict:
+    """
+    Converts one frame into the arrays ``atoms_index``, ``atoms_molecule`` and
+    ``atoms_type`` (int32) and ``atoms_position`` (float64, ``(n_atoms, 3)``) of the
+    columns present in the dump. Scaled coordinates are converted to lengths.
+    """
+    start, end = index.starts[frame], index.ends[frame]
+    values = np.loadtxt(
+        io.BytesIO(buffer[start:end]), ndmin=2, max_rows=int(index.n_atoms[frame])
+    )
+    column = {name: number for number, name in enumerate(index.columns)}
+    arrays = {
+        name: values[:, column[key]].astype(np.int32)
+        for key, name in INTEGER_COLUMNS.items()
+        if key in column
+    }
+    for names in POSITION_COLUMNS:
+        if all(name in column for name in names):
+            position = values[:, [column[name] for name in names]]
+            if names[0] == 'xs':
+                low, high = index.box[frame, :, 0], index.box[frame, :, 1]
+                position = low + position * (high - low)
+            arrays['atoms_position'] = position
+            break
+    return arrays
+
+
+def select_frames(n_frames: int, count: Optional[int]) -> np.ndarray:
+    """Evenly spaced frame numbers including the first and last, ``None`` for all."""
+    if count is None or count >= n_frames:
+        return np.arange(n_frames)
+    if count <= 0:
+        return np.arange(0)
+    return np.unique(np.round(np.linspace(0, n_frames - 1, count)).astype(np.int64))
+
+
+def _alignment(arrays: dict, box_lengths: np.ndarray, direction) -> dict:
+    if 'atoms_molecule' not in arrays or 'atoms_position' not in arrays:
+        return chain_alignment(np.empty((0, 3)), direction)
+    ids = arrays.get('atoms_index', np.arange(len(arrays['atoms_position'])))
+    vectors = end_to_end_vectors(
+        ids, arrays['atoms_molecule'], arrays['atoms_position'], box_lengths
+    )
+    return chain_alignment(vectors, direction)
+
+
+def read_dump(
+    path, frames: int = 10, summary_frames: Optional[int] = 1000, direction=None
+) -> dict:
+    """
+    Reads the frame index of a dump file, the arrays of ``frames`` evenly spaced
+    frames and the chain alignment with the field ``direction`` (z by default) of
+    ``summary_frames`` evenly spaced frames, all frames for ``None``.
+
+    Returns the ``ElectroopticsDump`` quantities and the stored frames as a list of
+    dicts under ``frames``.
+    """
+    direction = DEFAULT_DIRECTION if direction is None else direction
+    with _indexed(path) as (buffer, index):
+        n_frames = len(index.timestep)
+        stored = set(select_frames(n_frames, frames).tolist())
+        summarised = set(select_frames(n_frames, summary_frames).tolist())
+        lengths = index.box[:, :, 1] - index.box[:, :, 0]
+
+        result = {
+            'n_frames': n_frames,
+            'timestep': index.timestep,
+            'n_atoms': index.n_atoms,
+            'box_lo': index.box[:, :, 0],
+            'box_hi': index.box[:, :, 1],
+            'columns': list(index.columns),
+            'summary_timestep': index.timestep[sorted(summarised)],
+            'frames': [],
+        }
+        alignments = {}
+        for frame in sorted(stored.union(summarised)):
+            arrays = read_frame(buffer, index, frame)
+            if frame in stored:
+                timestep = int(index.timestep[frame])
+                result['frames'].append({'timestep': timestep, **arrays})
+            if frame in summarised:
+                alignments[frame] = _alignment(arrays, lengths[frame], direction)
+
+    for name in ('mean_cos', 'p2', 'nematic_order'):
+        result[name] = np.array(
+            [alignments[frame][name] for frame in sorted(alignments)], dtype=np.float64
+        )
+    return result
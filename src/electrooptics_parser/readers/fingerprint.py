@@ -0,0 +1,58 @@
+"""
+Fingerprints of the files that went into an entry, used to reprocess incrementally.
+
+The fingerprints of the previous parse are kept in a manifest per mainfile. A file
+with unchanged size and modification time keeps its previous fingerprint without
+being read; all other files are hashed again. Parsed data is then looked up in the
+content-hash cache by the fingerprint's ``sha256``, so only new or changed files
+are parsed.
+"""
+
+import hashlib
+import json
+import os
+from typing import NamedTuple, Optional
+
+from electrooptics_parser.readers.cache import content_hash
+
+
+class Fingerprint(NamedTuple):
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+def fingerprint(path, previous: Optional[Fingerprint] = None) -> Fingerprint:
+    """Returns the fingerprint of ``path``, reusing ``previous`` if unchanged."""
+    stat = os.stat(path)
+    if (
+        previous is not None
+        and previous.size == stat.st_size
+        and previous.mtime_ns == stat.st_mtime_ns
+    ):
+        return previous
+    return Fingerprint(stat.st_size, stat.st_mtime_ns, content_hash(path))
+
+
+class RunManifest:
+    """The fingerprints recorded for one mainfile, stored in ``directory``."""
+
+    def __init__(self, directory, mainfile):
+        name = hashlib.sha256(os.path.abspath(mainfile).encode()).hexdigest()
+        self.path = os.path.join(directory, 'manifests', f'{name}.json')
+
+    def load(self) -> dict[str, Fingerprint]:
+        try:
+            with open(self.path) as f:
+                return {
+                    path: Fingerprint(*value) for path, value in json.load(f).items()
+                }
+        except (OSError, ValueError, TypeError):
+            return {}
+
+    def save(self, fingerprints: dict[str, Fingerprint]) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary = f'{self.path}.{os.getpid()}.tmp'
+        with open(temporary, 'w') as f:
+            json.dump({path: list(value) for path, value in fingerprints.items()}, f)
+        os.replace(temporary, self.path)
@@ -0,0 +1,57 @@
+"""
+Chunked, compressed HDF5 storage of the large arrays of a run.
+
+Instead of embedding them in the archive, the arrays are written to one HDF5 file
+next to the mainfile, at the archive path of their quantity, and the archive only
+holds a NOMAD HDF5 reference ``<file>#<dataset>`` to them. The datasets are chunked
+along the rows, so reading a slice of rows only decompresses the chunks it touches.
+"""
+
+import os
+
+import h5py
+import numpy as np
+
+COMPRESSION = 'gzip'
+COMPRESSION_LEVEL = 4
+# uncompressed size of a chunk of rows
+CHUNK_BYTES = 1024**2
+
+
+def _chunks(array: np.ndarray):
+    row_bytes = array.itemsize * int(np.prod(array.shape[1:], dtype=np.int64))
+    rows = max(1, min(len(array), CHUNK_BYTES // max(row_bytes, 1)))
+    return (rows, *array.shape[1:])
+
+
+def write_datasets(f, arrays: dict) -> None:
+    """Writes the ``arrays`` under their paths into the open HDF5 file ``f``."""
+    for path, array in arrays.items():
+        data = np.asarray(array)
+        if data.size == 0:
+            f.create_dataset(path, data=data)
+            continue
+        f.create_dataset(
+            path,
+            data=data,
+            chunks=_chunks(data),
+            compression=COMPRESSION,
+            compression_opts=COMPRESSION_LEVEL,
+            shuffle=True,
+        )
+
+
+def split_reference(reference: str) -> tuple[str, str]:
+    """Returns the file and the dataset path of a reference ``<file>#<dataset>``."""
+    file, _, path = reference.partition('#')
+    return file, path
+
+
+def read_rows(reference: str, root, rows=slice(None)) -> np.ndarray:
+    """
+    Reads the ``rows`` (a slice or index array) of the dataset ``reference``, whose
+    file is relative to the upload directory ``root``.
+    """
+    file, path = split_reference(reference)
+    with h5py.File(os.path.join(root, file), 'r') as f:
+        return f[path][rows]
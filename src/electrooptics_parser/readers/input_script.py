@@ -0,0 +1,225 @@
+"""
+Table-driven tokenizer for the LAMMPS input script (``in_electrooptics``) of a run.
+
+Every command is split once into a command word and its arguments and looked up in
+``COMMANDS``; commands that are not in the table are skipped. Continuation lines
+(``&``), comments, ``variable`` definitions with ``${name}``/``$x``/``v_name``
+expansion and ``include``d files are handled while reading, so the script is
+processed in a single linear pass. Lines that cannot be split, e.g. with unbalanced
+quotes, and missing included files are skipped with a warning.
+"""
+
+import logging
+import os
+import re
+import shlex
+from typing import NamedTuple, Optional
+
+from electrooptics_parser.readers.compression import open_file
+
+logger = logging.getLogger(__name__)
+
+VARIABLE_RE = re.compile(r'\$\{(\w+)\}|\$([A-Za-z0-9_])')
+REFERENCE_RE = re.compile(r'^v_(\w+)$')
+MAX_INCLUDE_DEPTH = 16
+LIST_STYLES = {'index', 'loop', 'world', 'universe', 'uloop'}
+# fix ID group efield ex ey ez, dump ID group style N file
+EFIELD_ARGS = 6
+DUMP_FILE_ARG = 4
+
+
+def _first(args: list[str]) -> str:
+    return args[0]
+
+
+def _int(args: list[str]) -> int:
+    return int(args[0])
+
+
+def _float(args: list[str]) -> float:
+    return float(args[0])
+
+
+def _floats(args: list[str]) -> list[float]:
+    return [float(arg) for arg in args]
+
+
+# command -> (ElectroopticsInput quantity, conversion of the arguments)
+COMMANDS = {
+    'dimension': ('dimension', _int),
+    'boundary': ('boundary', list),
+    'units': ('units', _first),
+    'atom_style': ('atom_style', _first),
+    'neighbor': ('neighbor', list),
+    'newton': ('newton', _first),
+    'pair_style': ('pair_style', list),
+    'pair_modify': ('pair_modify', list),
+    'kspace_style': ('kspace_style', list),
+    'bond_style': ('bond_style', _first),
+    'angle_style': ('angle_style', _first),
+    'dihedral_style': ('dihedral_style', _first),
+    'improper_style': ('improper_style', _first),
+    'compute': ('compute', list),
+    'thermo_modify': ('thermo_modify', list),
+    'thermo': ('thermo', _float),
+    'minimize': ('minimize', _floats),
+    'velocity': ('velocity', list),
+    'group': ('group', list),
+    'dump': ('dump', list),
+    'dump_modify': ('dump_modify', list),
+}
+
+# variables holding quantities that are not commands of their own
+VARIABLES = {'efield': 'e_field'}
+
+
+class InputScript(NamedTuple):
+    quantities: dict
+    fixes: list
+    variables: dict
+    includes: list  # paths of the included files in reading order
+
+
+def _strip_comment(line: str) -> str:
+    if '#' not in line:
+        return line
+    if '"' not in line and "'" not in line:
+        return line[: line.index('#')]
+    quote = None
+    for index, char in enumerate(line):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '#':
+            return line[:index]
+    return line
+
+
+def _commands(path):
+    """Yields the logical lines of a script, joining continuation lines."""
+    pending = ''
+    with open_file(path, 'rt') as f:
+        for raw in f:
+            line = _strip_comment(raw).rstrip()
+            if line.endswith('&'):
+                pending += line[:-1] + ' '
+                continue
+            command, pending = pending + line, ''
+            if command.strip():
+                yield command
+    if pending.strip():
+        yield pending
+
+
+def _split(line: str) -> list[str]:
+    # quoted arguments need the slower shell-like split
+    if '"' in line or "'" in line:
+        return shlex.split(line)
+    return line.split()
+
+
+def _to_value(value: str):
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+class _Reader:
+    def __init__(self):
+        self.quantities = {}
+        self.fixes = []
+        self.variables = {}
+        self.includes = []
+
+    def expand(self, line: str) -> str:
+        if '$' not in line:
+            return line
+
+        def substitute(match):
+            name = match.group(1) or match.group(2)
+            return self.variables.get(name, match.group(0))
+
+        return VARIABLE_RE.sub(substitute, line)
+
+    def resolve(self, arg: str) -> str:
+        match = REFERENCE_RE.match(arg)
+        if match:
+            return self.variables.get(match.group(1), arg)
+        return arg
+
+    def define(self, name: str, style: str, *values: str) -> None:
+        # like in LAMMPS, list-like styles keep their first definition and hold their
+        # first value, all other styles are redefined
+        if style in LIST_STYLES:
+            self.variables.setdefault(name, values[0])
+        else:
+            self.variables[name] = ' '.join(values)
+
+    def read(self, path, depth: int = 0) -> None:
+        for command_line in _commands(path):
+            line = self.expand(command_line)
+            try:
+                words = _split(line)
+            except ValueError as error:
+                logger.warning('skipping line %r of %s: %s', command_line, path, error)
+                continue
+            command, args = words[0], [self.resolve(arg) for arg in words[1:]]
+            if command == 'variable' and args[2:]:
+                self.define(*args)
+            elif command == 'include' and args and depth < MAX_INCLUDE_DEPTH:
+                include = os.path.join(os.path.dirname(path), args[0])
+                if not os.path.isfile(include):
+                    logger.warning('skipping missing include %s of %s', include, path)
+                    continue
+                self.includes.append(include)
+                self.read(include, depth + 1)
+            elif command == 'fix':
+                self.fixes.append(args)
+            elif command in COMMANDS:
+                name, convert = COMMANDS[command]
+                self.quantities[name] = convert(args)
+
+
+def efield_direction(fixes: list) -> Optional[list[float]]:
+    """
+    Returns the field vector of the first ``fix ... efield ex ey ez`` with constant
+    components, ``None`` if there is none or the field is zero.
+    """
+    for args in fixes:
+        if args[2:3] != ['efield'] or len(args) < EFIELD_ARGS:
+            continue
+        try:
+            field = [float(arg) for arg in args[3:EFIELD_ARGS]]
+        except ValueError:  # variable field
+            continue
+        if any(field):
+            return field
+    return None
+
+
+def dump_file(quantities: dict) -> Optional[str]:
+    """Returns the file name of the ``dump`` command, ``None`` for per-step files."""
+    args = quantities.get('dump', [])
+    if len(args) <= DUMP_FILE_ARG or '*' in args[DUMP_FILE_ARG]:
+        return None
+    return args[DUMP_FILE_ARG]
+
+
+def read_input_script(path) -> InputScript:
+    """
+    Reads the quantities of ``ElectroopticsInput`` from an input script.
+
+    Repeated commands overwrite earlier ones, except ``fix`` which is collected in
+    order. Numeric variable values are floats; ``efield`` is also returned as the
+    ``e_field`` quantity. The paths of the ``include``d files are returned as well.
+    """
+    reader = _Reader()
+    reader.read(path)
+    variables = {name: _to_value(value) for name, value in reader.variables.items()}
+    for variable, name in VARIABLES.items():
+        if isinstance(variables.get(variable), float):
+            reader.quantities[name] = variables[variable]
+    return InputScript(reader.quantities, reader.fixes, variables, reader.includes)
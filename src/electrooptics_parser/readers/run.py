@@ -0,0 +1,297 @@
+"""
+Parsing of a whole run into plain NumPy results, independent of NOMAD.
+
+``read_run`` reads the input script, the system data file, the theta files and the
+dump of a run and computes the per-molecule descriptors and theta statistics. The
+results are tuples of NumPy arrays and dicts, so scripts, batch workers and
+benchmarks only import NumPy and the readers; ``DetailedParser`` maps them onto the
+archive sections afterwards.
+"""
+
+import os
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from electrooptics_parser.analysis.composition import type_elements
+from electrooptics_parser.analysis.downsample import downsample_theta
+from electrooptics_parser.analysis.order_parameter import (
+    theta_ensemble,
+    theta_statistics,
+)
+from electrooptics_parser.analysis.topology import molecule_descriptors
+from electrooptics_parser.instrumentation import Instrumentation
+from electrooptics_parser.readers.cache import SystemCache, content_hash
+from electrooptics_parser.readers.compression import find_file
+from electrooptics_parser.readers.data_file import read_data_file
+from electrooptics_parser.readers.dump import read_dump
+from electrooptics_parser.readers.fingerprint import (
+    Fingerprint,
+    RunManifest,
+    fingerprint,
+)
+from electrooptics_parser.readers.input_script import (
+    InputScript,
+    dump_file,
+    efield_direction,
+    read_input_script,
+)
+from electrooptics_parser.readers.run_files import RunFiles, scan_run_directory
+from electrooptics_parser.readers.theta import read_theta_files
+
+
+class ParseSettings(NamedTuple):
+    # the parsing options of NewParserEntryPoint with the same defaults, which can be
+    # passed instead
+    memory_map: bool = False
+    chunk_size: int = 16 * 1024**2
+    theta_workers: int = 0
+    theta_parallel_min_bytes: int = 32 * 1024**2
+    cache_directory: Optional[str] = None
+    cache_max_bytes: int = 2 * 1024**3
+    incremental: bool = False
+    molecule_descriptors: bool = True
+    dump_frames: int = 10
+    dump_summary_frames: Optional[int] = 1000
+    theta_plot_points: int = 1000
+
+
+class SystemData(NamedTuple):
+    # header counts and box bounds, and the arrays of the sections of the data file
+    header: dict
+    arrays: dict
+    masses_element: Optional[np.ndarray] = None
+    molecules: Optional[dict] = None
+
+
+class ThetaData(NamedTuple):
+    # one (time, theta) array per theta file in natural-sort order, the statistics
+    # of every trajectory, the trajectories stacked on the shared time axis and
+    # their downsampled arrays for plotting
+    thetas: list
+    statistics: Optional[dict] = None
+    ensemble: Optional[dict] = None
+    plot: Optional[list] = None
+
+
+class RunData(NamedTuple):
+    run_files: RunFiles
+    fingerprints: dict[str, Fingerprint]
+    script: InputScript
+    system: SystemData  # empty without data file
+    theta: ThetaData
+    dump: Optional[dict]
+
+
+def _cache(settings):
+    if not settings.cache_directory:
+        return None
+    return SystemCache(settings.cache_directory, settings.cache_max_bytes)
+
+
+def read_system_file(path, settings, digest=None) -> tuple[dict, dict]:
+    """
+    Reads the system data file, going through the content-hash cache if a
+    ``cache_directory`` is configured. ``digest`` is the known content hash.
+    """
+    cache = _cache(settings)
+    if cache is not None:
+        key = f'system-{digest or content_hash(path)}'
+        cached = cache.load(key)
+        if cached is not None:
+            return cached
+
+    header, arrays = read_data_file(
+        path, memory_map=settings.memory_map, chunk_size=settings.chunk_size
+    )
+    if cache is not None:
+        cache.store(key, header, arrays)
+    return header, arrays
+
+
+def read_theta_arrays(paths, settings, digests, instrumentation=None) -> list:
+    """
+    Reads the theta files. In incremental mode, files whose content hash in
+    ``digests`` is already cached are loaded instead and only the others are parsed.
+    Every file is recorded in ``instrumentation``, if given.
+    """
+    cache = _cache(settings) if settings.incremental else None
+    thetas = [None] * len(paths)
+    if cache is not None:
+        for index, digest in enumerate(digests):
+            cached = cache.load(f'theta-{digest}')
+            if cached is not None:
+                thetas[index] = cached[1]['theta']
+
+    missing = [index for index, theta in enumerate(thetas) if theta is None]
+    parsed = read_theta_files(
+        [paths[index] for index in missing],
+        workers=settings.theta_workers,
+        min_parallel_bytes=settings.theta_parallel_min_bytes,
+        timed=True,
+    )
+    wall_times = {}
+    for index, (theta, wall_time) in zip(missing, parsed):
+        thetas[index] = theta
+        wall_times[index] = wall_time
+        if cache is not None:
+            cache.store(f'theta-{digests[index]}', {}, {'theta': theta}, evict=False)
+    if cache is not None and missing:
+        cache.evict()
+
+    if instrumentation is not None:
+        for index, path in enumerate(paths):
+            instrumentation.file(
+                'theta_file',
+                os.path.basename(path),
+                bytes=os.path.getsize(path),
+                rows=len(thetas[index]),
+                wall_time=wall_times.get(index, 0.0),
+                cached=index not in wall_times,
+            )
+    return thetas
+
+
+def fingerprint_files(paths, previous: dict) -> dict[str, Fingerprint]:
+    """
+    Returns the fingerprints of ``paths`` by absolute path, reusing the ``previous``
+    fingerprints of unchanged files.
+    """
+    paths = [os.path.abspath(path) for path in paths]
+    return {path: fingerprint(path, previous.get(path)) for path in paths}
+
+
+def discover_run(filepath, settings):
+    """
+    Finds the files of the run of ``filepath`` and returns them with the fingerprints
+    of the mainfile, the data file and the theta files, the manifest of the run in
+    incremental mode and its previous fingerprints, which are reused for unchanged
+    files.
+    """
+    run_files = scan_run_directory(os.path.dirname(os.path.abspath(filepath)))
+    manifest = None
+    previous = {}
+    if settings.incremental and settings.cache_directory:
+        manifest = RunManifest(settings.cache_directory, filepath)
+        previous = manifest.load()
+    paths = (filepath, run_files.system, *run_files.theta)
+    fingerprints = fingerprint_files(
+        [path for path in paths if path is not None], previous
+    )
+    return run_files, fingerprints, manifest, previous
+
+
+def read_run_dump(directory, script, settings, instrumentation) -> Optional[dict]:
+    """
+    Reads the dump file written by the input ``script`` as phase ``dump_file``, if it
+    exists (possibly compressed) and any frames are to be read. The path relative to
+    the run ``directory`` is added to the returned quantities.
+    """
+    name = dump_file(script.quantities)
+    if name is None or not (settings.dump_frames or settings.dump_summary_frames != 0):
+        return None
+    path = find_file(os.path.join(directory, name))
+    if path is None:
+        return None
+    with instrumentation.phase('dump_file') as record:
+        dump = read_dump(
+            path,
+            frames=settings.dump_frames,
+            summary_frames=settings.dump_summary_frames,
+            direction=efield_direction(script.fixes),
+        )
+        record['bytes'] = os.path.getsize(path)
+        record['rows'] = len(dump['frames']) + len(dump['summary_timestep'])
+    dump['path'] = os.path.relpath(path, directory)
+    return dump
+
+
+def read_molecules(header, arrays, script, settings, instrumentation):
+    """
+    Computes the per-molecule descriptors of the system as phase ``topology``, if
+    enabled and the atoms have molecule IDs.
+    """
+    if not settings.molecule_descriptors or not len(arrays.get('atoms_molecule', [])):
+        return None
+    with instrumentation.phase('topology') as record:
+        box = None
+        if all(f'{axis}hi' in header and f'{axis}lo' in header for axis in 'xyz'):
+            box = np.array([header[f'{x}hi'] - header[f'{x}lo'] for x in 'xyz'])
+        molecules = molecule_descriptors(arrays, box, efield_direction(script.fixes))
+        record['rows'] = len(molecules['molecule_id'])
+    return molecules
+
+
+def read_run(filepath, settings=None, instrumentation=None) -> RunData:
+    """
+    Parses the run directory of the mainfile ``filepath``.
+
+    ``settings`` has the fields of ``ParseSettings``, which is the default; the
+    ``NewParserEntryPoint`` can be passed as well. Each phase is measured in
+    ``instrumentation``, if given. Every file that is read is fingerprinted, the
+    included scripts and the dump file as well, and in incremental mode the
+    fingerprints are saved to the manifest of the run.
+    """
+    settings = settings or ParseSettings()
+    instrumentation = instrumentation or Instrumentation()
+
+    with instrumentation.phase('discovery') as record:
+        run_files, fingerprints, manifest, previous = discover_run(filepath, settings)
+        record['rows'] = len(fingerprints)
+
+    with instrumentation.phase('input_script') as record:
+        script = read_input_script(filepath)
+        fingerprints.update(fingerprint_files(script.includes, previous))
+        record['bytes'] = fingerprints[os.path.abspath(filepath)].size
+        record['rows'] = len(script.quantities) + len(script.fixes)
+
+    header, arrays = {}, {}
+    if run_files.system is not None:
+        with instrumentation.phase('system_file') as record:
+            header, arrays = read_system_file(
+                run_files.system, settings, fingerprints[run_files.system].sha256
+            )
+            record['bytes'] = fingerprints[run_files.system].size
+            record['rows'] = header.get('atoms', 0)
+
+    # parsed in parallel, kept in natural-sort order
+    with instrumentation.phase('theta_files') as record:
+        thetas = read_theta_arrays(
+            run_files.theta,
+            settings,
+            [fingerprints[path].sha256 for path in run_files.theta],
+            instrumentation,
+        )
+        record['bytes'] = sum(fingerprints[path].size for path in run_files.theta)
+        record['rows'] = sum(len(theta) for theta in thetas)
+
+    molecules = read_molecules(header, arrays, script, settings, instrumentation)
+    dump = read_run_dump(run_files.directory, script, settings, instrumentation)
+    if dump is not None:
+        path = os.path.join(run_files.directory, dump['path'])
+        fingerprints.update(fingerprint_files([path], previous))
+
+    with instrumentation.phase('statistics') as record:
+        theta_data = ThetaData(thetas)
+        if thetas:
+            plot = None
+            if settings.theta_plot_points:
+                plot = [
+                    downsample_theta(theta, settings.theta_plot_points)
+                    for theta in thetas
+                ]
+            theta_data = ThetaData(
+                thetas, theta_statistics(thetas), theta_ensemble(thetas), plot
+            )
+        record['rows'] = sum(len(theta) for theta in thetas)
+
+    masses = arrays.get('masses_value')
+    system = SystemData(
+        header,
+        arrays,
+        type_elements(masses) if masses is not None else None,
+        molecules,
+    )
+    if manifest is not None:
+        manifest.save(fingerprints)
+    return RunData(run_files, fingerprints, script, system, theta_data, dump)
@@ -0,0 +1,72 @@
+"""
+Discovery of the files belonging to a run.
+
+A run directory holds the ``in_electrooptics`` input script (the mainfile), one
+``system_electrooptics`` data file and a ``theta*`` file per trajectory. Only this
+directory is listed, nested directories are separate runs. The listing is cached per
+directory and modification time, so that several mainfiles of the same upload share
+one scan. Every name may carry a ``.gz``, ``.xz`` or ``.bz2`` suffix.
+"""
+
+import functools
+import os
+import re
+from typing import NamedTuple, Optional
+
+from electrooptics_parser.readers.compression import SUFFIX_RE
+
+INPUT_RE = re.compile(rf'^.*in_electrooptics\.lmp{SUFFIX_RE}$')
+SYSTEM_RE = re.compile(rf'^system_electrooptics(\.(data|lmp|txt))?{SUFFIX_RE}$')
+THETA_RE = re.compile(rf'^theta[_-]?\d*(\.(dat|txt|out))?{SUFFIX_RE}$')
+
+
+def natural_sort_key(name: str) -> list:
+    """Sorts ``theta2`` before ``theta10``."""
+    return [int(t) if t.isdigit() else t.lower() for t in re.split(r'(\d+)', name)]
+
+
+class RunFiles(NamedTuple):
+    directory: str
+    inputs: tuple[str, ...]
+    system: Optional[str]
+    theta: tuple[str, ...]
+
+
+@functools.lru_cache(maxsize=128)
+def _scan(directory: str, mtime_ns: int) -> RunFiles:
+    inputs, systems, theta = [], [], []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            if INPUT_RE.match(entry.name):
+                inputs.append(entry.name)
+            elif SYSTEM_RE.match(entry.name):
+                systems.append(entry.name)
+            elif THETA_RE.match(entry.name):
+                theta.append(entry.name)
+
+    def paths(names):
+        return tuple(
+            os.path.join(directory, name)
+            for name in sorted(names, key=natural_sort_key)
+        )
+
+    systems = paths(systems)
+    return RunFiles(
+        directory=directory,
+        inputs=paths(inputs),
+        system=systems[0] if systems else None,
+        theta=paths(theta),
+    )
+
+
+def scan_run_directory(directory) -> RunFiles:
+    """
+    Lists and classifies the run files in ``directory`` without opening them.
+
+    Files are matched by strict name patterns (``INPUT_RE``, ``SYSTEM_RE`` and
+    ``THETA_RE``), anything else in the directory is ignored.
+    """
+    directory = os.path.abspath(directory)
+    return _scan(directory, os.stat(directory).st_mtime_ns)
@@ -0,0 +1,62 @@
+"""
+Reader for the ``theta*`` files of a run, one file per trajectory.
+
+Every file holds a ``Time theta`` header followed by two columns. Large uploads
+contain hundreds of these files, so they can be read by a pool of worker processes.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from electrooptics_parser.readers.compression import open_file
+
+DEFAULT_PARALLEL_MIN_BYTES = 32 * 1024**2
+
+
+def read_theta_file(path) -> np.ndarray:
+    """
+    Reads a theta file into a ``(rows, 2)`` array of time and theta, decompressing
+    compressed files on the fly.
+    """
+    with open_file(path) as f:
+        return np.loadtxt(f, comments=('#', 'Time'), usecols=(0, 1), ndmin=2)
+
+
+def read_theta_file_timed(path) -> tuple[np.ndarray, float]:
+    """Reads a theta file and returns its array and the seconds spent reading."""
+    start = time.perf_counter()
+    theta = read_theta_file(path)
+    return theta, time.perf_counter() - start
+
+
+def read_theta_files(
+    paths: list,
+    workers: int = 0,
+    min_parallel_bytes: int = DEFAULT_PARALLEL_MIN_BYTES,
+    timed: bool = False,
+) -> list:
+    """
+    Reads all theta files and returns their arrays in the order of ``paths``, or
+    ``(array, seconds)`` pairs if ``timed``.
+
+    The files are read by ``workers`` processes (0 uses all CPUs). Uploads whose
+    theta files add up to less than ``min_parallel_bytes`` are read serially, as are
+    all files when running inside a daemonic process (e.g. a prefork worker), which
+    is not allowed to start children.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    read = read_theta_file_timed if timed else read_theta_file
+    if (
+        workers <= 1
+        or multiprocessing.current_process().daemon
+        or sum(os.path.getsize(path) for path in paths) < min_parallel_bytes
+    ):
+        return [read(path) for path in paths]
+
+    chunksize = max(1, len(paths) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(read, paths, chunksize=chunksize))
@@ -13,6 +13,7 @@ if TYPE_CHECKING:
 import numpy as np
 from nomad.config import config
 from nomad.datamodel.data import Schema
+from nomad.datamodel.hdf5 import HDF5Reference
 from nomad.metainfo import Quantity, SchemaPackage, Section, MSection, SubSection
 from runschema.run import Run
 from runschema.calculation import Calculation
@@ -24,45 +25,181 @@ configuration = config.get_plugin_entry_point(
 m_package = SchemaPackage()
 
 
-class ElectroopticsOutput(MSection):
+class ElectroopticsThetaStatistics(MSection):
+    m_def = Section(validate=False)
+    mean = Quantity(type=np.float64, description='mean of theta after equilibration.')
+    std = Quantity(type=np.float64, description='standard deviation of theta after equilibration.')
+    equilibration_time = Quantity(type=np.float64, description='estimated time until theta reaches equilibrium, in the units of the time column.')
+    autocorrelation_time = Quantity(type=np.float64, description='integrated autocorrelation time of theta after equilibration, in the units of the time column.')
+    final_value = Quantity(type=np.float64, description='last value of theta.')
+
+class ElectroopticsEnsembleStatistics(MSection):
     m_def = Section(validate=False)
-    theta = Quantity(type=np.float64, shape=[2, '*'], description="""Each repeating subsection corresponds to a different theta-file, each theta-file represents a different
-                                                                    trajectory. 1st row time, 2nd row is theta, which is the dot product between the electric field and 
+    n_trajectories = Quantity(type=int, description='no. of trajectories in the ensemble.')
+    mean = Quantity(type=np.float64, description='mean over the trajectories of the equilibrated theta mean.')
+    std = Quantity(type=np.float64, description='standard deviation over the trajectories of the equilibrated theta mean.')
+    final_value_mean = Quantity(type=np.float64, description='mean over the trajectories of the last value of theta.')
+    final_value_std = Quantity(type=np.float64, description='standard deviation over the trajectories of the last value of theta.')
+    equilibration_time = Quantity(type=np.float64, description='longest equilibration time of all trajectories.')
+    autocorrelation_time = Quantity(type=np.float64, description='mean autocorrelation time of the trajectories.')
+
+class ElectroopticsEnsemble(MSection):
+    m_def = Section(validate=False)
+    source_file = Quantity(type=str, shape=['*'], description='theta file of every trajectory, in the order of the rows of theta.')
+    time = Quantity(type=np.float64, shape=['*'], description='time axis shared by all trajectories, the sorted union of the times of the theta files.')
+    theta = Quantity(type=np.float64, shape=['*', '*'], description='theta of every trajectory (rows) at every time (columns), zero where mask is false. Not stored with child archives.')
+    mask = Quantity(type=np.bool_, shape=['*', '*'], description='whether the trajectory has a sample at the time, trajectories may differ in length. Not stored with child archives.')
+    theta_hdf5 = Quantity(type=HDF5Reference, description='theta in the HDF5 file of the run, if stored there.')
+    mask_hdf5 = Quantity(type=HDF5Reference, description='mask in the HDF5 file of the run, if stored there.')
+    n_samples = Quantity(type=np.int64, shape=['*'], description='no. of samples of every trajectory.')
+    mean = Quantity(type=np.float64, shape=['*'], description='mean of theta over the trajectories with a sample at every time.')
+    std = Quantity(type=np.float64, shape=['*'], description='standard deviation of theta over the trajectories with a sample at every time.')
+    n_contributing = Quantity(type=np.int64, shape=['*'], description='no. of trajectories with a sample at every time.')
+
+class ElectroopticsOutput(MSection):
+    m_def = Section(validate=False, a_plot=[{'label': 'theta', 'x': 'plot_time', 'y': 'plot_theta', 'layout': {'xaxis': {'title': 'time'}, 'yaxis': {'title': 'theta'}}}])
+    theta = Quantity(type=np.float64, shape=['*', 2], description="""Each repeating subsection corresponds to a different theta-file, each theta-file represents a different
+                                                                    trajectory. 1st column time, 2nd column is theta, which is the dot product between the electric field and 
                                                                     the alignment of the polymer chain.""")
+    theta_hdf5 = Quantity(type=HDF5Reference, description='theta in the HDF5 file of the run, if stored there.')
+    plot_time = Quantity(type=np.float64, shape=['*'], description='time of the samples of theta kept for plotting: the first and last sample and the minimum and maximum of evenly sized buckets.')
+    plot_theta = Quantity(type=np.float64, shape=['*'], description='theta downsampled for plotting, at plot_time.')
+    statistics = SubSection(sub_section=ElectroopticsThetaStatistics.m_def, repeats=False)
+
+class ElectroopticsDumpFrame(MSection):
+    m_def = Section(validate=False)
+    timestep = Quantity(type=np.int64, description='timestep of the frame.')
+    atoms_index = Quantity(type=np.int32, shape=['*'], description='atom IDs (id column).')
+    atoms_molecule = Quantity(type=np.int32, shape=['*'], description='molecule IDs of the atoms (mol column).')
+    atoms_type = Quantity(type=np.int32, shape=['*'], description='atom types (type column).')
+    atoms_position = Quantity(type=np.float64, shape=['*', 3], description='x, y, z coordinates of the atoms, scaled coordinates are converted to lengths.')
+
+class ElectroopticsDump(MSection):
+    m_def = Section(validate=False)
+    path = Quantity(type=str, description='path of the dump file relative to the run directory.')
+    columns = Quantity(type=str, shape=['*'], description='per-atom columns of the dump.')
+    n_frames = Quantity(type=int, description='no. of frames in the dump file.')
+    timestep = Quantity(type=np.int64, shape=['*'], description='timestep of every frame.')
+    n_atoms = Quantity(type=np.int64, shape=['*'], description='no. of atoms of every frame.')
+    box_lo = Quantity(type=np.float64, shape=['*', 3], description='lower box bounds of every frame, of the bounding box for triclinic boxes.')
+    box_hi = Quantity(type=np.float64, shape=['*', 3], description='upper box bounds of every frame, of the bounding box for triclinic boxes.')
+    summary_timestep = Quantity(type=np.int64, shape=['*'], description='timesteps of the evenly spaced frames with chain alignment summaries.')
+    mean_cos = Quantity(type=np.float64, shape=['*'], description='mean cosine between the end-to-end vectors of the chains and the electric field, per summary frame.')
+    p2 = Quantity(type=np.float64, shape=['*'], description='second Legendre polynomial order parameter of the chains with respect to the electric field, per summary frame.')
+    nematic_order = Quantity(type=np.float64, shape=['*'], description='largest eigenvalue of the Q tensor of the chain directions, independent of the field, per summary frame.')
+    frame = SubSection(sub_section=ElectroopticsDumpFrame.m_def, repeats=True)
 
 class ElectroopticsFix(MSection):
     m_def = Section(validate=False)
     value = Quantity(type=str, shape=['*'])
 
+class ElectroopticsMolecules(MSection):
+    m_def = Section(validate=False)
+    molecule_id = Quantity(type=np.int32, shape=['*'], description='sorted molecule IDs, the order of all other quantities.')
+    n_atoms = Quantity(type=np.int32, shape=['*'], description='no. of atoms of every molecule.')
+    n_bonds = Quantity(type=np.int32, shape=['*'], description='no. of bonds of every molecule.')
+    chain_length = Quantity(type=np.int32, shape=['*'], description='no. of bonds from the first chain end of every molecule to the atom farthest from it.')
+    net_charge = Quantity(type=np.float64, shape=['*'], description='net charge of every molecule in units of elementary charge e.')
+    center_of_mass = Quantity(type=np.float64, shape=['*', 3], description='center of mass of every molecule unwrapped across the periodic boundaries, in Angstrom.')
+    dipole_moment = Quantity(type=np.float64, shape=['*', 3], description='dipole moment of every molecule with respect to its center of mass, in e*Angstrom.')
+    end_to_end = Quantity(type=np.float64, shape=['*', 3], description='vector from the first chain end of every molecule to the atom farthest from it, in Angstrom.')
+    end_to_end_cos = Quantity(type=np.float64, shape=['*'], description='cosine between the end-to-end vector and the electric field, NaN for single atoms.')
+
+class ElectroopticsComposition(MSection):
+    m_def = Section(validate=False)
+    elements = Quantity(type=str, shape=['*'], description='chemical symbols of the elements in the system, in alphabetical order.')
+    element_count = Quantity(type=np.int64, shape=['*'], description='no. of atoms of each element.')
+    n_unassigned = Quantity(type=int, description='no. of atoms whose type has no mass or a mass of no element, e.g. united-atom types.')
+    total_mass = Quantity(type=np.float64, description='total mass of the atoms with known mass, in g/mol.')
+    net_charge = Quantity(type=np.float64, description='sum of the partial charges of all atoms in units of elementary charge e, zero for a charge-balanced system.')
+
 class ElectroopticsSystem(MSection):
     m_def = Section(validate=False)
-    atoms = Quantity(type=np.float64, description='no. of atoms in the system')
-    bonds = Quantity(type=np.float64, description='no. of bonds in the system')
-    angles = Quantity(type=np.float64, description='no. of angles in the system')
-    dihedrals = Quantity(type=np.float64, description='no. of dihedrals in the system')
-    impropers = Quantity(type=np.float64, description='no. of impropers in the system')
-    atom_types = Quantity(type=np.float64, description='no. of atom types in the system')
-    bond_types = Quantity(type=np.float64, description='no. of bond types in the system')
-    angle_types = Quantity(type=np.float64, description='no. angle types in the system')
-    dihedral_types = Quantity(type=np.float64, description='no. of dihedral types in the system')
-    improper_types = Quantity(type=np.float64, description='no. of improper types in the system')
-    atoms_values = Quantity(type=np.float64, shape=[7, '*'], description="""1st column is an index. 2nd column is the ID of molecule. 
-                                                                         3rd column is type of atom. 4th column is partial
-                                                                         charge in units of elementary charge e. Other columns are positions in Angstrom.""")
-    bonds_values = Quantity(type=np.float64, shape=[4, '*'], description="""1st column is index. 2nd column is type of bond. 3rd column is atom ID that are connected by this bond. 
+    atoms = Quantity(type=int, description='no. of atoms in the system')
+    bonds = Quantity(type=int, description='no. of bonds in the system')
+    angles = Quantity(type=int, description='no. of angles in the system')
+    dihedrals = Quantity(type=int, description='no. of dihedrals in the system')
+    impropers = Quantity(type=int, description='no. of impropers in the system')
+    atom_types = Quantity(type=int, description='no. of atom types in the system')
+    bond_types = Quantity(type=int, description='no. of bond types in the system')
+    angle_types = Quantity(type=int, description='no. angle types in the system')
+    dihedral_types = Quantity(type=int, description='no. of dihedral types in the system')
+    improper_types = Quantity(type=int, description='no. of improper types in the system')
+    masses_type = Quantity(type=np.int32, shape=['*'], description='atom types of the Masses section.')
+    masses_value = Quantity(type=np.float64, shape=['*'], description='mass of each atom type in g/mol.')
+    masses_element = Quantity(type=str, shape=['*'], description='element of each atom type, assigned by its mass, empty if no element matches.')
+    atoms_index = Quantity(type=np.int32, shape=['*'], description='ID of each atom.')
+    atoms_molecule = Quantity(type=np.int32, shape=['*'], description='ID of the molecule each atom belongs to.')
+    atoms_type = Quantity(type=np.int32, shape=['*'], description='type of each atom.')
+    atoms_charge = Quantity(type=np.float64, shape=['*'], description='partial charge of each atom in units of elementary charge e.')
+    atoms_position = Quantity(type=np.float64, shape=['*', 3], description='position of each atom in Angstrom.')
+    atoms_values = Quantity(type=np.float64, shape=['*', 7], description="""Deprecated, only kept to read archives written before the atoms were split into
+                                                                         atoms_index, atoms_molecule, atoms_type, atoms_charge and atoms_position.
+                                                                         Use upgrade_legacy_layout to convert it.""")
+    bonds_values = Quantity(type=np.int32, shape=['*', 4], description="""1st column is index. 2nd column is type of bond. 3rd column is atom ID that are connected by this bond. 
                                                                          4th column is atom ID but for the second atom.""")
-    angles_values = Quantity(type=np.float64, shape=[5, '*'], description="""1st column is an index. 2nd column is the type. Other columns are angles.
+    angles_values = Quantity(type=np.int32, shape=['*', 5], description="""1st column is an index. 2nd column is the type. Other columns are the IDs of the 3 atoms forming the angle.
                                                                           """)
-    dihedrals_values = Quantity(type=np.float64, shape=['*', 6], description="""1st column is index, 2nd column is type. Other 4 columns are dihedrals formed by these 4 atoms.
+    dihedrals_values = Quantity(type=np.int32, shape=['*', 6], description="""1st column is index, 2nd column is type. Other 4 columns are dihedrals formed by these 4 atoms.
                                                                              """)
-    impropers_values = Quantity(type=np.float64, shape=['*', 6], description="""1st column is an index, 2nd column is type. Other 4 columns are Impropers formed by these 4 atoms.
+    impropers_values = Quantity(type=np.int32, shape=['*', 6], description="""1st column is an index, 2nd column is type. Other 4 columns are Impropers formed by these 4 atoms.
                                                                              """)
+    atoms_index_hdf5 = Quantity(type=HDF5Reference, description='atoms_index in the HDF5 file of the run, if stored there.')
+    atoms_molecule_hdf5 = Quantity(type=HDF5Reference, description='atoms_molecule in the HDF5 file of the run, if stored there.')
+    atoms_type_hdf5 = Quantity(type=HDF5Reference, description='atoms_type in the HDF5 file of the run, if stored there.')
+    atoms_charge_hdf5 = Quantity(type=HDF5Reference, description='atoms_charge in the HDF5 file of the run, if stored there.')
+    atoms_position_hdf5 = Quantity(type=HDF5Reference, description='atoms_position in the HDF5 file of the run, if stored there.')
+    bonds_values_hdf5 = Quantity(type=HDF5Reference, description='bonds_values in the HDF5 file of the run, if stored there.')
+    angles_values_hdf5 = Quantity(type=HDF5Reference, description='angles_values in the HDF5 file of the run, if stored there.')
+    dihedrals_values_hdf5 = Quantity(type=HDF5Reference, description='dihedrals_values in the HDF5 file of the run, if stored there.')
+    impropers_values_hdf5 = Quantity(type=HDF5Reference, description='impropers_values in the HDF5 file of the run, if stored there.')
     xlo = Quantity(type=np.float64, description='lower value of sample in x-direction, in Angstrom.')
     xhi = Quantity(type=np.float64, description='higher value of sample in x-direction, in Angstrom.')
     ylo = Quantity(type=np.float64, description='lower value of sample in y-direction, in Angstrom.')
     yhi = Quantity(type=np.float64, description='higher value of sample in y-direction, in Angstrom.')
     zlo = Quantity(type=np.float64, description='lower value of sample in z-direction, in Angstrom.')
     zhi = Quantity(type=np.float64, description='higher value of sample in z-direction, in Angstrom.')
+    molecules = SubSection(sub_section=ElectroopticsMolecules.m_def, repeats=False)
+    composition = SubSection(sub_section=ElectroopticsComposition.m_def, repeats=False)
+
+    def upgrade_legacy_layout(self) -> None:
+        """
+        Converts a section read from an archive written in the old layout, where all
+        topology was stored as np.float64 (``atoms_values`` with all 7 columns, some
+        arrays transposed), to the current int32/float64 quantities.
+        """
+        atoms = self.atoms_values
+        if atoms is not None:
+            atoms = np.asarray(atoms, dtype=np.float64)
+            columns = ElectroopticsSystem.atoms_values.shape[1]
+            if atoms.shape[0] == columns and atoms.shape[-1] != columns:
+                atoms = atoms.T
+            self.atoms_index = atoms[:, 0].astype(np.int32)
+            self.atoms_molecule = atoms[:, 1].astype(np.int32)
+            self.atoms_type = atoms[:, 2].astype(np.int32)
+            self.atoms_charge = np.ascontiguousarray(atoms[:, 3])
+            self.atoms_position = np.ascontiguousarray(atoms[:, 4:7])
+            self.atoms_values = None
+
+        for quantity in (
+            ElectroopticsSystem.bonds_values,
+            ElectroopticsSystem.angles_values,
+            ElectroopticsSystem.dihedrals_values,
+            ElectroopticsSystem.impropers_values,
+        ):
+            values = self.m_get(quantity)
+            if values is None:
+                continue
+            values = np.asarray(values)
+            columns = quantity.shape[1]
+            if (
+                values.ndim == len(quantity.shape)
+                and values.shape[0] == columns != values.shape[1]
+            ):
+                values = values.T
+            self.m_set(quantity, np.ascontiguousarray(values, dtype=np.int32))
+
+
 class ElectroopticsInput(MSection):
     m_def = Section(validate=False)
     e_field = Quantity(type=np.float64, description='electric field in V/Ang')
@@ -89,13 +226,43 @@ class ElectroopticsInput(MSection):
     dump_modify = Quantity(type=str, shape=['*'])
     
     fix = SubSection(sub_section=ElectroopticsFix.m_def, repeats=True)
+class ElectroopticsSourceFile(MSection):
+    m_def = Section(validate=False)
+    path = Quantity(type=str, description='path of the file relative to the run directory.')
+    size = Quantity(type=np.int64, description='size of the file in bytes.')
+    mtime_ns = Quantity(type=np.int64, description='modification time of the file in nanoseconds since the epoch.')
+    sha256 = Quantity(type=str, description='sha256 hash of the file content.')
+
 class ElectroopticsCalculation(Calculation):
     
-    m_def = Section(validate=False, extends_base_section=False)    
+    m_def = Section(validate=False, extends_base_section=False, a_plot=[{'label': 'theta of all trajectories', 'x': 'electrooptics_output/:/plot_time', 'y': 'electrooptics_output/:/plot_theta', 'layout': {'xaxis': {'title': 'time'}, 'yaxis': {'title': 'theta'}}}])
     
     
     electrooptics_input = SubSection(sub_section=ElectroopticsInput.m_def, repeats=False)
     electrooptics_system = SubSection(sub_section=ElectroopticsSystem.m_def, repeats=False)
     electrooptics_output = SubSection(sub_section=ElectroopticsOutput.m_def, repeats=True)
+    electrooptics_dump = SubSection(sub_section=ElectroopticsDump.m_def, repeats=False)
+    electrooptics_ensemble = SubSection(sub_section=ElectroopticsEnsemble.m_def, repeats=False)
+    electrooptics_ensemble_statistics = SubSection(sub_section=ElectroopticsEnsembleStatistics.m_def, repeats=False)
+    source_file = SubSection(sub_section=ElectroopticsSourceFile.m_def, repeats=True)
+    parent_input = Quantity(type=ElectroopticsInput, description='input of the parent run, only set in the child entry of a single trajectory.')
+    parent_system = Quantity(type=ElectroopticsSystem, description='system of the parent run, only set in the child entry of a single trajectory.')
+
+class ElectroopticsEntry(Schema):
+    m_def = Section(validate=False, label='Electrooptics run', description='scalars of the run promoted to the entry data, where they are indexed as search quantities.')
+    e_field = Quantity(type=np.float64, description='electric field in V/Ang.')
+    temperature = Quantity(type=np.float64, unit='kelvin', description='temperature of the run.')
+    n_atoms = Quantity(type=int, description='no. of atoms in the system.')
+    n_bonds = Quantity(type=int, description='no. of bonds in the system.')
+    n_molecules = Quantity(type=int, description='no. of molecules in the system.')
+    box_volume = Quantity(type=np.float64, unit='angstrom**3', description='volume of the simulation box.')
+    n_trajectories = Quantity(type=int, description='no. of theta trajectories of the entry.')
+    theta_mean = Quantity(type=np.float64, description='mean of the equilibrated theta, over all trajectories of the entry.')
+    theta_std = Quantity(type=np.float64, description='standard deviation of the equilibrated theta, over the trajectories of a run or in time for a single trajectory.')
+    theta_final_value = Quantity(type=np.float64, description='last value of theta, averaged over the trajectories of the entry.')
+    equilibration_time = Quantity(type=np.float64, description='longest equilibration time of the trajectories of the entry, in the units of the time column.')
+    mean_cos = Quantity(type=np.float64, description='mean cosine between the end-to-end vectors of the chains and the electric field in the last summary frame of the dump.')
+    nematic_order = Quantity(type=np.float64, description='nematic order parameter of the chains in the last summary frame of the dump.')
+    end_to_end_cos = Quantity(type=np.float64, description='mean cosine between the end-to-end vectors of the molecules of the data file and the electric field.')
 
 m_package.__init_metainfo__()
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from electrooptics_parser.analysis.chains import chain_alignment, end_to_end_vectors
+
+
+def test_end_to_end_vectors():
+    # molecule 7 crosses the periodic boundary in z, atoms are not sorted by id
+    ids = np.array([4, 1, 2, 3, 5, 6, 8])
+    molecules = np.array([7, 3, 3, 7, 7, 9, 7])
+    positions = np.array(
+        [
+            [0.0, 0.0, 1.0],
+            [1.0, 1.0, 1.0],
+            [2.0, 1.0, 1.0],
+            [0.0, 0.0, 9.0],
+            [0.0, 0.0, 3.0],
+            [5.0, 5.0, 5.0],
+            [0.0, 0.0, 4.0],
+        ]
+    )
+
+    vectors = end_to_end_vectors(ids, molecules, positions, np.array([10.0] * 3))
+
+    np.testing.assert_allclose(vectors, [[1, 0, 0], [0, 0, 5], [0, 0, 0]])
+
+
+def test_chain_alignment():
+    vectors = np.array([[0.0, 0.0, 2.0], [0.0, 0.0, -1.0], [3.0, 0.0, 0.0], [0, 0, 0]])
+
+    alignment = chain_alignment(vectors)
+
+    assert alignment['mean_cos'] == pytest.approx(0.0)
+    assert alignment['p2'] == pytest.approx(0.5)
+    assert alignment['nematic_order'] == pytest.approx(0.5)
+    assert chain_alignment(vectors, [1.0, 0.0, 0.0])['p2'] == pytest.approx(0.0)
+    assert np.isnan(chain_alignment(np.zeros((0, 3)))['mean_cos'])
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from electrooptics_parser.analysis.composition import composition, type_elements
+
+
+def test_type_elements():
+    # rounded carbon, hydrogen, a united-atom CH2 and chlorine
+    elements = type_elements(np.array([12.0, 1.00794, 14.027, 35.453]))
+
+    assert elements.tolist() == ['C', 'H', '', 'Cl']
+    # masses rounded to one decimal
+    elements = type_elements(np.array([35.5, 32.1, 14.0, 16.0, 39.1, 39.9]))
+
+    assert elements.tolist() == ['Cl', 'S', 'N', 'O', 'K', 'Ar']
+
+
+def test_composition():
+    atoms_type = np.array([1, 1, 2, 3, 3, 3, 4], dtype=np.int32)
+    atoms_charge = np.array([0.5, 0.5, -1.0, 0.1, 0.1, 0.1, 0.0])
+
+    result = composition(
+        atoms_type,
+        atoms_charge,
+        np.array([1, 2, 3], dtype=np.int32),
+        np.array([12.011, 15.999, 12.0]),
+    )
+
+    assert result['elements'] == ['C', 'O']
+    np.testing.assert_array_equal(result['element_count'], [5, 1])
+    # type 4 has no mass
+    assert result['n_unassigned'] == 1
+    assert result['total_mass'] == pytest.approx(2 * 12.011 + 15.999 + 3 * 12.0)
+    assert result['net_charge'] == pytest.approx(0.3)
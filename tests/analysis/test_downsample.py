@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from electrooptics_parser.analysis.downsample import downsample_theta, minmax_indices
+
+
+def test_minmax_indices():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=10_001)
+    values[1234] = 10.0
+    values[5678] = -10.0
+
+    indices = minmax_indices(values, 100)
+
+    assert len(indices) <= 100
+    assert np.all(np.diff(indices) > 0)
+    assert indices[0] == 0
+    assert indices[-1] == len(values) - 1
+    # the extrema survive
+    assert {1234, 5678} <= set(indices.tolist())
+    np.testing.assert_array_equal(minmax_indices(values[:50], 100), np.arange(50))
+    with pytest.raises(ValueError):
+        minmax_indices(values, 3)
+
+
+def test_downsample_theta():
+    time = np.arange(1000.0)
+    theta = np.column_stack([time, np.sin(time / 50)])
+
+    plot = downsample_theta(theta, 60)
+
+    assert plot.shape[0] <= 60
+    np.testing.assert_array_equal(plot[[0, -1]], theta[[0, -1]])
+    assert plot[:, 1].max() == theta[:, 1].max()
+    assert plot[:, 1].min() == theta[:, 1].min()
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from electrooptics_parser.analysis.order_parameter import (
+    ensemble_statistics,
+    theta_ensemble,
+    theta_statistics,
+)
+
+
+def test_theta_statistics():
+    rng = np.random.default_rng(0)
+    time = np.arange(4000.0)
+    # AR(1) noise, whose integrated autocorrelation time is (1 + phi) / (1 - phi) / 2
+    phi = 0.8
+    noise = np.zeros(time.size)
+    for index in range(1, time.size):
+        noise[index] = phi * noise[index - 1] + rng.normal()
+    theta = 0.5 + 0.01 * noise
+    theta[:400] = np.linspace(0.0, 0.5, 400)
+    short = np.array([[0.0, 0.1], [2.0, 0.3]])
+
+    statistics = theta_statistics(
+        [np.column_stack([time, theta]), short, np.column_stack([time, theta])[:10]]
+    )
+
+    assert statistics['mean'][0] == pytest.approx(0.5, abs=0.01)
+    assert 300 < statistics['equilibration_time'][0] <= 400
+    assert statistics['autocorrelation_time'][0] == pytest.approx(4.5, rel=0.3)
+    assert statistics['final_value'][1] == 0.3
+    assert statistics['final_value'][2] == theta[9]
+
+
+def test_empty_trajectory():
+    thetas = [np.array([[0.0, 0.2], [1.0, 0.4]]), np.empty((0, 2))]
+
+    statistics = theta_statistics(thetas)
+    ensemble = ensemble_statistics(statistics)
+
+    assert all(np.isnan(values[1]) for values in statistics.values())
+    assert ensemble['n_trajectories'] == 2
+    assert ensemble['final_value_mean'] == 0.4
+    assert ensemble['final_value_std'] == 0.0
+    assert np.isnan(ensemble_statistics(theta_statistics(thetas[1:]))['mean'])
+
+
+def test_theta_ensemble():
+    # the second trajectory is shorter and sampled every other time
+    thetas = [
+        np.array([[0.0, 1.0], [1.0, 2.0], [2.0, 3.0], [3.0, 4.0]]),
+        np.array([[0.0, 3.0], [2.0, 5.0]]),
+    ]
+
+    ensemble = theta_ensemble(thetas)
+
+    np.testing.assert_array_equal(ensemble['time'], [0, 1, 2, 3])
+    np.testing.assert_array_equal(ensemble['theta'][1], [3, 0, 5, 0])
+    np.testing.assert_array_equal(ensemble['mask'][1], [True, False, True, False])
+    np.testing.assert_array_equal(ensemble['n_samples'], [4, 2])
+    np.testing.assert_array_equal(ensemble['n_contributing'], [2, 1, 2, 1])
+    np.testing.assert_allclose(ensemble['mean'], [2, 2, 4, 4])
+    np.testing.assert_allclose(ensemble['std'], [1, 0, 1, 0])
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from electrooptics_parser.analysis.topology import (
+    bond_graph,
+    connected_components,
+    molecule_descriptors,
+    unwrap_molecules,
+)
+
+
+def test_bond_graph():
+    ids = np.array([10, 30, 20, 40])
+    bonds = np.array([[1, 1, 10, 20], [2, 1, 20, 30]])
+
+    graph = bond_graph(ids, bonds)
+
+    np.testing.assert_array_equal(graph.degree, [1, 1, 2, 0])
+    np.testing.assert_array_equal(
+        np.sort(graph.indices[graph.indptr[2] : graph.indptr[3]]), [0, 1]
+    )
+    with pytest.raises(ValueError):
+        bond_graph(ids, np.array([[1, 1, 10, 50]]))
+
+
+def test_unwrap_fragments():
+    # a chain 2-6-4, a ring 5-3-7 and the unbonded atom 1, all of one molecule
+    ids = np.array([6, 3, 7, 2, 5, 1, 4])
+    bonds = np.array(
+        [[1, 1, 2, 6], [2, 1, 6, 4], [3, 1, 5, 3], [4, 1, 3, 7], [5, 1, 7, 5]]
+    )
+    positions = np.zeros((7, 3))
+    positions[:, 2] = [9.5, 0.0, 0.0, 8.5, 0.0, 0.0, 0.5]
+
+    graph = bond_graph(ids, bonds)
+    unwrapped, distance, root = unwrap_molecules(graph, ids, positions, np.ones(3) * 10)
+
+    np.testing.assert_array_equal(connected_components(graph), [0, 1, 1, 0, 1, 5, 0])
+    np.testing.assert_array_equal(ids[root], [2, 3, 3, 2, 3, 1, 2])
+    np.testing.assert_array_equal(distance, [1, 0, 1, 0, 1, 0, 2])
+    np.testing.assert_allclose(unwrapped[[3, 0, 6], 2], [8.5, 9.5, 10.5])
+
+
+def test_molecule_descriptors():
+    # a chain of molecule 5 wrapped across z, listed out of order, a branched
+    # molecule 2 and a single ion
+    arrays = {
+        'atoms_index': np.array([3, 1, 2, 4, 5, 6, 7, 8]),
+        'atoms_molecule': np.array([5, 5, 5, 2, 2, 2, 2, 9]),
+        'atoms_charge': np.array([0.5, -0.5, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0]),
+        'atoms_position': np.array(
+            [
+                [0.0, 0.0, 1.0],
+                [0.0, 0.0, 8.0],
+                [0.0, 0.0, 9.5],
+                [1.0, 1.0, 1.0],
+                [2.0, 1.0, 1.0],
+                [3.0, 1.0, 1.0],
+                [2.0, 2.0, 1.0],
+                [5.0, 5.0, 5.0],
+            ]
+        ),
+        'bonds_values': np.array(
+            [[1, 1, 1, 2], [2, 1, 2, 3], [3, 1, 4, 5], [4, 1, 5, 6], [5, 1, 5, 7]]
+        ),
+    }
+
+    molecules = molecule_descriptors(arrays, np.array([10.0] * 3))
+
+    np.testing.assert_array_equal(molecules['molecule_id'], [2, 5, 9])
+    np.testing.assert_array_equal(molecules['n_atoms'], [4, 3, 1])
+    np.testing.assert_array_equal(molecules['n_bonds'], [3, 2, 0])
+    np.testing.assert_array_equal(molecules['chain_length'], [2, 2, 0])
+    np.testing.assert_allclose(molecules['net_charge'], [0, 0, 1])
+    np.testing.assert_allclose(molecules['end_to_end'], [[2, 0, 0], [0, 0, 3], [0] * 3])
+    np.testing.assert_allclose(molecules['center_of_mass'][1], [0, 0, 9.5])
+    np.testing.assert_allclose(molecules['dipole_moment'][1], [0, 0, 1.5])
+    np.testing.assert_allclose(molecules['end_to_end_cos'][:2], [0, 1])
+    assert np.isnan(molecules['end_to_end_cos'][2])
@@ -1,5 +1,26 @@
+from electrooptics_parser.apps import SCHEMA, app_entry_point
+from electrooptics_parser.schema_packages.schema_package import ElectroopticsEntry
+
+
 def test_importing_app():
-    # this will raise an exception if pydantic model validation fails for th app
-    from electrooptics_parser.apps import app_entry_point
+    # importing the module raises an exception if pydantic model validation fails
+    # for the app
+    assert app_entry_point.app.label == 'Electrooptics'
+
+
+def test_app_search_quantities():
+    def search_quantities(item):
+        if hasattr(item, 'items'):
+            for child in item.items:
+                yield from search_quantities(child)
+        elif hasattr(item, 'x'):
+            yield item.x.search_quantity
 
-    assert app_entry_point.app.label == 'NewApp'
+    quantities = [column.search_quantity for column in app_entry_point.app.columns]
+    quantities += search_quantities(app_entry_point.app.menu)
+    names = [
+        quantity.split('#')[0].removeprefix('data.')
+        for quantity in quantities
+        if quantity.endswith(f'#{SCHEMA}')
+    ]
+    assert set(names) == set(ElectroopticsEntry.m_def.all_quantities)
@@ -0,0 +1,68 @@
+import logging
+import os
+from pathlib import Path
+
+import pytest
+from nomad.datamodel import EntryArchive
+
+from electrooptics_parser.benchmarks.suite import (
+    benchmark_scenario,
+    check_budget,
+    load_baselines,
+)
+from electrooptics_parser.benchmarks.synthetic import SCENARIOS, Scenario, write_run
+from electrooptics_parser.parsers.parser import NewParser
+
+BASELINES = Path(__file__).parent / 'baselines.json'
+
+# e.g. ELECTROOPTICS_BENCHMARK=tiny,medium or =all
+BENCHMARK = os.environ.get('ELECTROOPTICS_BENCHMARK', '')
+
+
+def test_write_run(tmp_path):
+    mainfile = write_run(tmp_path, Scenario(1000, 3, n_times=50, chain_length=10))
+    archive = EntryArchive()
+    NewParser().parse(mainfile, archive, logging.getLogger())
+
+    calculation = archive.run[0].calculation[0]
+    assert calculation.temperature.magnitude == 300.0
+    assert calculation.electrooptics_input.e_field == 0.05
+    system = calculation.electrooptics_system
+    assert system.atoms == 1000
+    assert system.bonds == 900
+    assert system.impropers == 100
+    assert system.atoms_position.shape == (1000, 3)
+    assert system.dihedrals_values.shape == (700, 6)
+    assert set(system.atoms_molecule) == set(range(1, 101))
+    assert len(calculation.electrooptics_output) == 3
+    assert calculation.electrooptics_ensemble.theta.shape == (3, 50)
+    dump = calculation.electrooptics_dump
+    assert dump.n_frames == 10
+    assert dump.frame[0].atoms_position.shape == (1000, 3)
+    # the chains are poled along z over the trajectory
+    assert dump.mean_cos[-1] > dump.mean_cos[0] + 0.1
+
+
+def test_check_budget():
+    baselines = {
+        'parse': {'wall_time': 1.0, 'peak_memory': 100 * 1024**2},
+        'discover': {'wall_time': 0.001},
+    }
+    results = {
+        'parse': {'wall_time': 1.6, 'peak_memory': 120 * 1024**2},
+        'discover': {'wall_time': 0.01, 'peak_memory': 0},
+        'statistics': {'wall_time': 5.0, 'peak_memory': 0},
+    }
+    assert check_budget(results, baselines) == [
+        'parse: wall_time 1.6 exceeds budget 1.5 (baseline 1)'
+    ]
+    assert check_budget(results, baselines, tolerance=2.0) == []
+
+
+@pytest.mark.skipif(not BENCHMARK, reason='set ELECTROOPTICS_BENCHMARK to run')
+@pytest.mark.parametrize('scenario', sorted(load_baselines(BASELINES)))
+def test_benchmark(scenario):
+    if BENCHMARK != 'all' and scenario not in BENCHMARK.split(','):
+        pytest.skip(f'{scenario} not selected')
+    results = benchmark_scenario(SCENARIOS[scenario], repeat=3)
+    assert check_budget(results, load_baselines(BASELINES)[scenario]) == []
@@ -1,4 +1,4 @@
-from nomad.client import normalize_all
+from nomad.client import normalize_all, parse
 from nomad.datamodel import EntryArchive, EntryMetadata
 from nomad.datamodel.metainfo.workflow import Workflow
 
@@ -10,3 +10,40 @@ def test_normalizer():
     normalize_all(entry_archive)
 
     assert entry_archive.workflow2.name == 'test'
+
+
+def test_normalizer_composition():
+    entry_archive = parse('tests/data/electrooptics/in_electrooptics.lmp')[0]
+    normalize_all(entry_archive)
+
+    system = entry_archive.run[0].calculation[0].electrooptics_system
+    assert system.composition.elements == ['C', 'O']
+    assert system.composition.element_count.tolist() == [6, 2]
+    assert system.composition.net_charge == 0
+    material = entry_archive.results.material
+    assert material.elements == ['C', 'O']
+    assert material.chemical_formula_hill == 'C6O2'
+    assert material.chemical_formula_reduced == 'C3O'
+
+
+def test_normalizer_search_entry():
+    entry_archive = parse('tests/data/electrooptics/in_electrooptics.lmp')[0]
+    normalize_all(entry_archive)
+
+    entry = entry_archive.data
+    assert entry.e_field == 0.05
+    assert entry.temperature.to('K').magnitude == 300
+    assert (entry.n_atoms, entry.n_bonds, entry.n_molecules) == (8, 6, 2)
+    assert entry.box_volume.magnitude == 8000
+    assert entry.n_trajectories == 3
+    statistics = entry_archive.run[0].calculation[0].electrooptics_ensemble_statistics
+    assert entry.theta_mean == statistics.mean
+    assert entry.nematic_order == 1
+
+    entry_archive.metadata.apply_archive_metadata(entry_archive)
+    search_quantities = {
+        quantity.id.split('#')[0]: quantity
+        for quantity in entry_archive.metadata.search_quantities
+    }
+    assert search_quantities['data.e_field'].float_value == 0.05
+    assert search_quantities['data.n_atoms'].int_value == 8
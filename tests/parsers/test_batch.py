@@ -0,0 +1,92 @@
+import json
+import os
+import shutil
+
+import msgpack
+
+from electrooptics_parser.cli import main
+from electrooptics_parser.parsers.batch import (
+    RunResult,
+    find_runs,
+    parse_campaign,
+    run_tasks,
+)
+
+
+def campaign(root):
+    for name in ('field_1', 'field_2/repeat'):
+        shutil.copytree('tests/data/electrooptics', root / name)
+    # a data file declaring more atoms than it holds
+    broken = root / 'broken'
+    shutil.copytree('tests/data/electrooptics', broken)
+    data = broken / 'system_electrooptics.data'
+    data.write_text(data.read_text().replace('8 atoms', '9 atoms'))
+
+
+def test_parse_campaign(tmp_path):
+    campaign(tmp_path / 'runs')
+    output = tmp_path / 'archives'
+
+    assert [path.split('runs/')[1] for path in find_runs(tmp_path / 'runs')] == [
+        'broken/in_electrooptics.lmp',
+        'field_1/in_electrooptics.lmp',
+        'field_2/repeat/in_electrooptics.lmp',
+    ]
+    results = parse_campaign(tmp_path / 'runs', output, workers=1)
+
+    assert [result.status for result in results] == ['failed', 'parsed', 'parsed']
+    assert 'Expected 9 rows' in results[0].error
+    with open(output / 'field_2/repeat/in_electrooptics.lmp.archive.json') as f:
+        archive = json.load(f)
+    system = archive['run'][0]['calculation'][0]['electrooptics_system']
+    assert system['atoms'] == 8
+    with open(output / 'batch_report.json') as f:
+        report = json.load(f)
+    assert report['summary']['parsed'] == 2
+    assert report['summary']['failed'] == 1
+
+    # resumed, only the failed run is parsed again
+    results = parse_campaign(tmp_path / 'runs', output, workers=1)
+    assert [result.status for result in results] == ['skipped', 'skipped', 'failed']
+
+
+def test_main(tmp_path):
+    campaign(tmp_path / 'runs')
+    output = tmp_path / 'archives'
+
+    code = main(
+        ['parse', str(tmp_path / 'runs'), str(output), '--workers', '2']
+        + ['--format', 'msgpack']
+    )
+
+    assert code == 1
+    with open(output / 'field_1/in_electrooptics.lmp.archive.msg', 'rb') as f:
+        archive = msgpack.unpackb(f.read())
+    assert len(archive['run'][0]['calculation'][0]['electrooptics_output']) == 3
+
+
+def crash(mainfile, output):
+    # a worker killed while parsing, e.g. for running out of memory
+    if mainfile == 'crash':
+        os._exit(1)
+    return RunResult(mainfile, output, 'parsed')
+
+
+def test_run_tasks_worker_crash():
+    tasks = {mainfile: ('output',) for mainfile in ('a', 'crash', 'b', 'c', 'd')}
+    results = []
+
+    run_tasks(crash, tasks, 2, results, len(tasks))
+
+    statuses = {result.mainfile: result.status for result in results}
+    assert statuses == {
+        'a': 'parsed',
+        'b': 'parsed',
+        'c': 'parsed',
+        'd': 'parsed',
+        'crash': 'failed',
+    }
+    assert len(results) == len(tasks)
+    failed = next(result for result in results if result.status == 'failed')
+    assert failed.output == 'output'
+    assert 'BrokenProcessPool' in failed.error
@@ -0,0 +1,79 @@
+import shutil
+
+import numpy as np
+import pytest
+
+from electrooptics_parser.cli import main
+from electrooptics_parser.parsers import export
+from electrooptics_parser.parsers.export import export_campaign, read_table
+from tests.parsers.test_batch import campaign
+
+
+def test_export_campaign(tmp_path):
+    campaign(tmp_path / 'runs')
+    output = tmp_path / 'tables'
+
+    results = export_campaign(tmp_path / 'runs', output, workers=1)
+
+    assert [result.status for result in results] == ['failed', 'parsed', 'parsed']
+    assert not (output / 'runs/run=broken%2Fin_electrooptics.lmp').exists()
+    runs = read_table(output, 'runs')
+    assert runs['run'].tolist() == [
+        'field_1%2Fin_electrooptics.lmp',
+        'field_2%2Frepeat%2Fin_electrooptics.lmp',
+    ]
+    assert runs['atoms'].tolist() == [8, 8]
+    assert runs['n_trajectories'].tolist() == [3, 3]
+    atoms = read_table(output, 'atoms')
+    assert atoms['position'].shape == (16, 3)
+    assert np.array_equal(atoms['index'][:8], atoms['index'][8:])
+    bonds = read_table(output, 'bonds')
+    assert set(bonds) == {'index', 'type', 'atom_1', 'atom_2', 'run'}
+    trajectories = read_table(output, 'trajectories')
+    assert trajectories['n_samples'].tolist() == [6] * 6
+    theta = read_table(output, 'theta')
+    assert len(theta['theta']) == 2 * 18
+    assert theta['trajectory'].max() == 2
+
+    # resumed, only the failed run is exported again
+    results = export_campaign(tmp_path / 'runs', output, workers=1)
+    assert [result.status for result in results] == ['skipped', 'skipped', 'failed']
+
+
+def test_export_campaign_shared_directory(tmp_path):
+    # two runs whose input scripts share the directory
+    shutil.copytree('tests/data/electrooptics', tmp_path / 'runs')
+    shutil.copy(
+        tmp_path / 'runs/in_electrooptics.lmp', tmp_path / 'runs/2_in_electrooptics.lmp'
+    )
+    output = tmp_path / 'tables'
+
+    export_campaign(tmp_path / 'runs', output, workers=1)
+    results = export_campaign(tmp_path / 'runs', output, workers=1)
+
+    assert [result.status for result in results] == ['skipped', 'skipped']
+    runs = read_table(output, 'runs')
+    assert runs['run'].tolist() == ['2_in_electrooptics.lmp', 'in_electrooptics.lmp']
+
+
+def test_export_parquet(tmp_path, monkeypatch):
+    campaign(tmp_path / 'runs')
+    monkeypatch.setattr(export, 'pa', None)
+
+    results = export_campaign(
+        tmp_path / 'runs', tmp_path / 'tables', workers=1, table_format='parquet'
+    )
+
+    assert all(result.status == 'failed' for result in results)
+    assert 'requires pyarrow' in results[1].error
+
+
+def test_main_export(tmp_path):
+    pytest.importorskip('pyarrow')
+    campaign(tmp_path / 'runs')
+    output = tmp_path / 'tables'
+
+    code = main(['export', str(tmp_path / 'runs'), str(output), '--format', 'parquet'])
+
+    assert code == 1
+    assert (output / 'theta/run=field_1%2Fin_electrooptics.lmp/part-0.parquet').exists()
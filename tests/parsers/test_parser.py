@@ -1,8 +1,22 @@
+import bz2
+import gzip
 import logging
+import os
+import shutil
+from pathlib import Path
 
-from nomad.datamodel import EntryArchive
+import numpy as np
+import pytest
+from nomad.datamodel import EntryArchive, EntryMetadata
 
-from electrooptics_parser.parsers.parser import NewParser
+from electrooptics_parser.parsers import parser_entry_point
+from electrooptics_parser.parsers.parser import (
+    DetailedParser,
+    NewParser,
+    configuration,
+)
+from electrooptics_parser.readers import theta
+from electrooptics_parser.readers.hdf5 import read_rows
 
 
 def test_parse_file():
@@ -11,3 +25,273 @@ def test_parse_file():
     parser.parse('tests/data/example.out', archive, logging.getLogger())
 
     assert archive.workflow2.name == 'test'
+
+
+def test_parse_run():
+    parser = NewParser()
+    archive = EntryArchive()
+    parser.parse(
+        'tests/data/electrooptics/in_electrooptics.lmp', archive, logging.getLogger()
+    )
+
+    electrooptics_input = archive.run[0].calculation[0].electrooptics_input
+    assert electrooptics_input.e_field == 0.05
+    assert electrooptics_input.dump_modify == ['1', 'sort', 'id']
+    assert len(electrooptics_input.fix) == 3
+
+    system = archive.run[0].calculation[0].electrooptics_system
+    assert system.atoms == 8
+    assert system.zhi == 20
+    assert system.atoms_position.shape == (8, 3)
+    assert system.atoms_position[4, 2] == 4.0
+    assert system.atoms_molecule.dtype == np.int32
+    assert system.atoms_molecule[4] == 2
+    assert system.bonds_values.shape == (6, 4)
+    assert system.impropers_values.shape == (1, 6)
+    assert system.masses_element == ['C', 'O']
+    # one chain along x and one along the field in z
+    np.testing.assert_array_equal(system.molecules.chain_length, [3, 3])
+    np.testing.assert_allclose(system.molecules.end_to_end_cos, [0, 1])
+
+    outputs = archive.run[0].calculation[0].electrooptics_output
+    assert len(outputs) == 3
+    # the samples are stored once, in the ensemble
+    assert outputs[0].theta is None
+    # short trajectories are kept completely for plotting
+    ensemble = archive.run[0].calculation[0].electrooptics_ensemble
+    np.testing.assert_array_equal(outputs[0].plot_theta, ensemble.theta[0])
+    # natural sort order: theta_1, theta_2, theta_10
+    assert outputs[2].plot_theta[0] == 0.12
+
+    dump = archive.run[0].calculation[0].electrooptics_dump
+    assert dump.path == 'dump.electrooptics'
+    assert dump.n_frames == 3
+    assert dump.box_hi.shape == (3, 3)
+    # the field of fix 2 points along z
+    np.testing.assert_allclose(dump.mean_cos, [0.5, 1.0, 0.0])
+    assert len(dump.frame) == 3
+    assert dump.frame[1].atoms_position.shape == (8, 3)
+
+    statistics = outputs[0].statistics
+    assert statistics.final_value == 0.57
+    assert 0.1 < statistics.mean <= 0.57
+    ensemble = archive.run[0].calculation[0].electrooptics_ensemble_statistics
+    assert ensemble.n_trajectories == 3
+    assert ensemble.final_value_mean == pytest.approx((0.57 + 0.56 + 0.58) / 3)
+
+    ensemble = archive.run[0].calculation[0].electrooptics_ensemble
+    assert ensemble.source_file == ['theta_1.dat', 'theta_2.dat', 'theta_10.dat']
+    np.testing.assert_array_equal(ensemble.time, np.arange(6))
+    assert ensemble.theta.shape == (3, 6)
+    # all six samples, the last one included
+    np.testing.assert_array_equal(ensemble.theta[:, -1], [0.57, 0.56, 0.58])
+    assert ensemble.mean[-1] == pytest.approx((0.57 + 0.56 + 0.58) / 3)
+
+
+def test_parse_run_cached(tmp_path):
+    settings = configuration.model_copy(update={'cache_directory': str(tmp_path)})
+    archives = []
+    for _ in range(2):
+        archive = EntryArchive()
+        DetailedParser(
+            Path('tests/data/electrooptics/in_electrooptics.lmp'), archive, settings
+        )
+        archives.append(archive.run[0].calculation[0].electrooptics_system)
+
+    assert len(list(tmp_path.glob('*.npz'))) == 1
+    np.testing.assert_array_equal(archives[1].bonds_values, archives[0].bonds_values)
+    assert archives[1].atoms == archives[0].atoms
+
+
+def test_parse_run_incremental(tmp_path, monkeypatch):
+    run_directory = tmp_path / 'run'
+    shutil.copytree('tests/data/electrooptics', run_directory)
+    (run_directory / 'settings.lmp').write_text('thermo 100\n')
+    with open(run_directory / 'in_electrooptics.lmp', 'a') as f:
+        f.write('include settings.lmp\n')
+    settings = configuration.model_copy(
+        update={'cache_directory': str(tmp_path / 'cache'), 'incremental': True}
+    )
+    parsed = []
+
+    def read_theta_files(paths, **kwargs):
+        parsed.extend(Path(path).name for path in paths)
+        return theta.read_theta_files(paths, **kwargs)
+
+    monkeypatch.setattr(
+        'electrooptics_parser.readers.run.read_theta_files', read_theta_files
+    )
+    mainfile = run_directory / 'in_electrooptics.lmp'
+    DetailedParser(mainfile, EntryArchive(), settings)
+    assert len(parsed) == 3
+
+    parsed.clear()
+    shutil.copy(run_directory / 'theta_2.dat', run_directory / 'theta_3.dat')
+    (run_directory / 'theta_10.dat').write_text('Time theta\n0 0.2\n1 0.4\n')
+    archive = EntryArchive()
+    DetailedParser(mainfile, archive, settings)
+
+    assert parsed == ['theta_10.dat']  # theta_3 has the content of theta_2
+    calculation = archive.run[0].calculation[0]
+    assert len(calculation.electrooptics_output) == 4
+    assert calculation.electrooptics_ensemble.n_samples[3] == 2
+    assert [source.path for source in calculation.source_file] == [
+        'in_electrooptics.lmp',
+        'system_electrooptics.data',
+        'theta_1.dat',
+        'theta_2.dat',
+        'theta_3.dat',
+        'theta_10.dat',
+        'settings.lmp',
+        'dump.electrooptics',
+    ]
+
+
+def test_parse_run_with_trajectory_theta():
+    settings = configuration.model_copy(
+        update={'store_trajectory_theta': True, 'theta_plot_points': 4}
+    )
+    archive = EntryArchive()
+    DetailedParser(
+        Path('tests/data/electrooptics/in_electrooptics.lmp'), archive, settings
+    )
+
+    calculation = archive.run[0].calculation[0]
+    assert calculation.electrooptics_output[0].theta.shape == (6, 2)
+    assert calculation.electrooptics_output[2].theta[0, 1] == 0.12
+    assert calculation.electrooptics_output[2].statistics.final_value == 0.58
+    assert calculation.electrooptics_ensemble.theta[2, 0] == 0.12
+    # downsampled for plotting
+    assert len(calculation.electrooptics_output[2].plot_theta) == 4
+    assert calculation.electrooptics_output[2].plot_theta[0] == 0.12
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.events = []
+
+    def __getattr__(self, level):
+        return lambda event, **fields: self.events.append((level, event, fields))
+
+
+def test_parse_run_instrumented(tmp_path, monkeypatch):
+    settings = configuration.model_copy(
+        update={'profiler': 'cprofile', 'profile_directory': str(tmp_path)}
+    )
+    monkeypatch.setattr('electrooptics_parser.parsers.parser.configuration', settings)
+    logger = RecordingLogger()
+    NewParser().parse(
+        'tests/data/electrooptics/in_electrooptics.lmp', EntryArchive(), logger
+    )
+
+    phases = {
+        fields['phase']: fields
+        for level, event, fields in logger.events
+        if event == 'electrooptics parser phase'
+    }
+    assert list(phases) == [
+        'discovery',
+        'input_script',
+        'system_file',
+        'theta_files',
+        'topology',
+        'dump_file',
+        'statistics',
+        'population',
+    ]
+    assert phases['system_file']['rows'] == 8
+    assert phases['theta_files']['rows'] == 18
+    assert all(phase['wall_time'] >= 0 for phase in phases.values())
+    assert all(phase['peak_rss_delta'] >= 0 for phase in phases.values())
+
+    files = [fields for level, event, fields in logger.events if level == 'debug']
+    assert [fields['path'] for fields in files] == [
+        'theta_1.dat',
+        'theta_2.dat',
+        'theta_10.dat',
+    ]
+    assert files[0]['rows'] == 6
+    assert len(list(tmp_path.glob('*.prof'))) == 1
+
+
+def test_parse_run_child_archives(monkeypatch):
+    settings = configuration.model_copy(update={'child_archives': True})
+    monkeypatch.setattr('electrooptics_parser.parsers.parser.configuration', settings)
+    parser = parser_entry_point.load()
+    mainfile = 'tests/data/electrooptics/in_electrooptics.lmp'
+    keys = parser.is_mainfile(os.path.abspath(mainfile), 'text/plain', b'', '')
+    assert keys == ['theta_1.dat', 'theta_2.dat', 'theta_10.dat']
+    assert parser.creates_children
+    assert not parser.is_mainfile('tests/data/example.out', 'text/plain', b'', '')
+
+    archive = EntryArchive(metadata=EntryMetadata(mainfile=mainfile))
+    child_archives = {key: EntryArchive() for key in keys}
+    parser.parse(mainfile, archive, logging.getLogger(), child_archives)
+
+    calculation = archive.run[0].calculation[0]
+    assert len(calculation.electrooptics_output) == 0
+    assert calculation.electrooptics_ensemble_statistics.n_trajectories == 3
+    # the main entry keeps the ensemble curves only
+    assert calculation.electrooptics_ensemble.theta is None
+    assert len(calculation.electrooptics_ensemble.mean) == 6
+
+    child = child_archives['theta_10.dat'].run[0].calculation[0]
+    assert child.electrooptics_output[0].theta[0, 1] == 0.12
+    assert child.electrooptics_output[0].statistics.final_value == 0.58
+    assert child.temperature.magnitude == 300.0
+    assert child.m_to_dict()['parent_system'] == (
+        f'../upload/archive/mainfile/{mainfile}#/run/0/calculation/0'
+        '/electrooptics_system'
+    )
+
+
+def test_parse_run_compressed(tmp_path):
+    for path in Path('tests/data/electrooptics').iterdir():
+        opener = bz2.open if path.name.startswith('theta') else gzip.open
+        with open(path, 'rb') as f, opener(tmp_path / f'{path.name}.gz', 'wb') as g:
+            g.write(f.read())
+    expected = EntryArchive()
+    DetailedParser(Path('tests/data/electrooptics/in_electrooptics.lmp'), expected)
+
+    archive = EntryArchive()
+    DetailedParser(tmp_path / 'in_electrooptics.lmp.gz', archive)
+
+    calculation = archive.run[0].calculation[0]
+    expected = expected.run[0].calculation[0]
+    assert calculation.electrooptics_input.e_field == 0.05
+    np.testing.assert_array_equal(
+        calculation.electrooptics_system.bonds_values,
+        expected.electrooptics_system.bonds_values,
+    )
+    assert len(calculation.electrooptics_output) == 3
+    np.testing.assert_array_equal(
+        calculation.electrooptics_output[2].theta,
+        expected.electrooptics_output[2].theta,
+    )
+    assert calculation.electrooptics_dump.path == 'dump.electrooptics.gz'
+    assert calculation.electrooptics_dump.n_frames == 3
+
+
+def test_parse_run_hdf5(tmp_path):
+    shutil.copytree('tests/data/electrooptics', tmp_path / 'run')
+    settings = configuration.model_copy(update={'hdf5_arrays': True})
+    archive = EntryArchive(metadata=EntryMetadata(mainfile='run/in_electrooptics.lmp'))
+    DetailedParser(tmp_path / 'run/in_electrooptics.lmp', archive, settings)
+
+    calculation = archive.run[0].calculation[0]
+    system = calculation.electrooptics_system
+    assert system.atoms_position is None
+    assert system.atoms_position_hdf5 == (
+        'run/in_electrooptics.lmp.h5'
+        '#/run/0/calculation/0/electrooptics_system/atoms_position'
+    )
+    np.testing.assert_array_equal(
+        read_rows(system.atoms_position_hdf5, tmp_path, slice(4, 5)), [[10, 10, 4]]
+    )
+    assert read_rows(system.bonds_values_hdf5, tmp_path).shape == (6, 4)
+    # small arrays stay in the archive
+    assert system.masses_element == ['C', 'O']
+    theta = read_rows(calculation.electrooptics_ensemble.theta_hdf5, tmp_path)
+    assert theta[2, 0] == 0.12
+    mask = read_rows(calculation.electrooptics_ensemble.mask_hdf5, tmp_path)
+    assert mask.all()
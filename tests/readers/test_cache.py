@@ -0,0 +1,26 @@
+import numpy as np
+
+from electrooptics_parser.readers.cache import SystemCache, content_hash
+from electrooptics_parser.readers.data_file import read_data_file
+
+SYSTEM = 'tests/data/electrooptics/system_electrooptics.data'
+
+
+def test_system_cache(tmp_path):
+    header, arrays = read_data_file(SYSTEM)
+    cache = SystemCache(tmp_path, max_bytes=10**6)
+    key = content_hash(SYSTEM)
+
+    assert cache.load(key) is None
+    cache.store(key, header, arrays)
+    cached_header, cached_arrays = cache.load(key)
+
+    assert cached_header == header
+    for name, values in arrays.items():
+        np.testing.assert_array_equal(cached_arrays[name], values)
+        assert cached_arrays[name].dtype == values.dtype
+
+    # a limit below the size of one entry evicts everything
+    cache.max_bytes = 0
+    cache.store('other', header, arrays)
+    assert cache.load(key) is None
@@ -0,0 +1,33 @@
+import bz2
+import gzip
+import lzma
+
+import pytest
+
+from electrooptics_parser.readers.compression import (
+    detect_compression,
+    find_file,
+    open_file,
+)
+
+
+@pytest.mark.parametrize(
+    'compression, opener', [('gz', gzip.open), ('xz', lzma.open), ('bz2', bz2.open)]
+)
+def test_open_file(tmp_path, compression, opener):
+    # detected by content, not by name
+    path = tmp_path / 'theta_1.dat'
+    with opener(path, 'wb') as f:
+        f.write(b'Time theta\n0 0.1\n')
+
+    assert detect_compression(path) == compression
+    with open_file(path, 'rt') as f:
+        assert f.read() == 'Time theta\n0 0.1\n'
+
+
+def test_find_file(tmp_path):
+    (tmp_path / 'dump.electrooptics.xz').write_bytes(b'')
+
+    assert detect_compression(tmp_path / 'dump.electrooptics.xz') is None
+    assert find_file(str(tmp_path / 'dump.electrooptics')).endswith('.xz')
+    assert find_file(str(tmp_path / 'dump.other')) is None
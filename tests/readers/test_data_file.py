@@ -0,0 +1,142 @@
+import gzip
+import os
+
+import numpy as np
+import pytest
+
+from electrooptics_parser.benchmarks.synthetic import write_system
+from electrooptics_parser.instrumentation import Instrumentation
+from electrooptics_parser.readers.data_file import (
+    index_data_file,
+    read_data_file,
+    read_section,
+)
+
+DATA = b"""LAMMPS data file
+
+3 atoms
+2 bonds
+0 impropers
+2 atom types
+
+-1.5 1.5e1 xlo xhi
+
+Masses
+
+1 12.011
+2 1.008
+
+Atoms # full
+
+1 1 1 -0.2 0.0 0.0 0.0 0 0 0
+2 1 2 0.1 1.0 0.0 0.0 0 0 0 # end
+3 1 2 0.1 -1.0 0.0 0.0 0 0 0
+
+Bonds
+
+1 1 1 2
+2 1 1 3
+"""
+
+
+def test_index_data_file():
+    header, sections = index_data_file(DATA)
+
+    assert header == {
+        'atoms': 3,
+        'bonds': 2,
+        'impropers': 0,
+        'atom_types': 2,
+        'xlo': -1.5,
+        'xhi': 15,
+    }
+    assert list(sections) == ['Masses', 'Atoms', 'Bonds']
+
+    start, end = sections['Atoms']
+    atoms = read_section(DATA[start:end], 3, 7)
+    assert atoms.shape == (3, 7)
+    np.testing.assert_array_equal(atoms[:, 4], [0.0, 1.0, -1.0])
+
+    with pytest.raises(ValueError):
+        read_section(DATA[start:end], 4, 7)
+
+
+@pytest.mark.parametrize('compressed', [False, True])
+def test_read_data_file_masses(tmp_path, compressed):
+    path = tmp_path / 'system.data'
+    path.write_bytes(gzip.compress(DATA) if compressed else DATA)
+    _, arrays = read_data_file(path)
+
+    np.testing.assert_array_equal(arrays['masses_type'], [1, 2])
+    np.testing.assert_array_equal(arrays['masses_value'], [12.011, 1.008])
+
+    # masses may be set by the input script instead
+    data = DATA.replace(b'Masses\n\n1 12.011\n2 1.008\n\n', b'')
+    path.write_bytes(gzip.compress(data) if compressed else data)
+    _, arrays = read_data_file(path)
+
+    assert arrays['masses_type'].shape == (0,)
+    assert arrays['atoms_type'].tolist() == [1, 2, 2]
+
+
+def test_read_data_file_memory_map():
+    path = 'tests/data/electrooptics/system_electrooptics.data'
+    header, arrays = read_data_file(path)
+    mapped_header, mapped_arrays = read_data_file(path, memory_map=True, chunk_size=16)
+
+    assert mapped_header == header
+    for name, values in arrays.items():
+        np.testing.assert_array_equal(mapped_arrays[name], values)
+
+
+@pytest.mark.parametrize('memory_map', [False, True])
+def test_read_data_file_crlf(tmp_path, memory_map):
+    path = 'tests/data/electrooptics/system_electrooptics.data'
+    crlf = tmp_path / 'system_electrooptics.data'
+    with open(path, 'rb') as f:
+        crlf.write_bytes(f.read().replace(b'\n', b'\r\n'))
+    header, arrays = read_data_file(path)
+
+    # windows of the section index ending on keyword lines
+    for chunk_size in (7, 64):
+        crlf_header, crlf_arrays = read_data_file(
+            crlf, memory_map=memory_map, chunk_size=chunk_size
+        )
+        assert crlf_header == header
+        for name, values in arrays.items():
+            np.testing.assert_array_equal(crlf_arrays[name], values)
+
+
+@pytest.mark.skipif(
+    not os.path.exists('/proc/self/clear_refs'), reason='peak memory is not reset'
+)
+def test_read_data_file_memory_map_peak(tmp_path):
+    path = tmp_path / 'system_electrooptics.data'
+    write_system(path, 200_000)
+    instrumentation = Instrumentation()
+
+    with instrumentation.phase('system_file') as record:
+        _, arrays = read_data_file(path, memory_map=True, chunk_size=1024**2)
+
+    # neither the mapped file nor a structured copy of the atoms stays resident
+    nbytes = sum(values.nbytes for values in arrays.values())
+    assert record['peak_rss_delta'] < 1.5 * nbytes < os.path.getsize(path)
+
+
+def test_read_data_file_compressed(tmp_path):
+    path = 'tests/data/electrooptics/system_electrooptics.data'
+    compressed = tmp_path / 'system_electrooptics.data.gz'
+    with open(path, 'rb') as f, gzip.open(compressed, 'wb') as g:
+        g.write(f.read())
+    header, arrays = read_data_file(path)
+    # chunks smaller than a line and than the header
+    streamed_header, streamed_arrays = read_data_file(compressed, chunk_size=16)
+
+    assert streamed_header == header
+    for name, values in arrays.items():
+        np.testing.assert_array_equal(streamed_arrays[name], values)
+
+    truncated = tmp_path / 'truncated.gz'
+    truncated.write_bytes(gzip.compress(DATA[: DATA.index(b'2 1 1 3')]))
+    with pytest.raises(ValueError):
+        read_data_file(truncated)
@@ -0,0 +1,81 @@
+import lzma
+
+import numpy as np
+import pytest
+
+from electrooptics_parser.readers.dump import (
+    index_dump,
+    read_dump,
+    read_frame,
+    select_frames,
+)
+
+DUMP = 'tests/data/electrooptics/dump.electrooptics'
+
+
+def test_index_dump():
+    with open(DUMP, 'rb') as f:
+        buffer = f.read()
+    index = index_dump(buffer)
+
+    np.testing.assert_array_equal(index.timestep, [0, 1000, 2000])
+    np.testing.assert_array_equal(index.n_atoms, [8, 8, 8])
+    assert index.box[2, 0, 1] == 20.5
+    assert index.columns == ('id', 'mol', 'type', 'x', 'y', 'z')
+    frame = read_frame(buffer, index, 2)
+    assert frame['atoms_index'][0] == 5
+    assert frame['atoms_molecule'].dtype == np.int32
+    assert frame['atoms_position'].shape == (8, 3)
+
+
+def test_index_dump_scaled():
+    buffer = (
+        b'ITEM: TIMESTEP\n5\nITEM: NUMBER OF ATOMS\n1\n'
+        b'ITEM: BOX BOUNDS xy xz yz pp pp pp\n-1.0 3.0 0.0\n0.0 2.0 0.0\n0.0 2.0 0.0\n'
+        b'ITEM: ATOMS id xs ys zs\n1 0.25 0.5 1.0\n'
+    )
+    index = index_dump(buffer)
+
+    np.testing.assert_allclose(
+        read_frame(buffer, index, 0)['atoms_position'], [[0, 1, 2]]
+    )
+    assert len(index_dump(b'').timestep) == 0
+    with pytest.raises(ValueError):
+        index_dump(b'ITEM: TIMESTEP\n1\nITEM: ATOMS id\n')
+
+
+def test_select_frames():
+    np.testing.assert_array_equal(select_frames(10, 3), [0, 4, 9])
+    np.testing.assert_array_equal(select_frames(3, None), [0, 1, 2])
+    np.testing.assert_array_equal(select_frames(3, 5), [0, 1, 2])
+    assert len(select_frames(3, 0)) == 0
+
+
+def test_read_dump():
+    dump = read_dump(DUMP, frames=2, summary_frames=None)
+
+    assert dump['n_frames'] == 3
+    assert [frame['timestep'] for frame in dump['frames']] == [0, 2000]
+    np.testing.assert_allclose(dump['mean_cos'], [0.5, 1.0, 0.0])
+    np.testing.assert_allclose(dump['p2'], [0.25, 1.0, 1.0])
+    np.testing.assert_allclose(dump['nematic_order'], [0.25, 1.0, 1.0])
+
+    dump = read_dump(DUMP, frames=0, summary_frames=2, direction=[1.0, 0.0, 0.0])
+    assert dump['frames'] == []
+    np.testing.assert_array_equal(dump['summary_timestep'], [0, 2000])
+    np.testing.assert_allclose(dump['mean_cos'], [0.5, 0.0])
+
+
+def test_read_dump_compressed(tmp_path):
+    compressed = tmp_path / 'dump.electrooptics.xz'
+    with open(DUMP, 'rb') as f:
+        compressed.write_bytes(lzma.compress(f.read()))
+    expected = read_dump(DUMP, frames=2, summary_frames=None)
+
+    dump = read_dump(compressed, frames=2, summary_frames=None)
+
+    np.testing.assert_array_equal(dump['box_hi'], expected['box_hi'])
+    np.testing.assert_allclose(dump['mean_cos'], expected['mean_cos'])
+    np.testing.assert_array_equal(
+        dump['frames'][1]['atoms_position'], expected['frames'][1]['atoms_position']
+    )
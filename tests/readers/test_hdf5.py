@@ -0,0 +1,19 @@
+import h5py
+import numpy as np
+
+from electrooptics_parser.readers import hdf5
+from electrooptics_parser.readers.hdf5 import read_rows, write_datasets
+
+
+def test_write_datasets(tmp_path, monkeypatch):
+    monkeypatch.setattr(hdf5, 'CHUNK_BYTES', 10 * 3 * 8)
+    positions = np.arange(300, dtype=np.float64).reshape(100, 3)
+    with h5py.File(tmp_path / 'run.h5', 'w') as f:
+        write_datasets(f, {'/system/positions': positions, '/empty': np.zeros(0)})
+        assert f['/system/positions'].chunks == (10, 3)
+        assert f['/system/positions'].compression == 'gzip'
+
+    rows = read_rows('run.h5#/system/positions', tmp_path, slice(40, 42))
+
+    np.testing.assert_array_equal(rows, positions[40:42])
+    np.testing.assert_array_equal(read_rows('run.h5#/empty', tmp_path), [])
@@ -0,0 +1,78 @@
+from electrooptics_parser.readers.input_script import (
+    dump_file,
+    efield_direction,
+    read_input_script,
+)
+
+
+def test_read_input_script(tmp_path):
+    (tmp_path / 'settings.lmp').write_text(
+        'pair_style lj/cut 12.0\nvariable T index 400\n'
+    )
+    (tmp_path / 'in_electrooptics.lmp').write_text(
+        """# header
+variable T equal 300.0
+variable efield equal 0.1
+variable name string "poled"  # comment
+include settings.lmp
+group fixed id 1 2 &
+    3 4
+compute dipole all property/atom mux
+thermo_modify norm no
+thermo 50
+dump 1 all custom 100 dump.${name} id x y z
+dump_modify 1 sort id
+fix 1 all efield 0.0 0.0 v_efield
+fix 2 fixed setforce 0.0 0.0 0.0
+velocity all create $T 12345
+"""
+    )
+
+    script = read_input_script(tmp_path / 'in_electrooptics.lmp')
+    quantities = script.quantities
+
+    assert script.variables['T'] == 300.0
+    assert script.includes == [str(tmp_path / 'settings.lmp')]
+    assert quantities['e_field'] == 0.1
+    assert quantities['pair_style'] == ['lj/cut', '12.0']
+    assert quantities['group'] == ['fixed', 'id', '1', '2', '3', '4']
+    assert quantities['compute'] == ['dipole', 'all', 'property/atom', 'mux']
+    assert quantities['thermo_modify'] == ['norm', 'no']
+    assert quantities['thermo'] == 50.0
+    assert quantities['dump'][4] == 'dump.poled'
+    assert quantities['dump_modify'] == ['1', 'sort', 'id']
+    assert quantities['velocity'] == ['all', 'create', '300.0', '12345']
+    assert script.fixes == [
+        ['1', 'all', 'efield', '0.0', '0.0', '0.1'],
+        ['2', 'fixed', 'setforce', '0.0', '0.0', '0.0'],
+    ]
+    assert efield_direction(script.fixes) == [0.0, 0.0, 0.1]
+    assert dump_file(quantities) == 'dump.poled'
+
+
+def test_read_input_script_skips_bad_lines(tmp_path, caplog):
+    (tmp_path / 'in_electrooptics.lmp').write_text(
+        """units real
+print "unbalanced
+include missing.lmp
+thermo 50
+"""
+    )
+
+    script = read_input_script(tmp_path / 'in_electrooptics.lmp')
+
+    assert script.quantities == {'units': 'real', 'thermo': 50.0}
+    assert script.includes == []
+    messages = [record.getMessage() for record in caplog.records]
+    assert len(messages) == 2
+    assert 'No closing quotation' in messages[0]
+    assert 'missing.lmp' in messages[1]
+
+
+def test_efield_direction():
+    assert efield_direction([['1', 'all', 'efield', '0', '0', 'v_e']]) is None
+    assert efield_direction([['1', 'all', 'efield', '0', '0', '0']]) is None
+    assert efield_direction(
+        [['1', 'all', 'nve'], ['2', 'all', 'efield', '1', '0', '0']]
+    )
+    assert dump_file({'dump': ['1', 'all', 'atom', '100', 'dump.*.lammpstrj']}) is None
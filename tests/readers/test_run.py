@@ -0,0 +1,70 @@
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from electrooptics_parser.analysis.order_parameter import ensemble_statistics
+from electrooptics_parser.instrumentation import Instrumentation
+from electrooptics_parser.parsers import parser_entry_point
+from electrooptics_parser.readers.run import ParseSettings, read_run
+
+
+def test_read_run():
+    instrumentation = Instrumentation()
+    run = read_run(
+        'tests/data/electrooptics/in_electrooptics.lmp',
+        ParseSettings(theta_workers=1),
+        instrumentation,
+    )
+
+    assert run.script.quantities['e_field'] == 0.05
+    assert run.system.header['atoms'] == 8
+    assert run.system.arrays['atoms_position'].shape == (8, 3)
+    assert run.system.masses_element.tolist() == ['C', 'O']
+    np.testing.assert_array_equal(run.system.molecules['chain_length'], [3, 3])
+    assert len(run.theta.thetas) == 3
+    assert run.theta.ensemble['theta'].shape == (3, 6)
+    assert run.theta.statistics['mean'].shape == (3,)
+    assert run.dump['n_frames'] > 0
+    assert [
+        record['phase'] for record in instrumentation.records if 'path' not in record
+    ] == [
+        'discovery',
+        'input_script',
+        'system_file',
+        'theta_files',
+        'topology',
+        'dump_file',
+        'statistics',
+    ]
+
+
+def test_read_run_empty_theta_file(tmp_path):
+    shutil.copytree('tests/data/electrooptics', tmp_path / 'run')
+    (tmp_path / 'run/theta_3.dat').write_text('Time theta\n')
+
+    with pytest.warns(UserWarning, match='no data'):
+        run = read_run(tmp_path / 'run/in_electrooptics.lmp')
+
+    assert run.theta.ensemble['n_samples'].tolist() == [6, 6, 0, 6]
+    assert np.isnan(run.theta.statistics['final_value'][2])
+    ensemble = ensemble_statistics(run.theta.statistics)
+    assert ensemble['final_value_mean'] == pytest.approx((0.57 + 0.56 + 0.58) / 3)
+
+
+def test_read_run_without_nomad():
+    code = (
+        'import sys\n'
+        'from electrooptics_parser.readers.run import read_run\n'
+        "packages = {name.split('.')[0] for name in sys.modules}\n"
+        "assert not packages & {'nomad', 'runschema'}\n"
+    )
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+
+def test_parse_settings():
+    # the defaults of the parsing options are those of the entry point
+    for name, value in ParseSettings()._asdict().items():
+        assert getattr(parser_entry_point, name) == value
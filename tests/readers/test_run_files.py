@@ -0,0 +1,27 @@
+import os
+
+from electrooptics_parser.readers.run_files import scan_run_directory
+
+
+def test_scan_run_directory(tmp_path):
+    for name in (
+        'in_electrooptics.lmp',
+        'system_electrooptics.data',
+        'theta_10.dat',
+        'theta_2.dat',
+        'theta.restart',
+        'log.lammps',
+    ):
+        (tmp_path / name).write_text('')
+    (tmp_path / 'nested').mkdir()
+    (tmp_path / 'nested' / 'theta_1.dat').write_text('')
+
+    run_files = scan_run_directory(tmp_path)
+
+    assert run_files.inputs == (str(tmp_path / 'in_electrooptics.lmp'),)
+    assert run_files.system == str(tmp_path / 'system_electrooptics.data')
+    assert [os.path.basename(path) for path in run_files.theta] == [
+        'theta_2.dat',
+        'theta_10.dat',
+    ]
+    assert scan_run_directory(tmp_path) is run_files
@@ -0,0 +1,14 @@
+import numpy as np
+
+from electrooptics_parser.readers.theta import read_theta_files
+
+
+def test_read_theta_files_parallel():
+    paths = [f'tests/data/electrooptics/theta_{index}.dat' for index in (1, 2, 10)] * 4
+    serial = read_theta_files(paths, workers=1)
+    parallel = read_theta_files(paths, workers=2, min_parallel_bytes=0)
+
+    assert len(parallel) == len(paths)
+    for expected, theta in zip(serial, parallel):
+        np.testing.assert_array_equal(theta, expected)
+    assert serial[0].shape == (6, 2)
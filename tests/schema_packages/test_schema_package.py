@@ -1,7 +1,10 @@
 import os.path
 
+import numpy as np
 from nomad.client import normalize_all, parse
 
+from electrooptics_parser.schema_packages.schema_package import ElectroopticsSystem
+
 
 def test_schema_package():
     test_file = os.path.join('tests', 'data', 'test.archive.yaml')
@@ -9,3 +12,21 @@ def test_schema_package():
     normalize_all(entry_archive)
 
     assert entry_archive.data.message == 'Hello Markus!'
+
+
+def test_upgrade_legacy_layout():
+    system = ElectroopticsSystem.m_from_dict(
+        {
+            'atoms': 2.0,
+            'atoms_values': [[1, 1, 1, -0.1, 0, 0, 0], [2, 1, 2, 0.1, 1.5, 0, 0]],
+            'bonds_values': [[1.0], [1.0], [1.0], [2.0]],
+        }
+    )
+    system.upgrade_legacy_layout()
+
+    assert system.atoms == 2
+    assert system.atoms_values is None
+    assert system.atoms_type.dtype == np.int32
+    np.testing.assert_array_equal(system.atoms_type, [1, 2])
+    np.testing.assert_array_equal(system.atoms_position[:, 0], [0.0, 1.5])
+    np.testing.assert_array_equal(system.bonds_values, [[1, 1, 1, 2]])